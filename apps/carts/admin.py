@@ -0,0 +1,17 @@
+from django.contrib import admin
+from .models import Cart, CartItem
+
+
+class CartItemInline(admin.TabularInline):
+    model = CartItem
+    readonly_fields = ('product', 'quantity', 'selected_size', 'selected_color', 'display_price',
+                       'added_at', 'updated_at')
+    extra = 0
+
+
+@admin.register(Cart)
+class CartAdmin(admin.ModelAdmin):
+    list_display = ('user', 'created_at', 'updated_at')
+    search_fields = ('user__phone_number', 'user__full_name')
+    readonly_fields = ('user', 'created_at', 'updated_at')
+    inlines = [CartItemInline]
@@ -0,0 +1,55 @@
+from django.db import models
+from apps.accounts.models import CustomUser
+from apps.products.models import Product
+
+
+class Cart(models.Model):
+    """A customer's server-side cart, shared by all their devices"""
+
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='cart')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'carts'
+        verbose_name = 'Cart'
+        verbose_name_plural = 'Carts'
+
+    def __str__(self):
+        return f"Cart of {self.user.full_name}"
+
+
+class CartItem(models.Model):
+    """One cart line: a product in one size/color, with the price the customer last saw"""
+
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='cart_items')
+
+    quantity = models.PositiveIntegerField(default=1)
+    selected_size = models.CharField(max_length=20, blank=True)
+    selected_color = models.CharField(max_length=50, blank=True)
+
+    # display_price when the line was added or last revalidated; checkout
+    # refuses to charge a different price without the customer seeing it
+    display_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    added_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'cart_items'
+        verbose_name = 'Cart Item'
+        verbose_name_plural = 'Cart Items'
+        unique_together = ('cart', 'product', 'selected_size', 'selected_color')
+
+    def as_cart_item(self):
+        """The line in the cart_items format OrderCalculator takes"""
+        return {
+            'product_id': self.product_id,
+            'quantity': self.quantity,
+            'size': self.selected_size,
+            'color': self.selected_color,
+        }
+
+    def __str__(self):
+        return f"{self.product_id} x {self.quantity}"
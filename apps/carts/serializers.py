@@ -0,0 +1,57 @@
+from rest_framework import serializers
+from .models import CartItem
+from .utils import is_orderable, price_changed
+
+
+class CartItemCreateSerializer(serializers.Serializer):
+    """A line to add: one item of create_order's cart_items"""
+
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+    size = serializers.CharField(max_length=20, required=False, allow_blank=True, default='')
+    color = serializers.CharField(max_length=50, required=False, allow_blank=True, default='')
+
+
+class CartItemUpdateSerializer(serializers.Serializer):
+    quantity = serializers.IntegerField(min_value=0)
+
+
+class CartItemSerializer(serializers.ModelSerializer):
+    """A line with its product's current price, stock and availability"""
+
+    product_id = serializers.IntegerField(read_only=True)
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    image_url = serializers.SerializerMethodField()
+    current_price = serializers.DecimalField(
+        source='product.display_price', max_digits=10, decimal_places=2, read_only=True
+    )
+    price_changed = serializers.SerializerMethodField()
+    stock_quantity = serializers.IntegerField(source='product.stock_quantity', read_only=True)
+    is_available = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CartItem
+        fields = ('id', 'product_id', 'product_name', 'image_url', 'quantity', 'selected_size',
+                  'selected_color', 'display_price', 'current_price', 'price_changed',
+                  'stock_quantity', 'is_available', 'added_at')
+
+    def get_image_url(self, obj):
+        # {product_id: url} loaded once per response by the view
+        return self.context.get('image_urls', {}).get(obj.product_id)
+
+    def get_price_changed(self, obj):
+        return price_changed(obj)
+
+    def get_is_available(self, obj):
+        return is_orderable(obj.product)
+
+
+class CartSerializer(serializers.Serializer):
+    """utils.summarize output"""
+
+    items = CartItemSerializer(many=True)
+    items_count = serializers.IntegerField()
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+    price_changed = serializers.BooleanField()
+    is_valid = serializers.BooleanField()
+    errors = serializers.ListField(child=serializers.CharField())
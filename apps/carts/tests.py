@@ -0,0 +1,76 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.orders.models import Order
+from apps.orders.tests import ShopFixtureMixin
+from apps.orders.utils import OrderCalculator
+from apps.products.models import Product
+from .models import CartItem
+
+DELIVERY = {
+    'delivery_name': 'Customer',
+    'delivery_phone': '9999999999',
+    'delivery_address': '-',
+    'delivery_city': 'Amravati',
+    'delivery_pincode': '444601',
+}
+
+
+class CartTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.create_fixture()
+        self.client = self.client_for(self.customers[0])
+
+    def add(self, product, quantity=1):
+        return self.client.post('/api/cart/items', {'product_id': product.id, 'quantity': quantity}, format='json')
+
+    def test_line_writes(self):
+        item_id = self.add(self.product).json()['item']['id']
+        self.assertEqual(self.add(self.product, 2).json()['item']['id'], item_id)
+        self.assertEqual(CartItem.objects.get().quantity, 3)
+
+        self.client.patch(f'/api/cart/items/{item_id}', {'quantity': 5}, format='json')
+        self.assertEqual(CartItem.objects.get().quantity, 5)
+        # Someone else's line
+        other = self.client_for(self.customers[1])
+        self.assertEqual(other.delete(f'/api/cart/items/{item_id}').status_code, 404)
+
+        self.client.delete(f'/api/cart/items/{item_id}')
+        self.assertFalse(CartItem.objects.exists())
+        self.assertEqual(self.add(self.product, self.stock + 1).status_code, 400)
+
+    def test_revalidation_cost_does_not_grow_with_the_cart(self):
+        for i in range(3):
+            product = Product.objects.create(
+                shop=self.shop, name=f'Shirt {i}', base_price=Decimal('100'),
+                commission_rate=Decimal('15.00'), stock_quantity=5
+            )
+            self.add(product, 2)
+        Product.objects.filter(name='Shirt 0').update(stock_quantity=1)
+
+        # Lines with products and shops, variant attributes, images
+        with self.assertNumQueries(3):
+            cart = self.client.get('/api/cart/').json()['cart']
+        self.assertEqual(cart['items_count'], 3)
+        self.assertFalse(cart['is_valid'])
+        self.assertEqual(cart['errors'], ['Shirt 0: Only 1 items in stock'])
+
+    def test_checkout_reuses_the_validated_lines(self):
+        self.add(self.product, 2)
+        self.product.base_price = Decimal('200')
+        self.product.save()
+
+        response = self.client.post('/api/cart/checkout', DELIVERY, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(response.json()['cart']['price_changed'])
+
+        self.assertEqual(self.client.post('/api/cart/validate').json()['repriced_items'], 1)
+        with mock.patch.object(OrderCalculator, 'load_cart_products', side_effect=AssertionError):
+            response = self.client.post('/api/cart/checkout', DELIVERY, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['order']['subtotal'], '460.00')
+        self.assertEqual(Order.objects.get().items.get().quantity, 2)
+        self.assertFalse(CartItem.objects.exists())
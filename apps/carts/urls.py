@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.cart_detail, name='cart-detail'),
+    path('items', views.add_cart_item, name='add-cart-item'),
+    path('items/<int:item_id>', views.cart_item_detail, name='cart-item-detail'),
+    path('validate', views.validate_cart, name='validate-cart'),
+    path('checkout', views.checkout_cart, name='checkout-cart'),
+]
@@ -0,0 +1,129 @@
+"""
+Server-side carts.
+
+Line writes are single statements on cart_items whatever the cart size:
+adding merges into an existing line with ``quantity = quantity + n`` (an
+INSERT only for a new line), updates and removals hit one row by id.
+
+Revalidation reads every line with its product and shop in one query
+(plus one for variant attributes) and checks them all in memory with
+OrderCalculator.validate_cart_items: price drift against the price the
+customer last saw, stock, availability, variants, single shop. Checkout
+hands those already loaded products to OrderCreateSerializer instead of
+looking them up again.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from apps.orders.utils import OrderCalculator
+from .models import Cart, CartItem
+
+MAX_CART_LINES = 50
+
+
+class CartFull(Exception):
+    pass
+
+
+def add_line(user, product, quantity, size='', color=''):
+    """
+    Add ``quantity`` units of a product variant to the user's cart at its
+    current price, merging with an existing line. Returns the line.
+    """
+    cart, _ = Cart.objects.get_or_create(user=user)
+    lines = CartItem.objects.filter(cart=cart, product=product, selected_size=size, selected_color=color)
+    merge = {
+        'quantity': F('quantity') + quantity,
+        'display_price': product.display_price,
+        'updated_at': timezone.now(),
+    }
+
+    if not lines.update(**merge):
+        if cart.items.count() >= MAX_CART_LINES:
+            raise CartFull(f'A cart holds at most {MAX_CART_LINES} different items')
+        try:
+            with transaction.atomic():
+                return CartItem.objects.create(
+                    cart=cart, product=product, quantity=quantity,
+                    selected_size=size, selected_color=color, display_price=product.display_price
+                )
+        except IntegrityError:
+            # A concurrent add created the line first
+            lines.update(**merge)
+    return lines.select_related('product__shop').get()
+
+
+def set_quantity(user, line_id, quantity):
+    """Set a line's quantity (0 removes it); False if the user has no such line"""
+    lines = CartItem.objects.filter(id=line_id, cart__user=user)
+    if quantity == 0:
+        return lines.delete()[0] > 0
+    return lines.update(quantity=quantity, updated_at=timezone.now()) > 0
+
+
+def load_lines(user):
+    """Every line of the user's cart with product, shop and variant attributes: two queries"""
+    return list(
+        CartItem.objects.filter(cart__user=user).select_related('product__shop')
+        .prefetch_related('product__attributes').order_by('id')
+    )
+
+
+def is_orderable(product):
+    # What OrderCalculator.load_cart_products filters on
+    return product.is_active and product.shop.is_approved
+
+
+def line_products(lines):
+    """
+    {product_id: Product} of the orderable products among loaded lines, as
+    OrderCalculator.load_cart_products would return for the same cart
+    """
+    return {line.product_id: line.product for line in lines if is_orderable(line.product)}
+
+
+def revalidate(lines):
+    """Check loaded lines as checkout would, without queries: (is_valid, errors)"""
+    is_valid, errors, _ = OrderCalculator.validate_cart_items(
+        [line.as_cart_item() for line in lines], line_products(lines)
+    )
+    return is_valid, errors
+
+
+def price_changed(line):
+    return line.display_price != line.product.display_price
+
+
+def summarize(lines):
+    """Lines plus the cart-level verdict, for CartSerializer"""
+    is_valid, errors = revalidate(lines)
+    return {
+        'items': lines,
+        'items_count': len(lines),
+        'subtotal': sum(
+            (line.product.display_price * line.quantity for line in lines if is_orderable(line.product)),
+            Decimal('0.00')
+        ),
+        'price_changed': any(price_changed(line) for line in lines),
+        'is_valid': is_valid,
+        'errors': errors,
+    }
+
+
+def accept_prices(lines):
+    """Move every drifted line's price to the current one, in one UPDATE; returns how many changed"""
+    drifted = {line.id: line.product.display_price for line in lines if price_changed(line)}
+    if drifted:
+        CartItem.objects.filter(id__in=drifted).update(
+            display_price=Case(
+                *[When(id=line_id, then=Value(price)) for line_id, price in drifted.items()],
+                output_field=DecimalField(max_digits=10, decimal_places=2)
+            ),
+            updated_at=timezone.now()
+        )
+        for line in lines:
+            line.display_price = line.product.display_price
+    return len(drifted)
@@ -0,0 +1,221 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from apps.core.idempotency import idempotent
+from apps.orders.serializers import OrderCreateSerializer, OrderSerializer, cod_payment_info
+from apps.orders.utils import InsufficientStock, OrderCalculator, first_image_urls
+from .models import CartItem
+from .serializers import CartItemCreateSerializer, CartItemSerializer, CartItemUpdateSerializer, CartSerializer
+from .utils import (
+    CartFull, accept_prices, add_line, line_products, load_lines, price_changed, set_quantity, summarize
+)
+
+
+def _customers_only():
+    return Response({
+        'success': False,
+        'message': 'Only customers have a cart'
+    }, status=status.HTTP_403_FORBIDDEN)
+
+
+def _cart_data(lines):
+    image_urls = first_image_urls(line.product_id for line in lines)
+    return CartSerializer(summarize(lines), context={'image_urls': image_urls}).data
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def cart_detail(request):
+    """
+    Get the cart, revalidated against current prices and stock
+    GET /api/cart/
+
+    Empty the cart
+    DELETE /api/cart/
+    """
+
+    if request.user.user_type != 'customer':
+        return _customers_only()
+
+    if request.method == 'DELETE':
+        CartItem.objects.filter(cart__user=request.user).delete()
+        return Response({
+            'success': True,
+            'message': 'Cart emptied'
+        }, status=status.HTTP_200_OK)
+
+    return Response({
+        'success': True,
+        'cart': _cart_data(load_lines(request.user))
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def add_cart_item(request):
+    """
+    Add a product to the cart (merges with the same size/color line)
+    POST /api/cart/items
+
+    Body:
+    {
+        "product_id": 1,
+        "quantity": 2,
+        "size": "M",
+        "color": "Blue"
+    }
+    """
+
+    if request.user.user_type != 'customer':
+        return _customers_only()
+
+    serializer = CartItemCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    item = serializer.validated_data
+    products = OrderCalculator.load_cart_products([item])
+    is_valid, errors, _ = OrderCalculator.validate_cart_items([item], products)
+    if not is_valid:
+        return Response({
+            'success': False,
+            'errors': {'cart_items': errors}
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        line = add_line(request.user, products[item['product_id']], item['quantity'], item['size'], item['color'])
+    except CartFull as exc:
+        return Response({
+            'success': False,
+            'message': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'success': True,
+        'message': 'Added to cart',
+        'item': CartItemSerializer(line).data
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['PATCH', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def cart_item_detail(request, item_id):
+    """
+    Change a line's quantity (0 removes it)
+    PATCH /api/cart/items/{item_id}
+    Body: {"quantity": 3}
+
+    Remove a line
+    DELETE /api/cart/items/{item_id}
+    """
+
+    if request.user.user_type != 'customer':
+        return _customers_only()
+
+    quantity = 0
+    if request.method == 'PATCH':
+        serializer = CartItemUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                'success': False,
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        quantity = serializer.validated_data['quantity']
+
+    if not set_quantity(request.user, item_id, quantity):
+        return Response({
+            'success': False,
+            'message': 'Cart item not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({
+        'success': True,
+        'message': 'Cart updated' if quantity else 'Removed from cart'
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def validate_cart(request):
+    """
+    Revalidate the cart and accept current prices for lines whose price changed
+    POST /api/cart/validate
+    """
+
+    if request.user.user_type != 'customer':
+        return _customers_only()
+
+    lines = load_lines(request.user)
+    repriced = accept_prices(lines)
+
+    return Response({
+        'success': True,
+        'repriced_items': repriced,
+        'cart': _cart_data(lines)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent('carts:checkout')
+def checkout_cart(request):
+    """
+    Place an order for the whole cart, then empty it
+    POST /api/cart/checkout
+
+    Body: delivery details, as for POST /api/orders/create (without cart_items)
+
+    Lines whose price changed since the customer last saw it get a 409
+    with the cart; POST /api/cart/validate accepts the new prices.
+    """
+
+    if request.user.user_type != 'customer':
+        return _customers_only()
+
+    lines = load_lines(request.user)
+    if any(price_changed(line) for line in lines):
+        return Response({
+            'success': False,
+            'message': 'Some prices changed since you added them, please review your cart',
+            'cart': _cart_data(lines)
+        }, status=status.HTTP_409_CONFLICT)
+
+    # Checkout validates against the products loaded with the lines instead
+    # of looking every product up again
+    products = line_products(lines)
+    data = {
+        name: request.data[name] for name in OrderCreateSerializer().fields
+        if name != 'cart_items' and name in request.data
+    }
+    data['cart_items'] = [line.as_cart_item() for line in lines]
+    serializer = OrderCreateSerializer(data=data, context={'request': request, 'products': products})
+
+    if serializer.is_valid():
+        try:
+            order = serializer.save()
+        except InsufficientStock as exc:
+            # Stock ran out between validation and checkout
+            return Response({
+                'success': False,
+                'errors': {'cart_items': [str(exc)]}
+            }, status=status.HTTP_409_CONFLICT)
+
+        # Only the lines that were ordered: one added meanwhile stays
+        CartItem.objects.filter(id__in=[line.id for line in lines]).delete()
+        order_serializer = OrderSerializer(order, context={'request': request})
+
+        return Response({
+            'success': True,
+            'message': 'Order placed successfully',
+            'order': order_serializer.data,
+            'payment_info': cod_payment_info(order.total_amount, order.cod_fee)
+        }, status=status.HTTP_201_CREATED)
+
+    return Response({
+        'success': False,
+        'errors': serializer.errors
+    }, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,159 @@
+"""
+Tag-invalidated response cache for public read endpoints.
+
+Entries are keyed on the view, the viewer class and the normalized query
+string, and remember the version of every tag they depend on (e.g.
+``product:12``, ``shop:3``, ``catalog``). Writes call ``invalidate_tags``,
+which stamps the tag with a new version, so any entry that saw the old
+version becomes a miss on its next read.
+
+Past ``timeout`` an entry is stale but kept for ``stale_timeout`` more
+seconds: the first request to see it refreshes it while concurrent
+requests keep getting the stale copy (stale-while-revalidate).
+Tag invalidation is never served stale.
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from .pagination import KeysetPagination
+
+TAG_PREFIX = 'cache:tag:'
+ENTRY_PREFIX = 'cache:resp:'
+METRIC_PREFIX = 'cache:metrics:'
+LOCK_TIMEOUT = 30
+
+OUTCOMES = ('hit', 'stale', 'miss', 'invalidated')
+
+# View names using cached_response, for reporting
+registered_views = set()
+
+# Empty query params count as absent, except these, whose mere presence
+# changes the response: ?cursor= asks for the first keyset page
+PRESENCE_PARAMS = (KeysetPagination.cursor_query_param,)
+
+
+def _tag_key(tag):
+    return f'{TAG_PREFIX}{tag}'
+
+
+def get_tag_versions(tags):
+    """{tag: version}; tags never invalidated report version 0"""
+    tags = list(tags)
+    found = cache.get_many([_tag_key(tag) for tag in tags])
+    return {tag: found.get(_tag_key(tag), 0) for tag in tags}
+
+
+def invalidate_tags(*tags):
+    """Stamp tags with a new version, retiring every entry that depends on them"""
+    if not tags:
+        return
+    version = time.time_ns()
+    cache.set_many({_tag_key(tag): version for tag in set(tags)}, timeout=None)
+
+
+def record(name, outcome):
+    key = f'{METRIC_PREFIX}{name}:{outcome}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_metrics(name):
+    keys = {outcome: f'{METRIC_PREFIX}{name}:{outcome}' for outcome in OUTCOMES}
+    found = cache.get_many(keys.values())
+    return {outcome: found.get(key, 0) for outcome, key in keys.items()}
+
+
+def reset_metrics(name):
+    cache.delete_many([f'{METRIC_PREFIX}{name}:{outcome}' for outcome in OUTCOMES])
+
+
+def viewer_class(request):
+    """Sellers see base_price/commission_rate; anonymous users and customers don't"""
+    user = request.user
+    if user.is_authenticated and user.user_type == 'seller':
+        return 'seller'
+    return 'public'
+
+
+def response_cache_key(name, request, kwargs):
+    params = sorted(
+        (key, sorted(value for value in values if value != '' or key in PRESENCE_PARAMS))
+        for key, values in request.query_params.lists()
+    )
+    params = [(key, values) for key, values in params if values]
+    raw = json.dumps([request.get_host(), params, sorted(kwargs.items())], default=str)
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'{ENTRY_PREFIX}{name}:{viewer_class(request)}:{digest}'
+
+
+def cached_response(name, tags=(), timeout=60, stale_timeout=300):
+    """
+    Cache successful GET responses of a DRF function view.
+
+    tags: tag names, or a callable(request, **kwargs) returning them.
+    The view can add object-specific tags by setting ``response.cache_tags``.
+    Responses carry an ``X-Cache: HIT|STALE|MISS`` header.
+    """
+    registered_views.add(name)
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            key = response_cache_key(name, request, kwargs)
+            lock_key = f'{key}:lock'
+            entry = cache.get(key)
+
+            if entry is not None:
+                if get_tag_versions(entry['tags']) == entry['tags']:
+                    if time.time() < entry['fresh_until']:
+                        record(name, 'hit')
+                        return _replay(entry, 'HIT')
+                    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+                        # Someone else is already refreshing it
+                        record(name, 'stale')
+                        return _replay(entry, 'STALE')
+                else:
+                    record(name, 'invalidated')
+
+            started = time.time_ns()
+            response = view(request, *args, **kwargs)
+            record(name, 'miss')
+            response['X-Cache'] = 'MISS'
+
+            if response.status_code == 200 and isinstance(response, Response):
+                entry_tags = list(tags(request, **kwargs) if callable(tags) else tags)
+                entry_tags += getattr(response, 'cache_tags', [])
+                versions = get_tag_versions(entry_tags)
+
+                # Don't store what a concurrent write may already have outdated
+                if all(version < started for version in versions.values()):
+                    cache.set(key, {
+                        'data': response.data,
+                        'status': response.status_code,
+                        'tags': versions,
+                        'fresh_until': time.time() + timeout,
+                    }, timeout + stale_timeout)
+
+            cache.delete(lock_key)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _replay(entry, outcome):
+    response = Response(entry['data'], status=entry['status'])
+    response['X-Cache'] = outcome
+    return response
@@ -0,0 +1,60 @@
+"""
+Conditional GET (ETag / Last-Modified) for DRF function views.
+
+A validators function computes the resource version from a cheap query
+(timestamps, counts), before the view runs. If the client's
+If-None-Match / If-Modified-Since still matches, the view is skipped
+entirely and a 304 goes back without serializing anything.
+"""
+import functools
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .cache import viewer_class
+
+
+def make_etag(*parts):
+    """Weak ETag over the given version parts"""
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/{quote_etag(digest)}'
+
+
+def conditional(validators):
+    """
+    validators(request, **kwargs) -> (version parts, last_modified datetime),
+    or None when there is nothing to validate (e.g. the object doesn't exist,
+    so the view answers 404 itself).
+
+    The viewer class is part of the ETag because sellers get extra fields.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            version = validators(request, *args, **kwargs)
+            if version is None:
+                return view(request, *args, **kwargs)
+
+            parts, last_modified = version
+            etag = make_etag(viewer_class(request), *parts)
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            patch_vary_headers(response, ('Authorization',))
+            return response
+
+        return wrapper
+
+    return decorator
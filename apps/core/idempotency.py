@@ -0,0 +1,206 @@
+"""
+Idempotency keys for retried writes.
+
+A client that may retry a POST (flaky mobile networks) sends an
+``Idempotency-Key`` header with a value unique to that logical request.
+The first request to arrive claims the key and runs the view; its
+response (anything but a 5xx) is stored for ``IDEMPOTENCY_KEY_TTL``
+seconds and replayed, with ``Idempotent-Replayed: true``, to every retry.
+A retry that arrives while the first request is still running waits for
+it instead of doing the work twice.
+
+Keys are scoped per user and endpoint, and tied to a fingerprint of the
+request: reusing a key for a different request body is a 422. Requests
+without the header behave as before.
+
+The store is pluggable (``IDEMPOTENCY_STORE``); the default keeps keys in
+the database, and purge_idempotency_keys evicts expired ones in batches
+off the expires_at index.
+"""
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError, transaction
+from django.http import QueryDict
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+# A claim this old with no response means its request died mid-flight
+PROCESSING_TIMEOUT = timedelta(minutes=2)
+# How long a duplicate waits for the first request before giving up
+WAIT_TIMEOUT = 10
+POLL_INTERVAL = 0.1
+
+
+class DatabaseIdempotencyStore:
+    """Keys as IdempotencyKey rows; the unique (user, endpoint, key) index arbitrates claims"""
+
+    def claim(self, user, endpoint, key, fingerprint, ttl):
+        """
+        (record, True) if this request now owns the key, (existing record,
+        False) if another request got there first
+        """
+        while True:
+            now = timezone.now()
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=user, endpoint=endpoint, key=key, fingerprint=fingerprint,
+                        expires_at=now + timedelta(seconds=ttl)
+                    )
+                return record, True
+            except IntegrityError:
+                pass
+
+            record = IdempotencyKey.objects.filter(user=user, endpoint=endpoint, key=key).first()
+            if record is None:
+                # Released in between; claim again
+                continue
+
+            abandoned = record.status_code is None and record.created_at < now - PROCESSING_TIMEOUT
+            if record.expires_at > now and not abandoned:
+                return record, False
+
+            # Expired or abandoned: take the row over, unless someone else just did
+            taken = IdempotencyKey.objects.filter(id=record.id, created_at=record.created_at).update(
+                fingerprint=fingerprint, status_code=None, response_data=None,
+                created_at=now, expires_at=now + timedelta(seconds=ttl)
+            )
+            if taken:
+                record.refresh_from_db()
+                return record, True
+
+    def get(self, record):
+        return IdempotencyKey.objects.filter(id=record.id).first()
+
+    def complete(self, record, status_code, data):
+        IdempotencyKey.objects.filter(id=record.id).update(status_code=status_code, response_data=data)
+
+    def release(self, record):
+        IdempotencyKey.objects.filter(id=record.id, status_code__isnull=True).delete()
+
+    def purge(self, batch_size=1000):
+        """Delete expired keys in batches; returns how many went"""
+        deleted = 0
+        now = timezone.now()
+        while True:
+            ids = list(
+                IdempotencyKey.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return deleted
+            deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+
+
+@functools.lru_cache(maxsize=None)
+def get_store():
+    return import_string(settings.IDEMPOTENCY_STORE)()
+
+
+def _file_digest(upload):
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return f'{upload.name}:{upload.size}:{digest.hexdigest()}'
+
+
+def request_fingerprint(request, kwargs):
+    """SHA-256 over the method, path, URL kwargs and parsed body (uploads by content)"""
+    data = request.data
+    if isinstance(data, QueryDict):
+        data = {
+            name: [_file_digest(value) if isinstance(value, UploadedFile) else value for value in values]
+            for name, values in data.lists()
+        }
+    raw = json.dumps([request.method, request.path, kwargs, data], sort_keys=True, cls=JSONEncoder)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _error(message, code):
+    return Response({'success': False, 'message': message}, status=code)
+
+
+def _replay(record):
+    response = Response(record.response_data, status=record.status_code)
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def idempotent(endpoint, ttl=None):
+    """
+    Honour the Idempotency-Key header on a DRF function view. Goes below
+    @permission_classes, so only authenticated requests get this far.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if key is None or not request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+
+            key = key.strip()
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return _error(f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters', status.HTTP_400_BAD_REQUEST)
+
+            store = get_store()
+            fingerprint = request_fingerprint(request, kwargs)
+            deadline = time.monotonic() + WAIT_TIMEOUT
+
+            while True:
+                record, claimed = store.claim(
+                    request.user, endpoint, key, fingerprint, ttl or settings.IDEMPOTENCY_KEY_TTL
+                )
+                if claimed:
+                    break
+                if record.fingerprint != fingerprint:
+                    return _error(
+                        f'{HEADER} was already used for a different request',
+                        status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+
+                # Wait for the request holding the key to finish
+                while record is not None and record.status_code is None and time.monotonic() < deadline:
+                    time.sleep(POLL_INTERVAL)
+                    record = store.get(record)
+                if record is None:
+                    # It failed and let go of the key: try to do the work ourselves
+                    continue
+                if record.status_code is None:
+                    return _error(
+                        f'A request with this {HEADER} is still being processed, retry later',
+                        status.HTTP_409_CONFLICT
+                    )
+                return _replay(record)
+
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                store.release(record)
+                raise
+
+            if response.status_code >= 500 or not isinstance(response, Response):
+                # Let a retry try again
+                store.release(record)
+            else:
+                data = json.loads(json.dumps(response.data, cls=JSONEncoder))
+                store.complete(record, response.status_code, data)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.urls import get_resolver
+from apps.core.cache import get_metrics, registered_views, reset_metrics
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters of the cached API responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing')
+
+    def handle(self, *args, **options):
+        if 'locmem' in settings.CACHES['default']['BACKEND'].lower():
+            self.stdout.write(self.style.WARNING(
+                'LocMemCache is per-process: these are this process\'s counters, not the web workers\''
+            ))
+
+        # Importing the URLconf registers every cached view
+        get_resolver().url_patterns
+
+        self.stdout.write(f"{'view':<20} {'hit':>8} {'stale':>8} {'miss':>8} {'invalid':>8} {'hit rate':>9}")
+        for name in sorted(registered_views):
+            metrics = get_metrics(name)
+            served = metrics['hit'] + metrics['stale'] + metrics['miss']
+            rate = f"{(metrics['hit'] + metrics['stale']) / served:.1%}" if served else '-'
+            self.stdout.write(
+                f"{name:<20} {metrics['hit']:>8} {metrics['stale']:>8} {metrics['miss']:>8} "
+                f"{metrics['invalidated']:>8} {rate:>9}"
+            )
+            if options['reset']:
+                reset_metrics(name)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.core.idempotency import get_store
+
+
+class Command(BaseCommand):
+    help = 'Delete expired Idempotency-Key records (run it from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = get_store().purge(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ {deleted} expired idempotency key(s) deleted'))
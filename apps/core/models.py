@@ -1,3 +1,27 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class IdempotencyKey(models.Model):
+    """First response to a write sent with an Idempotency-Key header (see apps.core.idempotency)"""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='idempotency_keys')
+    endpoint = models.CharField(max_length=100)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # SHA-256 of the request it was first used with
+
+    # Empty while the first request is still running
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True)
+    response_data = models.JSONField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+        unique_together = ('user', 'endpoint', 'key')
+
+    def __str__(self):
+        return f"{self.endpoint} {self.key}"
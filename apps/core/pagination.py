@@ -0,0 +1,153 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in cursor (keyset) pagination.
+
+    Enabled by passing ?cursor= (empty for the first page). Instead of
+    OFFSET, each page seeks past the last row on the queryset's ordering
+    columns plus ``id`` as a tie-breaker, so deep pages cost the same as the
+    first one. COUNT(*) only runs when ?with_count=true.
+
+    The queryset must be ordered by concrete fields of its own model; a
+    values() queryset has to include those fields.
+    """
+
+    cursor_query_param = 'cursor'
+    count_query_param = 'with_count'
+    page_size = 20
+    page_size_query_param = None
+    max_page_size = None
+    invalid_cursor_message = 'Invalid cursor'
+
+    @classmethod
+    def is_requested(cls, request):
+        return cls.cursor_query_param in request.query_params
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size) if self.max_page_size else size
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, queryset):
+        """[(field_name, descending), ...] ending with the id tie-breaker"""
+        ordering = []
+        for item in queryset.query.order_by:
+            descending = item.startswith('-')
+            ordering.append((item.lstrip('-'), descending))
+
+        if not ordering:
+            ordering.append(('id', True))
+        elif ordering[-1][0] not in ('id', 'pk'):
+            # Tie-breaker runs the same direction as the leading sort key so one
+            # (sort key, id) index serves the whole scan
+            ordering.append(('id', ordering[0][1]))
+
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.fields = [queryset.model._meta.get_field(name) for name, _ in self.ordering]
+
+        self.count = queryset.count() if self.count_requested(request) else None
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        values, reverse = self.decode_cursor(encoded) if encoded else (None, False)
+
+        order_by = [
+            f"{'-' if descending != reverse else ''}{name}"
+            for name, descending in self.ordering
+        ]
+        queryset = queryset.order_by(*order_by)
+        if values is not None:
+            queryset = queryset.filter(self.seek(values, reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = values is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None
+
+        self.page = rows
+        return rows
+
+    def seek(self, values, reverse):
+        """Rows strictly after ``values`` in (possibly reversed) ordering"""
+        condition = Q()
+        for index, (name, descending) in enumerate(self.ordering):
+            lookup = 'lt' if descending != reverse else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[index]})
+            for prev_index, (prev_name, _) in enumerate(self.ordering[:index]):
+                term &= Q(**{prev_name: values[prev_index]})
+            condition |= term
+        return condition
+
+    def count_requested(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+    def encode_cursor(self, row, reverse):
+        values = []
+        for name, _ in self.ordering:
+            # Model instances or values() dicts
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+
+        payload = json.dumps({'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, encoded):
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            raw_values = payload['v']
+            if len(raw_values) != len(self.fields):
+                raise ValueError
+            values = [field.to_python(raw) for field, raw in zip(self.fields, raw_values)]
+            return values, bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_link(self, row, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, reverse))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.get_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.get_link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
@@ -1,3 +1,76 @@
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.core.pagination import KeysetPagination
+from apps.orders.tests import ShopFixtureMixin
+from apps.products.models import Product
+
+
+class PageOfThree(KeysetPagination):
+    page_size = 3
+
+
+class KeysetPaginationTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.create_fixture()
+        # Runs of equal sort keys that straddle page boundaries
+        for price in (100, 100, 100, 100, 200, 200, 300, 300, 300, 300):
+            Product.objects.create(
+                shop=self.shop, name='Shirt', base_price=Decimal(price), commission_rate=Decimal('15.00')
+            )
+        self.products = Product.objects.order_by('-display_price')
+        self.expected = list(self.products.order_by('-display_price', '-id').values_list('id', flat=True))
+
+    def page(self, cursor):
+        paginator = PageOfThree()
+        request = Request(APIRequestFactory().get('/api/products', {'cursor': cursor}))
+        rows = paginator.paginate_queryset(self.products, request)
+        links = [paginator.get_next_link(), paginator.get_previous_link()]
+        cursors = [parse_qs(urlparse(link).query)['cursor'][0] if link else None for link in links]
+        return [row.id for row in rows], cursors
+
+    def test_walks_every_page_forward_and_back(self):
+        pages = []
+        cursor = ''
+        while cursor is not None:
+            ids, (cursor, previous) = self.page(cursor)
+            pages.append(ids)
+        self.assertEqual([product_id for ids in pages for product_id in ids], self.expected)
+        self.assertEqual([len(ids) for ids in pages], [3, 3, 3, 2])
+
+        # Back from the last page, following the previous links
+        back = [pages[-1]]
+        while previous is not None:
+            ids, (_, previous) = self.page(previous)
+            back.append(ids)
+        self.assertEqual(back, pages[::-1])
+
+    def test_malformed_cursor(self):
+        for cursor in ('garbage', 'eyJ2IjpbIjEiXX0'):  # the second one decodes, but to too few values
+            with self.subTest(cursor=cursor), self.assertRaises(NotFound):
+                self.page(cursor)
+
+
+class ResponseCacheKeyTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixture()
+
+    def test_cursor_mode_gets_its_own_entry(self):
+        # Either mode first, then both again from the cache
+        for params in ({'cursor': ''}, {}, {'cursor': ''}, {}):
+            response = self.client.get('/api/products', params)
+            # Page-number responses carry a count, first keyset pages don't
+            self.assertEqual('count' in response.json(), 'cursor' not in params)
 
-# Create your tests here.
+        self.assertEqual(self.client.get('/api/products', {'cursor': ''})['X-Cache'], 'HIT')
+        # An empty filter still means no filter
+        self.assertEqual(self.client.get('/api/products', {'search': ''})['X-Cache'], 'HIT')
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Order, OrderItem
+from . import rollups
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
 from django.utils.html import format_html
 from django.db.models import Sum
 
@@ -60,6 +61,12 @@ class OrderAdmin(admin.ModelAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Status edits here skip the API, keep the shop's sales rollup in step
+        if change and 'order_status' in form.changed_data:
+            rollups.record_transitions([(obj, form.initial['order_status'])], obj.order_status)
+
     def customer_link(self, obj):
         return format_html('<a href="/admin/accounts/customuser/{}/change/">{}</a>',
                            obj.customer.id, obj.customer.full_name)
@@ -162,4 +169,30 @@ class OrderAdmin(admin.ModelAdmin):
 
         return format_html(html)
 
-    status_timeline.short_description = 'Timeline'
\ No newline at end of file
+    status_timeline.short_description = 'Timeline'
+
+
+class ArchivedOrderItemInline(admin.TabularInline):
+    model = ArchivedOrderItem
+    fields = ('product_name', 'base_price', 'display_price', 'commission_rate', 'quantity',
+              'selected_size', 'selected_color', 'item_subtotal', 'seller_amount')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    """Read-only: archived orders are final (archive_orders moves them here)"""
+
+    list_display = ('order_number', 'shop', 'total_amount', 'seller_payout_amount', 'order_status', 'placed_at')
+    list_filter = ('order_status', 'shop')
+    search_fields = ('order_number', 'customer__phone_number', 'delivery_phone')
+    list_select_related = ('shop',)
+    inlines = [ArchivedOrderItemInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,81 @@
+"""
+Cold storage for finished orders.
+
+Almost all order traffic touches the last few weeks, but every order ever
+placed used to stay in orders/order_items, so listings, their COUNTs and
+the (customer, -placed_at) / (shop, -placed_at) indexes kept growing.
+``archive`` (the archive_orders command) moves delivered and cancelled
+orders older than ORDER_ARCHIVE_AFTER_DAYS, with their items, into
+archived_orders/archived_order_items in batches; each batch is copied and
+deleted in one transaction, ids kept. Listings only read the hot tables;
+the order detail endpoint falls back to the archive by order_number.
+
+Archived orders are final: status changes, cancellation and new reviews
+only work on live orders. Sales rollups are keyed by day and don't move,
+and rollups.compute reads both tables. Reviews of an archived order lose
+their foreign key but keep its order_number, which finds the archived copy
+and still enforces one review per product per order.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+ARCHIVABLE_STATUSES = ('delivered', 'cancelled')
+
+
+def _copy_sql(source, target, key):
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in target._meta.concrete_fields)
+    return 'INSERT INTO {target} ({columns}) SELECT {columns} FROM {source} WHERE {key} IN ({{}})'.format(
+        target=connection.ops.quote_name(target._meta.db_table),
+        source=connection.ops.quote_name(source._meta.db_table),
+        columns=columns,
+        key=connection.ops.quote_name(key),
+    )
+
+
+def default_cutoff(now=None):
+    return (now or timezone.now()) - timedelta(days=settings.ORDER_ARCHIVE_AFTER_DAYS)
+
+
+def archivable(before):
+    return Order.objects.filter(order_status__in=ARCHIVABLE_STATUSES, placed_at__lt=before)
+
+
+def archive_batch(before, batch_size=1000):
+    """Move up to ``batch_size`` finished orders placed before ``before``; returns how many moved"""
+    with transaction.atomic():
+        ids = list(
+            archivable(before).select_for_update().order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+
+        placeholders = ', '.join(['%s'] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(_copy_sql(Order, ArchivedOrder, 'id').format(placeholders), ids)
+            cursor.execute(_copy_sql(OrderItem, ArchivedOrderItem, 'order_id').format(placeholders), ids)
+
+        # Cascades to the items and clears the order FK on reviews (not their order_number)
+        Order.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def archive(before=None, batch_size=1000, progress=None):
+    """
+    Archive every finished order placed before ``before`` (default: the
+    ORDER_ARCHIVE_AFTER_DAYS cutoff). Short transactions, so checkouts and
+    status changes aren't held up; safe to interrupt and rerun.
+    """
+    before = before or default_cutoff()
+    total = 0
+    while True:
+        moved = archive_batch(before, batch_size)
+        total += moved
+        if progress and moved:
+            progress(total)
+        if moved < batch_size:
+            return total
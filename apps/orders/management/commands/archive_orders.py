@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.orders import archive
+
+
+class Command(BaseCommand):
+    help = 'Move old delivered and cancelled orders into the archive tables (run it from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ORDER_ARCHIVE_AFTER_DAYS,
+                            help='Archive orders placed more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Orders moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many orders would move')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--days and --batch-size must be positive')
+
+        before = timezone.now() - timedelta(days=options['days'])
+        if options['dry_run']:
+            self.stdout.write(f'{archive.archivable(before).count()} order(s) placed before {before:%Y-%m-%d} to archive')
+            return
+
+        moved = archive.archive(
+            before, batch_size=options['batch_size'],
+            progress=lambda total: self.stdout.write(f'  {total} archived...')
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ {moved} order(s) archived'))
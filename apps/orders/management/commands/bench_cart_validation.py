@@ -0,0 +1,91 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.models import CustomUser
+from apps.orders.utils import OrderCalculator
+from apps.products.models import Product
+from apps.shops.models import Shop
+
+CART_SIZES = (1, 5, 15, 30, 50)
+
+
+def validate_per_line(cart_items):
+    """The old access pattern: one product lookup per cart line"""
+    products = {}
+    for item in cart_items:
+        product = Product.objects.select_related('shop').prefetch_related('attributes').filter(
+            id=item['product_id'], is_active=True, shop__is_approved=True
+        ).first()
+        if product is not None:
+            products[product.id] = product
+    return OrderCalculator.validate_cart_items(cart_items, products=products)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark cart validation query count and latency by cart size (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=50, help='Runs per cart size')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            products = self.seed(max(CART_SIZES))
+
+            for size in CART_SIZES:
+                cart = [
+                    {'product_id': product.id, 'quantity': 1, 'size': 'M', 'color': 'Blue'}
+                    for product in products[:size]
+                ]
+                for label, validate in (('per-line', validate_per_line),
+                                        ('batched', OrderCalculator.validate_cart_items)):
+                    is_valid, errors, _ = validate(cart)
+                    assert is_valid, errors
+                    self.report(f'{size:>3} items {label}', *self.measure(validate, cart, options['runs']))
+
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        owner = CustomUser.objects.create(
+            phone_number='bench-cart', full_name='Bench Seller',
+            user_type='seller', firebase_uid='bench-cart'
+        )
+        shop = Shop.objects.create(
+            owner=owner, shop_name='Bench Shop', business_address='-', city='Amravati',
+            pincode='444601', owner_contact_number='0000000000', is_approved=True
+        )
+        # save() so the variant attribute rows exist
+        products = []
+        for i in range(count):
+            product = Product(
+                shop=shop, name=f'Bench Product {i}', base_price=Decimal('500'),
+                commission_rate=Decimal('15.00'), stock_quantity=100,
+                sizes=['S', 'M', 'L'], colors=['Blue', 'Black'],
+            )
+            product.save()
+            products.append(product)
+        return products
+
+    def measure(self, validate, cart, runs):
+        # The DEBUG query log is capped, start from an empty one
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            validate(cart)
+
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            validate(cart)
+            timings.append((time.perf_counter() - start) * 1000)
+        return len(queries.captured_queries), timings
+
+    def report(self, label, query_count, timings):
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f'{label:>20}: {query_count:>4} queries   p50 {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms'
+        )
@@ -0,0 +1,111 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.accounts.models import CustomUser
+from apps.orders import archive
+from apps.orders.models import ArchivedOrder, Order, OrderItem
+from apps.orders.views import get_order_detail, my_orders
+from .bench_order_statistics import seed_orders
+
+ITEMS_SQL = """
+    INSERT INTO {items} (order_id, product_name, product_image_url, base_price, display_price,
+                         commission_rate, commission_amount, quantity, selected_size, selected_color,
+                         item_subtotal, seller_amount)
+    SELECT id, 'Bench Shirt', '', seller_payout_amount, subtotal, 15, commission_amount, 1, 'M', '',
+           subtotal, seller_payout_amount
+    FROM {orders} WHERE shop_id IN ({shops})
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark order listings and lookups on a multi-year orders table, before and after '
+        'archiving finished orders (rolled back afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=500_000, help='Orders to seed in total')
+        parser.add_argument('--shops', type=int, default=10, help='Shops the orders are spread over')
+        parser.add_argument('--days', type=int, default=3 * 365, help='Days of history')
+        parser.add_argument('--runs', type=int, default=20)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            shops = seed_orders(options['orders'], options['shops'], options['days'], prefix='bench-archive')
+            shop_ids = ', '.join(str(shop.id) for shop in shops)
+            with connection.cursor() as cursor:
+                cursor.execute(ITEMS_SQL.format(
+                    items=OrderItem._meta.db_table, orders=Order._meta.db_table, shops=shop_ids
+                ))
+            # Only the last few weeks are still in progress
+            Order.objects.filter(
+                shop__in=shops, placed_at__lt=timezone.now() - timedelta(days=30),
+                order_status__in=('placed', 'confirmed', 'shipped')
+            ).update(order_status='delivered')
+            self.stdout.write(
+                f"Seeded {options['orders']} orders over {options['days']} days "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+
+            seller = shops[0].owner
+            customer = CustomUser.objects.get(phone_number='bench-archive')
+            recent = Order.objects.filter(shop=shops[0]).order_by('-id').values_list('order_number', flat=True)[0]
+            oldest = Order.objects.filter(shop=shops[0]).order_by('id').values_list('order_number', flat=True)[0]
+
+            cases = (
+                ('seller list', my_orders, seller, '/api/orders/my-orders', {}),
+                ('seller delivered', my_orders, seller, '/api/orders/my-orders?status=delivered', {}),
+                ('seller keyset', my_orders, seller, '/api/orders/my-orders?summary=true&cursor=', {}),
+                ('customer list', my_orders, customer, '/api/orders/my-orders', {}),
+                ('recent detail', get_order_detail, seller, f'/api/orders/{recent}', {'order_number': recent}),
+                ('old detail', get_order_detail, seller, f'/api/orders/{oldest}', {'order_number': oldest}),
+            )
+
+            def run(view, user, path, kwargs):
+                request = factory.get(path)
+                force_authenticate(request, user)
+                response = view(request, **kwargs)
+                response.render()
+                assert response.status_code == 200, response.content
+
+            before = {label: self.measure(run, case, options['runs']) for label, *case in cases}
+
+            start = time.perf_counter()
+            moved = archive.archive()
+            self.stdout.write(
+                f'Archived {moved} orders older than {settings.ORDER_ARCHIVE_AFTER_DAYS} days '
+                f'in {time.perf_counter() - start:.1f}s, {Order.objects.count()} left hot '
+                f'({ArchivedOrder.objects.count()} archived)'
+            )
+
+            after = {label: self.measure(run, case, options['runs']) for label, *case in cases}
+
+            self.stdout.write(f"{'':>18}  {'before p50':>11} {'p95':>9}   {'after p50':>11} {'p95':>9}")
+            for label, *_ in cases:
+                self.stdout.write(f'{label:>18}: {self.format(before[label])}   {self.format(after[label])}')
+
+            transaction.set_rollback(True)
+
+    def measure(self, run, case, runs):
+        run(*case)  # warm up
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            run(*case)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def format(self, timings):
+        timings = sorted(timings)
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        return f'{statistics.median(timings):8.2f} ms {p95:6.2f} ms'
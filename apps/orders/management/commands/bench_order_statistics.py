@@ -0,0 +1,192 @@
+import statistics
+import time
+from datetime import datetime, time as day_time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries, transaction
+from django.db.models import Count, Q, Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.accounts.models import CustomUser
+from apps.orders import rollups
+from apps.orders.models import Order
+from apps.orders.statistics import shop_statistics
+from apps.shops.models import Shop
+
+STATUSES = ('delivered', 'delivered', 'delivered', 'cancelled', 'placed', 'confirmed', 'shipped')
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, day_time.min))
+
+
+def legacy_statistics(shop_id):
+    """The old access pattern: one query per figure, __date lookups, naive now()"""
+    orders = Order.objects.filter(shop_id=shop_id)
+    today = datetime.now().date()
+    this_month = datetime.now().replace(day=1).date()
+
+    def payout(qs):
+        return qs.aggregate(Sum('seller_payout_amount'))['seller_payout_amount__sum'] or 0
+
+    return {
+        'total_orders': orders.count(),
+        'pending_orders': orders.filter(order_status__in=['placed', 'confirmed', 'shipped']).count(),
+        'completed_orders': orders.filter(order_status='delivered').count(),
+        'cancelled_orders': orders.filter(order_status='cancelled').count(),
+        'today_orders': orders.filter(placed_at__date=today).count(),
+        'today_revenue': payout(orders.filter(placed_at__date=today, order_status='delivered')),
+        'month_orders': orders.filter(placed_at__date__gte=this_month).count(),
+        'month_revenue': payout(orders.filter(placed_at__date__gte=this_month, order_status='delivered')),
+        'total_earnings': payout(orders.filter(order_status='delivered')),
+        'pending_earnings': payout(orders.filter(order_status__in=['confirmed', 'shipped'])),
+    }
+
+
+def one_pass_statistics(shop_id):
+    """Straight off the orders table in one query: conditional aggregates over half-open ranges"""
+    today = timezone.localdate()
+    month = today.replace(day=1)
+    in_today = Q(placed_at__gte=day_start(today), placed_at__lt=day_start(today + timedelta(days=1)))
+    in_month = Q(placed_at__gte=day_start(month))
+    delivered = Q(order_status='delivered')
+
+    return Order.objects.filter(shop_id=shop_id).aggregate(
+        total_orders=Count('id'),
+        pending_orders=Count('id', filter=Q(order_status__in=['placed', 'confirmed', 'shipped'])),
+        completed_orders=Count('id', filter=delivered),
+        cancelled_orders=Count('id', filter=Q(order_status='cancelled')),
+        today_orders=Count('id', filter=in_today),
+        today_revenue=Sum('seller_payout_amount', filter=in_today & delivered),
+        month_orders=Count('id', filter=in_month),
+        month_revenue=Sum('seller_payout_amount', filter=in_month & delivered),
+        total_earnings=Sum('seller_payout_amount', filter=delivered),
+        pending_earnings=Sum('seller_payout_amount', filter=Q(order_status__in=['confirmed', 'shipped'])),
+    )
+
+
+def seed_orders(count, shop_count, days, prefix='bench-stats'):
+    """
+    ``count`` orders (no items) spread evenly over ``shop_count`` new shops
+    and the last ``days`` days, one new customer; returns the shops
+    """
+    customer = CustomUser.objects.create(
+        phone_number=prefix, full_name='Bench Customer',
+        user_type='customer', firebase_uid=prefix
+    )
+    shops = []
+    for i in range(shop_count):
+        owner = CustomUser.objects.create(
+            phone_number=f'{prefix}-{i}', full_name='Bench Seller',
+            user_type='seller', firebase_uid=f'{prefix}-{i}'
+        )
+        shops.append(Shop.objects.create(
+            owner=owner, shop_name=f'Bench Shop {i}', business_address='-', city='Amravati',
+            pincode='444601', owner_contact_number='0000000000', is_approved=True
+        ))
+
+    # Raw executemany, one batch per day: bulk_create is capped at a few
+    # dozen rows per INSERT on SQLite and would dominate the run
+    columns = (
+        'order_number', 'customer_id', 'shop_id', 'delivery_name', 'delivery_phone',
+        'delivery_address', 'delivery_city', 'delivery_pincode', 'delivery_landmark',
+        'subtotal', 'cod_fee', 'discount_amount', 'total_amount', 'commission_amount',
+        'seller_payout_amount', 'payment_method', 'payment_status', 'order_status',
+        'placed_at', 'cancellation_reason', 'notes',
+    )
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        Order._meta.db_table, ', '.join(columns), ', '.join(['%s'] * len(columns))
+    )
+    ops = connection.ops
+    amounts = [
+        ops.adapt_decimalfield_value(Decimal(amount), 10, 2)
+        for amount in ('1150.00', '50.00', '0.00', '1200.00', '150.00', '1000.00')
+    ]
+
+    today = timezone.localdate()
+    per_day, extra = divmod(count, days)
+    number = 0
+    with connection.cursor() as cursor:
+        for offset in range(days, 0, -1):
+            placed_at = ops.adapt_datetimefield_value(
+                day_start(today - timedelta(days=offset - 1)) + timedelta(hours=12)
+            )
+            rows = []
+            for _ in range(per_day + (1 if offset <= extra else 0)):
+                rows.append([
+                    f'BENCH{number:012d}', customer.id, shops[number % shop_count].id,
+                    '-', '0000000000', '-', 'Amravati', '444601', '',
+                    *amounts, 'cod', 'cod_pending', STATUSES[number % len(STATUSES)],
+                    placed_at, '', '',
+                ])
+                number += 1
+            cursor.executemany(sql, rows)
+    return shops
+
+
+class Command(BaseCommand):
+    help = 'Benchmark seller order statistics against a large orders table (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1_000_000, help='Orders to seed in total')
+        parser.add_argument('--shops', type=int, default=10, help='Shops the orders are spread over')
+        parser.add_argument('--days', type=int, default=730, help='Days of history')
+        parser.add_argument('--runs', type=int, default=10)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            start = time.perf_counter()
+            shops = seed_orders(options['orders'], options['shops'], options['days'])
+            self.stdout.write(
+                f"Seeded {options['orders']} orders over {options['shops']} shops "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+
+            start = time.perf_counter()
+            rows, _ = rollups.rebuild(shop_ids=[shop.id for shop in shops])
+            self.stdout.write(f'Built {rows} rollup rows in {time.perf_counter() - start:.1f}s')
+
+            shop_id = shops[0].id
+            self.explain(shop_id)
+            for label, compute in (('per-figure', legacy_statistics), ('one-pass', one_pass_statistics),
+                                   ('rollups', shop_statistics)):
+                self.report(label, *self.measure(compute, shop_id, options['runs']))
+
+            transaction.set_rollback(True)
+
+    def explain(self, shop_id):
+        today = timezone.localdate()
+        plans = (
+            ('placed_at__date', Order.objects.filter(shop_id=shop_id, placed_at__date=today)),
+            ('half-open range', Order.objects.filter(
+                shop_id=shop_id,
+                placed_at__gte=day_start(today),
+                placed_at__lt=day_start(today + timedelta(days=1))
+            )),
+        )
+        for label, qs in plans:
+            self.stdout.write(f'Plan for today\'s orders ({label}):')
+            for line in qs.values('id').explain().splitlines():
+                self.stdout.write(f'    {line}')
+
+    def measure(self, compute, shop_id, runs):
+        # The DEBUG query log is capped, start from an empty one
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            compute(shop_id)
+
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            compute(shop_id)
+            timings.append((time.perf_counter() - start) * 1000)
+        return len(queries.captured_queries), timings
+
+    def report(self, label, query_count, timings):
+        timings.sort()
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f'{label:>12}: {query_count:>3} queries   p50 {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms'
+        )
@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.orders import rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-shop daily sales rollups from the orders table (backfill, drift repair)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', type=int, action='append', dest='shops', help='Shop id (repeatable); all shops by default')
+        parser.add_argument('--since', help='First day to rebuild (YYYY-MM-DD); all history by default')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows have drifted')
+
+    def handle(self, *args, **options):
+        since = options['since']
+        if since is not None:
+            try:
+                since = date.fromisoformat(since)
+            except ValueError:
+                raise CommandError(f'Invalid date: {since}')
+
+        rows, drifted = rollups.rebuild(shop_ids=options['shops'], since=since, dry_run=options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(f'{drifted} of {rows} rollup row(s) differ from the orders table')
+            return
+        self.stdout.write(self.style.SUCCESS(f'✅ {rows} rollup row(s) rebuilt, {drifted} had drifted'))
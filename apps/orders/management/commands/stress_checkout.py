@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+from django.db.models import Sum
+
+from apps.accounts.models import CustomUser
+from apps.orders.models import Order, OrderItem
+from apps.orders.serializers import OrderCreateSerializer
+from apps.orders.utils import InsufficientStock
+from apps.products.models import Product
+from apps.shops.models import Shop
+
+PREFIX = 'stress-checkout'
+
+
+class Command(BaseCommand):
+    help = ('Hammer one product with concurrent checkouts and check nothing is oversold. '
+            'Writes real rows (threads need committed data) and deletes them afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--attempts', type=int, default=20, help='Checkouts per thread')
+        parser.add_argument('--stock', type=int, default=50)
+        parser.add_argument('--quantity', type=int, default=1, help='Units per checkout')
+
+    def handle(self, *args, **options):
+        if CustomUser.objects.filter(phone_number__startswith=PREFIX).exists():
+            raise CommandError(f'Leftover {PREFIX} users found, delete them first')
+
+        product, customers = self.seed(options['threads'], options['stock'])
+        try:
+            outcomes, elapsed = self.run(product, customers, options['attempts'], options['quantity'])
+            self.report(product, options, outcomes, elapsed)
+        finally:
+            self.cleanup(product)
+
+    def seed(self, threads, stock):
+        seller = CustomUser.objects.create(
+            phone_number=f'{PREFIX}-seller', full_name='Stress Seller',
+            user_type='seller', firebase_uid=f'{PREFIX}-seller'
+        )
+        shop = Shop.objects.create(
+            owner=seller, shop_name='Stress Shop', business_address='-', city='Amravati',
+            pincode='444601', owner_contact_number='0000000000', is_approved=True
+        )
+        product = Product.objects.create(
+            shop=shop, name='Stress Product', base_price=Decimal('100'),
+            commission_rate=Decimal('15.00'), stock_quantity=stock
+        )
+        customers = [
+            CustomUser.objects.create(
+                phone_number=f'{PREFIX}-{i}', full_name='Stress Customer',
+                user_type='customer', firebase_uid=f'{PREFIX}-{i}'
+            )
+            for i in range(threads)
+        ]
+        return product, customers
+
+    def run(self, product, customers, attempts, quantity):
+        outcomes = Counter()
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(customers))
+
+        payload = {
+            'cart_items': [{'product_id': product.id, 'quantity': quantity}],
+            'delivery_name': 'Stress Customer',
+            'delivery_phone': '9999999999',
+            'delivery_address': '-',
+            'delivery_city': 'Amravati',
+            'delivery_pincode': '444601',
+        }
+
+        def worker(customer):
+            request = SimpleNamespace(user=customer)
+            barrier.wait()
+            try:
+                for _ in range(attempts):
+                    serializer = OrderCreateSerializer(data=payload, context={'request': request})
+                    try:
+                        if not serializer.is_valid():
+                            outcome = 'rejected (validation)'
+                        else:
+                            serializer.save()
+                            outcome = 'placed'
+                    except InsufficientStock:
+                        outcome = 'rejected (lost race)'
+                    except DatabaseError as exc:
+                        outcome = f'db error: {exc}'
+                    with lock:
+                        outcomes[outcome] += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(customer,)) for customer in customers]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes, time.perf_counter() - start
+
+    def report(self, product, options, outcomes, elapsed):
+        product.refresh_from_db()
+        sold = OrderItem.objects.filter(product=product).aggregate(total=Sum('quantity'))['total'] or 0
+        attempts = sum(outcomes.values())
+
+        self.stdout.write(
+            f"{options['threads']} threads x {options['attempts']} checkouts of "
+            f"{options['quantity']} unit(s), stock {options['stock']}"
+        )
+        for outcome, count in sorted(outcomes.items()):
+            self.stdout.write(f'  {outcome:<24} {count:>6}')
+        self.stdout.write(
+            f'  {attempts} attempts in {elapsed:.2f}s: {attempts / elapsed:.1f} checkouts/s, '
+            f"{outcomes['placed'] / elapsed:.1f} orders/s"
+        )
+        self.stdout.write(f'  units sold {sold}, stock left {product.stock_quantity}')
+
+        if product.stock_quantity < 0 or sold + product.stock_quantity != options['stock']:
+            raise CommandError('Oversold: stock and order items disagree')
+        self.stdout.write(self.style.SUCCESS('✅ No oversell'))
+
+    def cleanup(self, product):
+        Order.objects.filter(shop=product.shop).delete()
+        users = CustomUser.objects.filter(phone_number__startswith=PREFIX)
+        Shop.objects.filter(owner__in=users).delete()
+        users.delete()
@@ -0,0 +1,49 @@
+# Generated by Django 5.0 on 2026-10-16 22:58
+
+import datetime
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    """Start each day's counter above the (random) numbers already used that day"""
+    Order = apps.get_model('orders', 'Order')
+    OrderNumberSequence = apps.get_model('orders', 'OrderNumberSequence')
+
+    last_values = {}
+    for order_number in Order.objects.values_list('order_number', flat=True).iterator():
+        date_part, suffix = order_number[3:11], order_number[11:]
+        if not (order_number.startswith('ORD') and date_part.isdigit() and suffix.isdigit()):
+            continue
+        try:
+            day = datetime.datetime.strptime(date_part, '%Y%m%d').date()
+        except ValueError:
+            continue
+        last_values[day] = max(last_values.get(day, 0), int(suffix))
+
+    OrderNumberSequence.objects.bulk_create([
+        OrderNumberSequence(day=day, last_value=value) for day, value in last_values.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberSequence',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Order Number Sequence',
+                'verbose_name_plural': 'Order Number Sequences',
+                'db_table': 'order_number_sequences',
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0 on 2026-10-16 23:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_order_number_sequence'),
+        ('shops', '0002_shop_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShopDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('placed_orders', models.IntegerField(default=0)),
+                ('confirmed_orders', models.IntegerField(default=0)),
+                ('shipped_orders', models.IntegerField(default=0)),
+                ('delivered_orders', models.IntegerField(default=0)),
+                ('cancelled_orders', models.IntegerField(default=0)),
+                ('pending_payout', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('delivered_payout', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('delivered_commission', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('items_sold', models.IntegerField(default=0)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='shops.shop')),
+            ],
+            options={
+                'verbose_name': 'Shop Daily Sales',
+                'verbose_name_plural': 'Shop Daily Sales',
+                'db_table': 'shop_daily_sales',
+                'ordering': ['shop', 'day'],
+                'unique_together': {('shop', 'day')},
+            },
+        ),
+    ]
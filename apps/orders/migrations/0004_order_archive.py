@@ -0,0 +1,83 @@
+# Generated by Django 5.0 on 2026-10-16 23:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_shop_daily_sales'),
+        ('products', '0005_category_updated_at'),
+        ('shops', '0002_shop_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_number', models.CharField(max_length=20, unique=True)),
+                ('delivery_name', models.CharField(max_length=100)),
+                ('delivery_phone', models.CharField(max_length=15)),
+                ('delivery_address', models.TextField()),
+                ('delivery_city', models.CharField(max_length=100)),
+                ('delivery_pincode', models.CharField(max_length=6)),
+                ('delivery_landmark', models.CharField(blank=True, max_length=200)),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('cod_fee', models.DecimalField(decimal_places=2, default=50.0, max_digits=10)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('commission_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('seller_payout_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('payment_method', models.CharField(default='cod', max_length=20)),
+                ('payment_status', models.CharField(choices=[('cod_pending', 'COD Pending'), ('cod_collected', 'COD Collected'), ('online_pending', 'Online Pending'), ('online_completed', 'Online Completed'), ('refunded', 'Refunded')], default='cod_pending', max_length=20)),
+                ('order_status', models.CharField(choices=[('placed', 'Placed'), ('confirmed', 'Confirmed'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], default='placed', max_length=20)),
+                ('placed_at', models.DateTimeField(auto_now_add=True)),
+                ('confirmed_at', models.DateTimeField(blank=True, null=True)),
+                ('shipped_at', models.DateTimeField(blank=True, null=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('cancelled_at', models.DateTimeField(blank=True, null=True)),
+                ('cancellation_reason', models.TextField(blank=True)),
+                ('notes', models.TextField(blank=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to=settings.AUTH_USER_MODEL)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to='shops.shop')),
+            ],
+            options={
+                'verbose_name': 'Archived Order',
+                'verbose_name_plural': 'Archived Orders',
+                'db_table': 'archived_orders',
+                'ordering': ['-placed_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_name', models.CharField(max_length=200)),
+                ('product_image_url', models.URLField(blank=True, max_length=500)),
+                ('base_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('display_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('commission_rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('commission_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('quantity', models.IntegerField(default=1)),
+                ('selected_size', models.CharField(blank=True, max_length=20)),
+                ('selected_color', models.CharField(blank=True, max_length=50)),
+                ('item_subtotal', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('seller_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='orders.archivedorder')),
+                ('product', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Archived Order Item',
+                'verbose_name_plural': 'Archived Order Items',
+                'db_table': 'archived_order_items',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['customer', '-placed_at'], name='archived_or_custome_80c0d6_idx'),
+        ),
+    ]
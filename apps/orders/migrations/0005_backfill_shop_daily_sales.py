@@ -0,0 +1,21 @@
+# Generated by Django 5.0 on 2026-10-16 23:45
+
+from django.db import migrations
+
+
+def backfill_shop_daily_sales(apps, schema_editor):
+    # Same computation as the rebuild_sales_rollups command, on the historical models
+    from apps.orders import rollups
+
+    rollups.rebuild(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_shop_daily_sales, migrations.RunPython.noop),
+    ]
@@ -1,22 +1,68 @@
-from django.db import models
+from django.db import connection, models, transaction
 from apps.accounts.models import CustomUser
 from apps.shops.models import Shop
 from apps.products.models import Product
 from decimal import Decimal
-import random
-import string
 from django.utils import timezone
 
 
+class OrderNumberSequence(models.Model):
+    """Per-day counter behind order numbers"""
+
+    day = models.DateField(primary_key=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'order_number_sequences'
+        verbose_name = 'Order Number Sequence'
+        verbose_name_plural = 'Order Number Sequences'
+
+    def __str__(self):
+        return f"{self.day}: {self.last_value}"
+
+
+# One statement bumps (or starts) the day's counter and returns the new value.
+# The conflicting row is locked by the upsert itself, so concurrent callers
+# queue up and each gets its own value; nothing is ever retried.
+NEXT_ORDER_NUMBER_SQL = """
+    INSERT INTO order_number_sequences (day, last_value) VALUES (%s, 1)
+    ON CONFLICT (day) DO UPDATE SET last_value = order_number_sequences.last_value + 1
+    RETURNING last_value
+"""
+
+
+def next_order_sequence(day):
+    if connection.vendor in ('postgresql', 'sqlite'):
+        with connection.cursor() as cursor:
+            cursor.execute(NEXT_ORDER_NUMBER_SQL, [connection.ops.adapt_datefield_value(day)])
+            return cursor.fetchone()[0]
+
+    # Other databases: row lock on the day's counter
+    with transaction.atomic():
+        OrderNumberSequence.objects.get_or_create(day=day)
+        sequence = OrderNumberSequence.objects.select_for_update().get(day=day)
+        sequence.last_value += 1
+        sequence.save(update_fields=['last_value'])
+        return sequence.last_value
+
+
 def generate_order_number():
-    """Generate unique order number: ORD20250115001"""
-    date_str = timezone.now().strftime('%Y%m%d')
-    random_str = ''.join(random.choices(string.digits, k=3))
-    return f"ORD{date_str}{random_str}"
+    """
+    Generate unique order number: ORD20250115001
 
+    The suffix is the day's running count (at least 3 digits, more after
+    the 999th order). Call it outside long transactions where possible:
+    the day's counter row stays locked until the caller's transaction ends.
+    """
+    day = timezone.now().date()
+    return f"ORD{day.strftime('%Y%m%d')}{next_order_sequence(day):03d}"
 
-class Order(models.Model):
-    """Customer orders with correct commission model"""
+
+class OrderRecord(models.Model):
+    """
+    Columns shared by live orders and their archived copies (archive.py
+    copies rows between the two tables column for column)
+    """
 
     ORDER_STATUS_CHOICES = (
         ('placed', 'Placed'),
@@ -34,9 +80,7 @@ class Order(models.Model):
         ('refunded', 'Refunded'),
     )
 
-    order_number = models.CharField(max_length=20, unique=True, default=generate_order_number)
-    customer = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='orders')
-    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='orders')
+    order_number = models.CharField(max_length=20, unique=True)
 
     # Delivery details
     delivery_name = models.CharField(max_length=100)
@@ -72,6 +116,36 @@ class Order(models.Model):
     # Notes
     notes = models.TextField(blank=True)
 
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.order_number} - {self.customer.full_name}"
+
+
+class Order(OrderRecord):
+    """Customer orders with correct commission model"""
+
+    # Status a seller may move an order to, from each status
+    STATUS_TRANSITIONS = {
+        'placed': ['confirmed', 'cancelled'],
+        'confirmed': ['shipped', 'cancelled'],
+        'shipped': ['delivered'],
+        'delivered': [],
+        'cancelled': []
+    }
+
+    STATUS_TIMESTAMPS = {
+        'confirmed': 'confirmed_at',
+        'shipped': 'shipped_at',
+        'delivered': 'delivered_at',
+        'cancelled': 'cancelled_at',
+    }
+
+    order_number = models.CharField(max_length=20, unique=True, default=generate_order_number)
+    customer = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='orders')
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='orders')
+
     class Meta:
         db_table = 'orders'
         verbose_name = 'Order'
@@ -83,15 +157,9 @@ class Order(models.Model):
             models.Index(fields=['order_status']),
         ]
 
-    def __str__(self):
-        return f"{self.order_number} - {self.customer.full_name}"
 
-
-class OrderItem(models.Model):
-    """Individual items in an order with price snapshots"""
-
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
-    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
+class OrderItemRecord(models.Model):
+    """Columns shared by live and archived order items"""
 
     # Snapshots (saved at order time, don't change if product changes)
     product_name = models.CharField(max_length=200)
@@ -112,17 +180,94 @@ class OrderItem(models.Model):
     item_subtotal = models.DecimalField(max_digits=10, decimal_places=2)  # display_price × quantity (customer pays)
     seller_amount = models.DecimalField(max_digits=10, decimal_places=2)  # base_price × quantity (seller gets)
 
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.product_name} x {self.quantity}"
+
+
+class OrderItem(OrderItemRecord):
+    """Individual items in an order with price snapshots"""
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
+
     class Meta:
         db_table = 'order_items'
         verbose_name = 'Order Item'
         verbose_name_plural = 'Order Items'
 
-    def save(self, *args, **kwargs):
-        """Auto-calculate amounts"""
+    def calculate_amounts(self):
+        """Per-unit commission and line totals from the price snapshots"""
         self.commission_amount = self.display_price - self.base_price
         self.item_subtotal = self.display_price * Decimal(str(self.quantity))
         self.seller_amount = self.base_price * Decimal(str(self.quantity))
+
+    def save(self, *args, **kwargs):
+        """Auto-calculate amounts"""
+        self.calculate_amounts()
         super().save(*args, **kwargs)
 
+
+class ArchivedOrder(OrderRecord):
+    """
+    Finished orders moved out of the orders table by archive_orders, so
+    listings scan only recent ones. Keeps the original id; read-only.
+    """
+
+    customer = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='archived_orders')
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='archived_orders')
+
+    class Meta:
+        db_table = 'archived_orders'
+        verbose_name = 'Archived Order'
+        verbose_name_plural = 'Archived Orders'
+        ordering = ['-placed_at']
+        indexes = [
+            models.Index(fields=['customer', '-placed_at']),
+        ]
+
+
+class ArchivedOrderItem(OrderItemRecord):
+    """Items of an archived order, ids kept"""
+
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, related_name='+')
+
+    class Meta:
+        db_table = 'archived_order_items'
+        verbose_name = 'Archived Order Item'
+        verbose_name_plural = 'Archived Order Items'
+
+
+class ShopDailySales(models.Model):
+    """
+    Per-shop rollup of the orders placed on one (local) day, kept current
+    by apps.orders.rollups on checkout and every status change
+    """
+
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='daily_sales')
+    day = models.DateField()
+
+    # Orders placed that day, by current status
+    placed_orders = models.IntegerField(default=0)
+    confirmed_orders = models.IntegerField(default=0)
+    shipped_orders = models.IntegerField(default=0)
+    delivered_orders = models.IntegerField(default=0)
+    cancelled_orders = models.IntegerField(default=0)
+
+    pending_payout = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # confirmed + shipped
+    delivered_payout = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # Seller earned
+    delivered_commission = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # Platform earned
+    items_sold = models.IntegerField(default=0)  # Units in delivered orders
+
+    class Meta:
+        db_table = 'shop_daily_sales'
+        verbose_name = 'Shop Daily Sales'
+        verbose_name_plural = 'Shop Daily Sales'
+        unique_together = ('shop', 'day')
+        ordering = ['shop', 'day']
+
     def __str__(self):
-        return f"{self.product_name} x {self.quantity}"
\ No newline at end of file
+        return f"{self.shop_id} {self.day}"
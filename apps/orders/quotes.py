@@ -0,0 +1,60 @@
+"""
+Cart quotes: what create_order would charge for a cart, without writing.
+
+Cart pages re-render often with the same cart, so results (valid quotes
+and validation errors alike) are cached for QUOTE_CACHE_TIMEOUT seconds
+under a fingerprint of the cart. An entry remembers the cache-tag version
+(apps.core.cache) of every product in the cart and of their shops; any
+product write, stock change or shop repricing bumps one of those and the
+entry becomes a miss. A product that is unavailable because its shop is
+unapproved can read as unavailable for up to the timeout.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+
+from apps.core.cache import get_tag_versions
+from apps.products.invalidation import product_tag, shop_tag
+from .serializers import OrderQuoteSerializer
+from .utils import OrderCalculator
+
+QUOTE_CACHE_PREFIX = 'orders:quote:'
+QUOTE_CACHE_TIMEOUT = 60
+
+
+def cart_fingerprint(cart_items):
+    """Items in cart order: the quote lists them in the same order"""
+    raw = json.dumps([
+        [item['product_id'], item['quantity'], item['size'], item['color']] for item in cart_items
+    ])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def quote_cart(cart_items):
+    """
+    Price normalized cart items (OrderQuoteRequestSerializer). Returns
+    ({'valid', 'errors', 'quote'}, cached?); ``quote`` is
+    OrderQuoteSerializer data when the cart is valid, None otherwise.
+    """
+    key = f'{QUOTE_CACHE_PREFIX}{cart_fingerprint(cart_items)}'
+    entry = cache.get(key)
+    if entry is not None and get_tag_versions(entry['tags']) == entry['tags']:
+        return entry['result'], True
+
+    started = time.time_ns()
+    products = OrderCalculator.load_cart_products(cart_items)
+    is_valid, errors, validated_items = OrderCalculator.validate_cart_items(cart_items, products)
+    result = {'valid': is_valid, 'errors': errors, 'quote': None}
+    if is_valid:
+        totals = OrderCalculator.calculate_order_totals(validated_items)
+        result['quote'] = json.loads(json.dumps(OrderQuoteSerializer(totals).data))
+
+    tags = {product_tag(item['product_id']) for item in cart_items}
+    tags.update(shop_tag(product.shop_id) for product in products.values())
+    versions = get_tag_versions(tags)
+    # Don't store what a concurrent write may already have outdated
+    if all(version < started for version in versions.values()):
+        cache.set(key, {'tags': versions, 'result': result}, QUOTE_CACHE_TIMEOUT)
+    return result, False
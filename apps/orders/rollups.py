@@ -0,0 +1,217 @@
+"""
+Per-shop daily sales rollups.
+
+One ShopDailySales row per shop and day (the local date the orders were
+placed) holds what the seller dashboards show: order counts by current
+status, payouts, commission and units sold. Checkout and every status
+change add their delta to the day's row with an upsert, in the same
+transaction as the order write, so dashboards read O(days) rows instead
+of the shop's whole order history.
+
+Writes that bypass these hooks (raw SQL, shell fixes) cause drift;
+``rebuild`` (the rebuild_sales_rollups command) recomputes the rows from
+the orders and archived orders tables. Migration 0005 runs it once to
+backfill the rows of orders placed before the rollups existed.
+"""
+from collections import defaultdict
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, ShopDailySales
+
+PENDING_PAYOUT_STATUSES = ('confirmed', 'shipped')
+
+COUNT_FIELDS = {status: f'{status}_orders' for status, _ in Order.ORDER_STATUS_CHOICES}
+MONEY_FIELDS = ('pending_payout', 'delivered_payout', 'delivered_commission')
+ROLLUP_FIELDS = (*COUNT_FIELDS.values(), *MONEY_FIELDS, 'items_sold')
+
+UPSERT_SQL = """
+    INSERT INTO {table} (shop_id, day, {columns}) VALUES (%s, %s, {values})
+    ON CONFLICT (shop_id, day) DO UPDATE SET {increments}
+""".format(
+    table=ShopDailySales._meta.db_table,
+    columns=', '.join(ROLLUP_FIELDS),
+    values=', '.join(['%s'] * len(ROLLUP_FIELDS)),
+    increments=', '.join(
+        f'{field} = {ShopDailySales._meta.db_table}.{field} + excluded.{field}' for field in ROLLUP_FIELDS
+    ),
+)
+
+
+def contribution(status, payout, commission, units=0):
+    """What one order in ``status`` adds to its day's row"""
+    values = {COUNT_FIELDS[status]: 1}
+    if status in PENDING_PAYOUT_STATUSES:
+        values['pending_payout'] = payout
+    elif status == 'delivered':
+        values['delivered_payout'] = payout
+        values['delivered_commission'] = commission
+        values['items_sold'] = units
+    return values
+
+
+def apply(deltas):
+    """
+    Add {(shop_id, day): {field: amount}} to the rollup rows, creating
+    missing rows. Call it inside the transaction that changed the orders.
+    """
+    rows = []
+    for (shop_id, day), values in sorted(deltas.items()):
+        if any(values.values()):
+            rows.append((shop_id, day, values))
+    if not rows:
+        return
+
+    if connection.vendor in ('postgresql', 'sqlite'):
+        ops = connection.ops
+        params = []
+        for shop_id, day, values in rows:
+            params.append([
+                shop_id,
+                ops.adapt_datefield_value(day),
+                *[
+                    ops.adapt_decimalfield_value(Decimal(values.get(field, 0)), 12, 2)
+                    if field in MONEY_FIELDS else values.get(field, 0)
+                    for field in ROLLUP_FIELDS
+                ],
+            ])
+        with connection.cursor() as cursor:
+            cursor.executemany(UPSERT_SQL, params)
+        return
+
+    # Other databases: create the row, then increment it in place
+    with transaction.atomic():
+        for shop_id, day, values in rows:
+            ShopDailySales.objects.get_or_create(shop_id=shop_id, day=day)
+            ShopDailySales.objects.filter(shop_id=shop_id, day=day).update(
+                **{field: F(field) + amount for field, amount in values.items()}
+            )
+
+
+def _row_key(order):
+    return order.shop_id, timezone.localdate(order.placed_at)
+
+
+def record_placed(order):
+    """A new order was placed"""
+    apply({_row_key(order): contribution(order.order_status, order.seller_payout_amount, order.commission_amount)})
+
+
+def record_transitions(changes, new_status):
+    """
+    Orders moved to ``new_status``: changes is [(order, old status), ...].
+    Orders need shop_id, placed_at, seller_payout_amount and
+    commission_amount loaded.
+    """
+    units = {}
+    if new_status == 'delivered':
+        units = dict(
+            OrderItem.objects.filter(order_id__in=[order.id for order, _ in changes])
+            .values('order_id').annotate(total=Sum('quantity')).order_by('order_id')
+            .values_list('order_id', 'total')
+        )
+
+    deltas = defaultdict(lambda: defaultdict(int))
+    for order, old_status in changes:
+        row = deltas[_row_key(order)]
+        payout, commission = order.seller_payout_amount, order.commission_amount
+        for field, amount in contribution(old_status, payout, commission).items():
+            row[field] -= amount
+        for field, amount in contribution(new_status, payout, commission, units.get(order.id, 0)).items():
+            row[field] += amount
+    apply(deltas)
+
+
+def _aggregates(order_model, item_model, shop_ids, since):
+    orders = order_model.objects.all()
+    if shop_ids is not None:
+        orders = orders.filter(shop_id__in=shop_ids)
+    if since is not None:
+        orders = orders.filter(placed_at__gte=timezone.make_aware(datetime.combine(since, time.min)))
+
+    delivered = Q(order_status='delivered')
+    aggregates = {field: Count('id', filter=Q(order_status=status)) for status, field in COUNT_FIELDS.items()}
+    aggregates.update(
+        pending_payout=Sum('seller_payout_amount', filter=Q(order_status__in=PENDING_PAYOUT_STATUSES)),
+        delivered_payout=Sum('seller_payout_amount', filter=delivered),
+        delivered_commission=Sum('commission_amount', filter=delivered),
+    )
+    rows = orders.annotate(day=TruncDate('placed_at')).values('shop_id', 'day').annotate(**aggregates).order_by()
+    units = item_model.objects.filter(order__in=orders.filter(delivered)).annotate(
+        day=TruncDate('order__placed_at')
+    ).values('order__shop_id', 'day').annotate(total=Sum('quantity')).order_by()
+    return rows, units
+
+
+def _models(apps=None):
+    """The order models, or a migration's historical versions of them"""
+    if apps is None:
+        return Order, OrderItem, ArchivedOrder, ArchivedOrderItem, ShopDailySales
+    return tuple(
+        apps.get_model('orders', name)
+        for name in ('Order', 'OrderItem', 'ArchivedOrder', 'ArchivedOrderItem', 'ShopDailySales')
+    )
+
+
+def compute(shop_ids=None, since=None, apps=None):
+    """{(shop_id, day): {field: value}} recomputed from the live and archived orders"""
+    order_model, item_model, archived_order_model, archived_item_model, _ = _models(apps)
+    rows, units = _aggregates(order_model, item_model, shop_ids, since)
+    archived_rows, archived_units = _aggregates(archived_order_model, archived_item_model, shop_ids, since)
+
+    # UNION ALL: each table pair is read in one statement, so an order
+    # archived meanwhile isn't counted twice
+    result = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+    for row in rows.union(archived_rows, all=True):
+        values = result[(row['shop_id'], row['day'])]
+        for field in ROLLUP_FIELDS:
+            if field != 'items_sold':
+                values[field] += row[field] or 0
+    for row in units.union(archived_units, all=True):
+        result[(row['order__shop_id'], row['day'])]['items_sold'] += row['total'] or 0
+    return dict(result)
+
+
+def rebuild(shop_ids=None, since=None, dry_run=False, apps=None):
+    """
+    Recompute rollup rows from orders (all shops, or ``shop_ids``; all
+    days, or from ``since``). Returns (rows written, rows that had drifted).
+    ``apps`` is a migration's app registry, when run from one.
+    """
+    rollup_model = _models(apps)[-1]
+    existing = rollup_model.objects.all()
+    if shop_ids is not None:
+        existing = existing.filter(shop_id__in=shop_ids)
+    if since is not None:
+        existing = existing.filter(day__gte=since)
+
+    with transaction.atomic():
+        current = {
+            (row['shop_id'], row['day']): {field: row[field] for field in ROLLUP_FIELDS}
+            for row in existing.select_for_update().values('shop_id', 'day', *ROLLUP_FIELDS)
+        }
+        # After the lock: checkouts that commit from here on block on the
+        # rows and add to the rebuilt values
+        expected = compute(shop_ids, since, apps)
+        drifted = sum(
+            1 for key in expected.keys() | current.keys()
+            if _normalize(expected.get(key)) != _normalize(current.get(key))
+        )
+        if not dry_run:
+            existing.delete()
+            rollup_model.objects.bulk_create([
+                rollup_model(shop_id=shop_id, day=day, **values)
+                for (shop_id, day), values in sorted(expected.items())
+            ], batch_size=1000)
+
+    return len(expected), drifted
+
+
+def _normalize(values):
+    # A missing row and an all-zero row mean the same thing
+    return {field: Decimal((values or {}).get(field) or 0) for field in ROLLUP_FIELDS}
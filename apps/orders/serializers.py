@@ -1,7 +1,34 @@
+from decimal import Decimal
+
+from django.db.models import Count, OuterRef, Prefetch, Subquery
 from rest_framework import serializers
-from .models import Order, OrderItem
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, generate_order_number
 from apps.products.serializers import ProductSerializer
-from .utils import OrderCalculator
+from . import rollups
+from .utils import OrderCalculator, StockManager, first_image_urls
+
+
+def cod_payment_info(total_amount, cod_fee):
+    """What the customer pays on delivery, as shown after checkout"""
+    return {
+        'method': 'Cash on Delivery',
+        'amount_to_pay': f"₹{total_amount}",
+        'cod_fee_included': f"₹{cod_fee}",
+        'note': 'Pay cash when you receive your order'
+    }
+
+
+def hide_seller_amounts(data):
+    """Drop the commission split (order and item level) from an order or quote, for customers"""
+    data.pop('commission_amount', None)
+    data.pop('seller_payout_amount', None)
+    # Hide base prices in items
+    for item in data.get('items', []):
+        item.pop('base_price', None)
+        item.pop('commission_rate', None)
+        item.pop('commission_amount', None)
+        item.pop('seller_amount', None)
+    return data
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -60,8 +87,11 @@ class OrderCreateSerializer(serializers.Serializer):
             raise serializers.ValidationError({'delivery': errors})
 
         # Validate cart items
+        # Products already loaded by the caller (cart checkout), if any
         cart_items = data.get('cart_items', [])
-        is_valid, errors, validated_items = OrderCalculator.validate_cart_items(cart_items)
+        is_valid, errors, validated_items = OrderCalculator.validate_cart_items(
+            cart_items, self.context.get('products')
+        )
 
         if not is_valid:
             raise serializers.ValidationError({'cart_items': errors})
@@ -84,9 +114,24 @@ class OrderCreateSerializer(serializers.Serializer):
         # Get customer from request
         customer = self.context['request'].user
 
+        # First image per product for the item snapshots, one query, before
+        # the transaction starts
+        image_urls = first_image_urls(item['product'].id for item in calc_data['items_breakdown'])
+
+        # Allocated in its own statement so the day's counter row isn't
+        # locked for the whole checkout transaction
+        order_number = generate_order_number()
+
+        # Fixed number of statements whatever the cart size: one stock
+        # UPDATE, the order INSERT and one bulk INSERT for the items
         with transaction.atomic():
+            # Take the stock first, so a checkout that loses the race fails
+            # before writing anything (raises InsufficientStock)
+            StockManager.reserve(calc_data['items_breakdown'])
+
             # Create Order
             order = Order.objects.create(
+                order_number=order_number,
                 customer=customer,
                 shop=calc_data['shop'],
 
@@ -112,42 +157,93 @@ class OrderCreateSerializer(serializers.Serializer):
             )
 
             # Create OrderItems with price snapshots
+            items = []
             for item_data in calc_data['items_breakdown']:
                 product = item_data['product']
-
-                # Get first product image
-                first_image = product.images.first()
-                image_url = first_image.image_url if first_image else ''
-
-                OrderItem.objects.create(
+                item = OrderItem(
                     order=order,
                     product=product,
                     product_name=product.name,
-                    product_image_url=image_url,
+                    product_image_url=image_urls.get(product.id, ''),
 
                     # Price snapshots (CRITICAL)
                     base_price=item_data['base_price'],
                     display_price=item_data['display_price'],
                     commission_rate=item_data['commission_rate'],
-                    commission_amount=item_data['commission_per_unit'],
 
                     # Order details
                     quantity=item_data['quantity'],
                     selected_size=item_data['size'],
                     selected_color=item_data['color'],
-
-                    # Calculated amounts
-                    item_subtotal=item_data['item_subtotal'],
-                    seller_amount=item_data['item_seller_amount']
                 )
+                # bulk_create skips OrderItem.save()
+                item.calculate_amounts()
+                items.append(item)
+            OrderItem.objects.bulk_create(items)
 
-                # Reduce product stock
-                product.stock_quantity -= item_data['quantity']
-                product.save(update_fields=['stock_quantity'])
+            rollups.record_placed(order)
 
             return order
 
 
+class OrderQuoteRequestSerializer(serializers.Serializer):
+    """A cart to price: the cart_items part of an OrderCreateSerializer body"""
+
+    cart_items = serializers.ListField(child=serializers.DictField())
+
+    def validate_cart_items(self, cart_items):
+        normalized = []
+        for item in cart_items:
+            try:
+                normalized.append({
+                    'product_id': int(item['product_id']),
+                    'quantity': int(item.get('quantity', 1)),
+                    'size': item.get('size') or '',
+                    'color': item.get('color') or '',
+                })
+            except (KeyError, TypeError, ValueError):
+                raise serializers.ValidationError('Every item needs a numeric product_id and quantity')
+        return normalized
+
+
+class QuoteItemSerializer(serializers.Serializer):
+    """One line of OrderCalculator.calculate_order_totals, named like OrderItem fields"""
+
+    product_id = serializers.IntegerField(source='product.id')
+    product_name = serializers.CharField(source='product.name')
+    base_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    display_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    commission_rate = serializers.DecimalField(max_digits=5, decimal_places=2)
+    commission_amount = serializers.DecimalField(max_digits=10, decimal_places=2, source='commission_per_unit')
+    quantity = serializers.IntegerField()
+    selected_size = serializers.CharField(source='size')
+    selected_color = serializers.CharField(source='color')
+    item_subtotal = serializers.DecimalField(max_digits=10, decimal_places=2)
+    seller_amount = serializers.DecimalField(max_digits=10, decimal_places=2, source='item_seller_amount')
+
+
+class OrderQuoteSerializer(serializers.Serializer):
+    """
+    OrderCalculator.calculate_order_totals output, with the amounts
+    create_order would store on the order (seller view; see
+    hide_seller_amounts)
+    """
+
+    shop_id = serializers.IntegerField(source='shop.id')
+    shop_name = serializers.CharField(source='shop.shop_name')
+    subtotal = serializers.DecimalField(max_digits=10, decimal_places=2)
+    cod_fee = serializers.DecimalField(max_digits=10, decimal_places=2)
+    discount_amount = serializers.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    total_amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    commission_amount = serializers.DecimalField(max_digits=10, decimal_places=2, source='total_commission')
+    seller_payout_amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    items = QuoteItemSerializer(many=True, source='items_breakdown')
+    items_count = serializers.SerializerMethodField()
+
+    def get_items_count(self, obj):
+        return len(obj['items_breakdown'])
+
+
 class OrderSerializer(serializers.ModelSerializer):
     """Serializer for displaying orders"""
 
@@ -170,7 +266,23 @@ class OrderSerializer(serializers.ModelSerializer):
                   'cancelled_at', 'cancellation_reason', 'items', 'items_count')
         read_only_fields = ('id', 'order_number', 'placed_at')
 
+    @staticmethod
+    def prepare_queryset(queryset):
+        """
+        Load everything the serializer reads up front, so a page of orders
+        costs the same few queries whatever its size
+        """
+        item_model = queryset.model.items.field.model  # OrderItem, or ArchivedOrderItem
+        return queryset.select_related('customer', 'shop').annotate(
+            items_count=Count('items')
+        ).prefetch_related(
+            Prefetch('items', queryset=item_model.objects.select_related('product'))
+        )
+
     def get_items_count(self, obj):
+        # Annotated by prepare_queryset
+        if hasattr(obj, 'items_count'):
+            return obj.items_count
         return obj.items.count()
 
     def to_representation(self, instance):
@@ -181,14 +293,56 @@ class OrderSerializer(serializers.ModelSerializer):
         if request and request.user.is_authenticated:
             # If customer viewing, hide some seller details
             if request.user.user_type == 'customer':
-                data.pop('commission_amount', None)
-                data.pop('seller_payout_amount', None)
-                # Hide base prices in items
-                if 'items' in data:
-                    for item in data['items']:
-                        item.pop('base_price', None)
-                        item.pop('commission_rate', None)
-                        item.pop('commission_amount', None)
-                        item.pop('seller_amount', None)
+                hide_seller_amounts(data)
+
+        return data
+
+
+class ArchivedOrderItemSerializer(OrderItemSerializer):
+
+    class Meta(OrderItemSerializer.Meta):
+        model = ArchivedOrderItem
+
+
+class ArchivedOrderSerializer(OrderSerializer):
+    """Same shape as OrderSerializer, for orders read from the archive"""
+
+    items = ArchivedOrderItemSerializer(many=True, read_only=True)
+
+    class Meta(OrderSerializer.Meta):
+        model = ArchivedOrder
+
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """Order header with its item count and first item, for order lists"""
+
+    shop_name = serializers.CharField(source='shop.shop_name', read_only=True)
+    items_count = serializers.IntegerField(read_only=True)
+    first_item_name = serializers.CharField(read_only=True)
+    thumbnail_url = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ('id', 'order_number', 'shop_name', 'delivery_name', 'total_amount',
+                  'seller_payout_amount', 'payment_method', 'payment_status', 'order_status',
+                  'placed_at', 'items_count', 'first_item_name', 'thumbnail_url')
+
+    @staticmethod
+    def prepare_queryset(queryset):
+        """Counts and the first item come from the order query itself: one query per page"""
+        first_item = OrderItem.objects.filter(order=OuterRef('pk')).order_by('id')
+        return queryset.select_related('shop').annotate(
+            items_count=Count('items'),
+            first_item_name=Subquery(first_item.values('product_name')[:1]),
+            thumbnail_url=Subquery(first_item.values('product_image_url')[:1]),
+        )
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        request = self.context.get('request')
+
+        # Customers don't see the seller's payout
+        if request and request.user.is_authenticated and request.user.user_type == 'customer':
+            data.pop('seller_payout_amount', None)
 
         return data
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Order statistics.
+
+Seller figures come from the shop's daily sales rollups (see rollups.py):
+one aggregate over a row per day, whatever the shop's order count. Today
+and this month are the active timezone's dates, matching the local day
+the rollup rows are keyed on. Customer figures are conditional
+aggregates (COUNT ... FILTER) over their live and archived orders.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import ArchivedOrder, Order, ShopDailySales
+from .rollups import COUNT_FIELDS
+
+ACTIVE_STATUSES = ('placed', 'confirmed', 'shipped')
+
+# Seller dashboards poll; a few seconds of lag is fine
+SHOP_STATS_CACHE_TIMEOUT = 30
+SHOP_STATS_CACHE_PREFIX = 'orders:stats:shop:'
+
+MAX_SERIES_DAYS = 365
+
+
+def _orders(statuses):
+    total = None
+    for status in statuses:
+        total = F(COUNT_FIELDS[status]) if total is None else total + F(COUNT_FIELDS[status])
+    return total
+
+
+def shop_totals(shop_id, now=None):
+    """
+    Lifetime, today's and this month's figures for a shop, one query over
+    its rollup rows. Sums over no rows come back as 0.
+    """
+    today = timezone.localdate(now)
+    in_today = Q(day=today)
+    in_month = Q(day__gte=today.replace(day=1))
+    all_orders = _orders(COUNT_FIELDS)
+
+    totals = ShopDailySales.objects.filter(shop_id=shop_id).aggregate(
+        total_orders=Sum(all_orders),
+        # Aliased: an aggregate named like a field hides it from the others
+        **{f'{status}_count': Sum(field) for status, field in COUNT_FIELDS.items()},
+        today_orders=Sum(all_orders, filter=in_today),
+        today_revenue=Sum('delivered_payout', filter=in_today),
+        month_orders=Sum(all_orders, filter=in_month),
+        month_revenue=Sum('delivered_payout', filter=in_month),
+        pending_payout=Sum('pending_payout'),
+        delivered_payout=Sum('delivered_payout'),
+        delivered_commission=Sum('delivered_commission'),
+    )
+    for status, field in COUNT_FIELDS.items():
+        totals[field] = totals.pop(f'{status}_count')
+    return {name: value or 0 for name, value in totals.items()}
+
+
+def shop_statistics(shop_id, now=None):
+    """Seller statistics for one shop"""
+    totals = shop_totals(shop_id, now)
+    return {
+        'total_orders': totals['total_orders'],
+        'pending_orders': sum(totals[COUNT_FIELDS[status]] for status in ACTIVE_STATUSES),
+        'completed_orders': totals['delivered_orders'],
+        'cancelled_orders': totals['cancelled_orders'],
+
+        'today_orders': totals['today_orders'],
+        'today_revenue': totals['today_revenue'],
+
+        'month_orders': totals['month_orders'],
+        'month_revenue': totals['month_revenue'],
+
+        'total_earnings': totals['delivered_payout'],
+        'pending_earnings': totals['pending_payout'],
+    }
+
+
+def cached_shop_statistics(shop_id):
+    key = f'{SHOP_STATS_CACHE_PREFIX}{shop_id}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = shop_statistics(shop_id)
+        cache.set(key, stats, SHOP_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def daily_revenue(shop_id, days, now=None):
+    """
+    One entry per day for the last ``days`` days (today included, oldest
+    first), zero-filled, by the day orders were placed
+    """
+    today = timezone.localdate(now)
+    first_day = today - timedelta(days=days - 1)
+    rows = {
+        row.day: row
+        for row in ShopDailySales.objects.filter(shop_id=shop_id, day__gte=first_day, day__lte=today)
+    }
+
+    series = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        row = rows.get(day) or ShopDailySales(day=day)
+        series.append({
+            'date': day.isoformat(),
+            'orders': sum(getattr(row, field) for field in COUNT_FIELDS.values()),
+            'delivered_orders': row.delivered_orders,
+            'cancelled_orders': row.cancelled_orders,
+            'revenue': row.delivered_payout,
+            'commission': row.delivered_commission,
+            'items_sold': row.items_sold,
+        })
+    return series
+
+
+def customer_statistics(customer_id):
+    """Customer statistics: one query over live orders, one over archived (all finished)"""
+    figures = {
+        'total_orders': Count('id'),
+        'active_orders': Count('id', filter=Q(order_status__in=ACTIVE_STATUSES)),
+        'completed_orders': Count('id', filter=Q(order_status='delivered')),
+        'cancelled_orders': Count('id', filter=Q(order_status='cancelled')),
+    }
+    stats = Order.objects.filter(customer_id=customer_id).aggregate(**figures)
+    archived = ArchivedOrder.objects.filter(customer_id=customer_id).aggregate(**figures)
+    return {name: stats[name] + archived[name] for name in figures}
@@ -1,3 +1,527 @@
-from django.test import TestCase
+import datetime
+import importlib
+import threading
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from apps.accounts.models import CustomUser
+from apps.core.cache import get_tag_versions
+from apps.products.invalidation import CATALOG_TAG, product_tag
+from apps.products.models import Product
+from apps.reviews.models import ProductReview
+from apps.shops.models import Shop
+from . import archive, rollups
+from .models import (
+    ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderNumberSequence, ShopDailySales,
+    generate_order_number, next_order_sequence
+)
+from .utils import StockManager
+
+
+class OrderNumberTests(TestCase):
+
+    def test_format_and_daily_reset(self):
+        with mock.patch('apps.orders.models.timezone.now',
+                        return_value=datetime.datetime(2025, 1, 15, 10, tzinfo=datetime.timezone.utc)):
+            self.assertEqual(generate_order_number(), 'ORD20250115001')
+            self.assertEqual(generate_order_number(), 'ORD20250115002')
+
+        with mock.patch('apps.orders.models.timezone.now',
+                        return_value=datetime.datetime(2025, 1, 16, 10, tzinfo=datetime.timezone.utc)):
+            self.assertEqual(generate_order_number(), 'ORD20250116001')
+
+    def test_grows_past_three_digits(self):
+        day = datetime.date(2025, 1, 15)
+        OrderNumberSequence.objects.create(day=day, last_value=999)
+        self.assertEqual(next_order_sequence(day), 1000)
+
+
+class ConcurrentOrderNumberTests(TransactionTestCase):
+    """Threads use their own connections, so the rows must really be committed"""
+
+    concurrent_connections = True
+
+    threads = 8
+    per_thread = 25
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('in-memory SQLite locks whole tables across connections')
+
+    def test_concurrent_allocations_are_unique_and_gapless(self):
+        day = datetime.date(2025, 1, 15)
+        results, errors = [], []
+        lock = threading.Lock()
+        barrier = threading.Barrier(self.threads)
+
+        def worker():
+            try:
+                barrier.wait()
+                values = [next_order_sequence(day) for _ in range(self.per_thread)]
+                with lock:
+                    results.extend(values)
+            except Exception as exc:
+                with lock:
+                    errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        total = self.threads * self.per_thread
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(results), list(range(1, total + 1)))
+        self.assertEqual(OrderNumberSequence.objects.get(day=day).last_value, total)
+
+
+class ShopFixtureMixin:
+    """A seller's shop with one product, and a few customers"""
+
+    stock = 30
+
+    def create_fixture(self):
+        self.seller = CustomUser.objects.create(
+            phone_number='9100000000', full_name='Seller', user_type='seller', firebase_uid='seller'
+        )
+        self.shop = Shop.objects.create(
+            owner=self.seller, shop_name='Shop', business_address='-', city='Amravati',
+            pincode='444601', owner_contact_number='9100000000', is_approved=True
+        )
+        self.product = Product.objects.create(
+            shop=self.shop, name='Shirt', base_price=Decimal('100'), commission_rate=Decimal('15.00'),
+            stock_quantity=self.stock
+        )
+        self.customers = [
+            CustomUser.objects.create(
+                phone_number=f'920000000{i}', full_name='Customer', user_type='customer', firebase_uid=f'customer-{i}'
+            )
+            for i in range(4)
+        ]
+
+    def place_order(self, client):
+        return client.post('/api/orders/create', {
+            'cart_items': [{'product_id': self.product.id, 'quantity': 2}],
+            'delivery_name': 'Customer',
+            'delivery_phone': '9999999999',
+            'delivery_address': '-',
+            'delivery_city': 'Amravati',
+            'delivery_pincode': '444601',
+        }, format='json')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+
+class SalesRollupTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.create_fixture()
+
+    def test_rollups_follow_checkout_and_status_changes(self):
+        customer = self.client_for(self.customers[0])
+        seller = self.client_for(self.seller)
+        numbers = [self.place_order(customer).json()['order']['order_number'] for _ in range(5)]
+
+        for new_status in ('confirmed', 'shipped', 'delivered'):
+            seller.patch(f'/api/orders/{numbers[0]}/status', {'new_status': new_status}, format='json')
+        customer.post(f'/api/orders/{numbers[1]}/cancel', {}, format='json')
+        seller.post('/api/orders/bulk-status', {'order_numbers': numbers[2:], 'new_status': 'confirmed'}, format='json')
+        seller.post('/api/orders/bulk-status', {'order_numbers': numbers[3:], 'new_status': 'cancelled'}, format='json')
+
+        row = ShopDailySales.objects.get(shop=self.shop)
+        self.assertEqual(
+            (row.placed_orders, row.confirmed_orders, row.delivered_orders, row.cancelled_orders, row.items_sold),
+            (0, 1, 1, 3, 2)
+        )
+        self.assertEqual(row.delivered_payout, Decimal('200.00'))
+        self.assertEqual(row.pending_payout, Decimal('200.00'))
+        # Nothing to repair
+        self.assertEqual(rollups.rebuild(dry_run=True), (1, 0))
+
+        statistics = seller.get('/api/orders/statistics').json()['statistics']
+        self.assertEqual((statistics['total_orders'], statistics['today_orders']), (5, 5))
+
+    def test_migration_backfills_existing_orders(self):
+        customer = self.client_for(self.customers[0])
+        for _ in range(2):
+            self.place_order(customer)
+        Order.objects.update(order_status='delivered')
+        # As if the orders predated the rollups
+        ShopDailySales.objects.all().delete()
+
+        backfill = importlib.import_module('apps.orders.migrations.0005_backfill_shop_daily_sales')
+        state = MigrationLoader(connection).project_state(('orders', '0005_backfill_shop_daily_sales'))
+        backfill.backfill_shop_daily_sales(state.apps, None)
+
+        row = ShopDailySales.objects.get(shop=self.shop)
+        self.assertEqual((row.placed_orders, row.delivered_orders, row.items_sold), (0, 2, 4))
+        self.assertEqual(row.delivered_payout, Decimal('400.00'))
+
+
+class BulkOrderStatusTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.create_fixture()
+        other_seller = CustomUser.objects.create(
+            phone_number='9100000001', full_name='Other', user_type='seller', firebase_uid='other-seller'
+        )
+        self.other_shop = Shop.objects.create(
+            owner=other_seller, shop_name='Other', business_address='-', city='Amravati',
+            pincode='444601', owner_contact_number='9100000001', is_approved=True
+        )
+
+    def bulk(self, numbers, new_status):
+        return self.client_for(self.seller).post(
+            '/api/orders/bulk-status', {'order_numbers': numbers, 'new_status': new_status}, format='json'
+        ).json()
+
+    def sales(self, shop):
+        return ShopDailySales.objects.values_list(
+            'placed_orders', 'confirmed_orders', 'shipped_orders', 'cancelled_orders', 'pending_payout'
+        ).get(shop=shop)
+
+    def test_mixed_batch(self):
+        customer = self.client_for(self.customers[0])
+        numbers = [self.place_order(customer).json()['order']['order_number'] for _ in range(4)]
+        Product.objects.filter(id=self.product.id).update(shop=self.other_shop)
+        foreign = self.place_order(customer).json()['order']['order_number']
+
+        self.bulk(numbers[:3], 'confirmed')
+        self.bulk(numbers[2:3], 'shipped')
+        self.assertEqual(self.sales(self.shop), (1, 2, 1, 0, Decimal('600.00')))
+
+        batch = [numbers[0], numbers[1], numbers[2], foreign, numbers[1], 'ORD00000000000']
+        with mock.patch.object(StockManager, 'restore', wraps=StockManager.restore) as restore:
+            response = self.bulk(batch, 'cancelled')
+            # Already cancelled: nothing moves, nothing is restored again
+            self.assertEqual(self.bulk(numbers[:2], 'cancelled')['updated'], 0)
+
+        self.assertEqual(response['updated'], 2)
+        self.assertEqual(
+            [(result['order_number'], result['success']) for result in response['results']],
+            [(numbers[0], True), (numbers[1], True), (numbers[2], False), (foreign, False), ('ORD00000000000', False)]
+        )
+        self.assertEqual(response['results'][2]['message'], 'Cannot change status from shipped to cancelled')
+        restore.assert_called_once()
+        self.assertEqual(
+            sorted(restore.call_args.args[0]),
+            sorted(Order.objects.filter(order_number__in=numbers[:2]).values_list('id', flat=True))
+        )
+
+        # Five orders of two units, two of them cancelled
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, self.stock - 6)
+        self.assertEqual(Order.objects.get(order_number=foreign).order_status, 'placed')
+        self.assertEqual(self.sales(self.shop), (1, 0, 1, 2, Decimal('200.00')))
+        self.assertEqual(self.sales(self.other_shop), (1, 0, 0, 0, Decimal('0.00')))
+        self.assertEqual(rollups.rebuild(dry_run=True)[1], 0)
+
+
+class OrderArchiveTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.create_fixture()
+
+    def test_finished_orders_move_to_the_archive(self):
+        customer = self.client_for(self.customers[0])
+        seller = self.client_for(self.seller)
+        delivered, cancelled, placed, recent = [
+            self.place_order(customer).json()['order']['order_number'] for _ in range(4)
+        ]
+        for new_status in ('confirmed', 'shipped', 'delivered'):
+            seller.patch(f'/api/orders/{delivered}/status', {'new_status': new_status}, format='json')
+        customer.post(f'/api/orders/{cancelled}/cancel', {}, format='json')
+        review = ProductReview.objects.create(
+            order=Order.objects.get(order_number=delivered), order_number=delivered, product=self.product,
+            customer=self.customers[0], rating=5
+        )
+
+        long_ago = datetime.datetime(2024, 1, 10, 12, tzinfo=datetime.timezone.utc)
+        Order.objects.exclude(order_number=recent).update(placed_at=long_ago)
+        rollups.rebuild()
+
+        self.assertEqual(archive.archive(batch_size=1), 2)
+        self.assertEqual(sorted(Order.objects.values_list('order_number', flat=True)), [placed, recent])
+        self.assertEqual(ArchivedOrder.objects.count(), 2)
+        self.assertEqual(ArchivedOrderItem.objects.filter(order__order_number=delivered).get().quantity, 2)
+        review.refresh_from_db()
+        self.assertIsNone(review.order)
+        # The order number still leads to the archived order and still allows one review
+        self.assertEqual(ArchivedOrder.objects.get(order_number=review.order_number).customer, self.customers[0])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ProductReview.objects.create(
+                order_number=delivered, product=self.product, customer=self.customers[0], rating=1
+            )
+
+        response = customer.get(f'/api/orders/{delivered}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['archived'])
+        self.assertEqual(response.json()['order']['items_count'], 1)
+        self.assertEqual(seller.get(f'/api/orders/{cancelled}').status_code, 200)
+        self.assertEqual(self.client_for(self.customers[1]).get(f'/api/orders/{delivered}').status_code, 403)
+
+        self.assertEqual(customer.get('/api/orders/my-orders').json()['count'], 2)
+        self.assertEqual(customer.get('/api/orders/statistics').json()['statistics']['total_orders'], 4)
+        # Rollups still add up with half the orders archived
+        self.assertEqual(rollups.rebuild(dry_run=True), (2, 0))
+
+
+class OrderQuoteTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixture()
+
+    def test_quote_matches_checkout_and_follows_price_changes(self):
+        customer = self.client_for(self.customers[0])
+        cart = {'cart_items': [{'product_id': self.product.id, 'quantity': 2}]}
+
+        first = customer.post('/api/orders/quote', cart, format='json')
+        self.assertEqual((first.status_code, first['X-Cache']), (200, 'MISS'))
+        self.assertEqual(customer.post('/api/orders/quote', cart, format='json')['X-Cache'], 'HIT')
+
+        quote = first.json()['quote']
+        order = self.place_order(customer).json()['order']
+        for field in ('subtotal', 'cod_fee', 'discount_amount', 'total_amount', 'items_count'):
+            self.assertEqual(quote[field], order[field])
+        self.assertNotIn('commission_amount', quote)
+        self.assertNotIn('base_price', quote['items'][0])
+
+        # A product write retires the entry
+        self.product.refresh_from_db()
+        self.product.base_price = Decimal('200')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        repriced = customer.post('/api/orders/quote', cart, format='json')
+        self.assertEqual(repriced['X-Cache'], 'MISS')
+        self.assertEqual(repriced.json()['quote']['subtotal'], '460.00')
+
+        seller_quote = self.client_for(self.seller).post('/api/orders/quote', cart, format='json').json()['quote']
+        self.assertEqual((seller_quote['commission_amount'], seller_quote['seller_payout_amount']), ('60.00', '400.00'))
+
+        too_many = {'cart_items': [{'product_id': self.product.id, 'quantity': 100}]}
+        response = customer.post('/api/orders/quote', too_many, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Shirt: Only 28 items in stock', response.json()['errors']['cart_items'])
+        self.assertEqual(OrderItem.objects.count(), 1)
+
+
+class StockInvalidationTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixture()
+        self.tags = [CATALOG_TAG, product_tag(self.product.id)]
+
+    def test_stock_changes_keep_catalog_lists_cached(self):
+        customer = self.client_for(self.customers[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            number = self.place_order(customer).json()['order']['order_number']
+        placed = get_tag_versions(self.tags)
+        self.assertEqual(placed[CATALOG_TAG], 0)
+        self.assertNotEqual(placed[product_tag(self.product.id)], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            customer.post(f'/api/orders/{number}/cancel', {}, format='json')
+        cancelled = get_tag_versions(self.tags)
+        self.assertEqual(cancelled[CATALOG_TAG], 0)
+        self.assertNotEqual(cancelled[product_tag(self.product.id)], placed[product_tag(self.product.id)])
+
+
+class VariantSelectionTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.create_fixture()
+        self.product.sizes = [30, 32]
+        self.product.colors = [' Indigo ']
+        self.product.save()
+
+    def order(self, **variant):
+        return self.client_for(self.customers[0]).post('/api/orders/create', {
+            'cart_items': [{'product_id': self.product.id, 'quantity': 1, **variant}],
+            'delivery_name': 'Customer',
+            'delivery_phone': '9999999999',
+            'delivery_address': '-',
+            'delivery_city': 'Amravati',
+            'delivery_pincode': '444601',
+        }, format='json')
+
+    def test_values_are_compared_as_listed(self):
+        # Clients echo values back from product.sizes, numbers included
+        self.assertEqual(self.order(size=30, color='Indigo').status_code, 201)
+        self.assertEqual(self.order(size='32 ', color=' Indigo').status_code, 201)
+        self.assertEqual(
+            list(OrderItem.objects.order_by('id').values_list('selected_size', 'selected_color')),
+            [('30', 'Indigo'), ('32', 'Indigo')]
+        )
+
+        response = self.order(size=34, color='Indigo')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors']['cart_items'], ['Shirt: Invalid size'])
+
+
+class OrderListQueryCountTests(ShopFixtureMixin, TestCase):
+    """Order lists cost the same number of queries however many orders they show"""
+
+    def setUp(self):
+        self.create_fixture()
+        # Loaded once here so the reverse one-to-one isn't counted per request
+        self.seller.shop
+
+    def assert_queries(self, client, url, expected):
+        for _ in range(2):
+            with self.assertNumQueries(expected):
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            # Second round with more orders on the page
+            for _ in range(4):
+                self.place_order(self.client_for(self.customers[0]))
+
+    def test_my_orders(self):
+        customer = self.client_for(self.customers[0])
+        self.place_order(customer)
+        # COUNT, orders (counts annotated), items with their products
+        self.assert_queries(customer, '/api/orders/my-orders', 3)
+
+    def test_my_orders_summary(self):
+        customer = self.client_for(self.customers[0])
+        self.place_order(customer)
+        self.assert_queries(customer, '/api/orders/my-orders?summary=true', 2)
+        self.assert_queries(self.client_for(self.seller), '/api/orders/my-orders?summary=true&cursor=', 1)
+
+    def test_seller_dashboard(self):
+        self.place_order(self.client_for(self.customers[0]))
+        # Three product counts, the rollup totals, recent orders and their items
+        self.assert_queries(self.client_for(self.seller), '/api/shops/dashboard', 6)
+
+
+class ConcurrentCancellationTests(ShopFixtureMixin, TransactionTestCase):
+    """Cancellations race each other and new checkouts on one product"""
+
+    concurrent_connections = True
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('in-memory SQLite locks whole tables across connections')
+        self.create_fixture()
+
+    def run_threads(self, jobs):
+        errors = []
+        barrier = threading.Barrier(len(jobs))
+
+        def worker(job):
+            try:
+                barrier.wait()
+                job()
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(job,)) for job in jobs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_stock_is_restored_exactly_once(self):
+        orders = []
+        for customer in self.customers:
+            response = self.place_order(self.client_for(customer))
+            self.assertEqual(response.status_code, 201)
+            orders.append((customer, response.json()['order']['order_number']))
+
+        cancel_statuses = []
+
+        def customer_cancel(customer, number):
+            response = self.client_for(customer).post(f'/api/orders/{number}/cancel', {}, format='json')
+            cancel_statuses.append(response.status_code)
+
+        def seller_cancel(number):
+            response = self.client_for(self.seller).patch(
+                f'/api/orders/{number}/status', {'new_status': 'cancelled'}, format='json'
+            )
+            cancel_statuses.append(response.status_code)
+
+        def checkout(customer):
+            for _ in range(3):
+                self.assertIn(self.place_order(self.client_for(customer)).status_code, (201, 400, 409))
+
+        jobs = []
+        for customer, number in orders:
+            # Each order is cancelled twice at once, by its customer and the seller
+            jobs.append(lambda customer=customer, number=number: customer_cancel(customer, number))
+            jobs.append(lambda number=number: seller_cancel(number))
+            jobs.append(lambda customer=customer: checkout(customer))
+        self.run_threads(jobs)
+
+        self.assertEqual(sorted(cancel_statuses), [200] * len(orders) + [400] * len(orders))
+        self.assertEqual(
+            Order.objects.filter(order_number__in=[number for _, number in orders], order_status='cancelled').count(),
+            len(orders)
+        )
+
+        self.product.refresh_from_db()
+        held = OrderItem.objects.filter(
+            product=self.product
+        ).exclude(order__order_status='cancelled').aggregate(total=Sum('quantity'))['total'] or 0
+        self.assertGreaterEqual(self.product.stock_quantity, 0)
+        self.assertEqual(self.product.stock_quantity + held, self.stock)
+
+
+class IdempotentCheckoutTests(ShopFixtureMixin, TransactionTestCase):
+    """Retries of one checkout, concurrent or not, place one order"""
+
+    concurrent_connections = True
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('in-memory SQLite locks whole tables across connections')
+        self.create_fixture()
+
+    def test_concurrent_retries_place_one_order(self):
+        customer = self.customers[0]
+        responses = []
+        barrier = threading.Barrier(4)
+
+        def retry():
+            try:
+                client = self.client_for(customer)
+                client.credentials(HTTP_IDEMPOTENCY_KEY='checkout-1')
+                barrier.wait()
+                responses.append(self.place_order(client))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=retry) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([response.status_code for response in responses], [201] * 4)
+        self.assertEqual(len({response.json()['order']['order_number'] for response in responses}), 1)
+        self.assertEqual(sum(response.get('Idempotent-Replayed') == 'true' for response in responses), 3)
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, self.stock - 2)
+
+        # Same key, different request
+        client = self.client_for(customer)
+        client.credentials(HTTP_IDEMPOTENCY_KEY='checkout-1')
+        response = client.post('/api/orders/create', {'cart_items': []}, format='json')
+        self.assertEqual(response.status_code, 422)
@@ -3,8 +3,11 @@ from . import views
 
 urlpatterns = [
     path('create', views.create_order, name='create-order'),
+    path('quote', views.quote_order, name='quote-order'),
     path('my-orders', views.my_orders, name='my-orders'),
     path('statistics', views.order_statistics, name='order-statistics'),  # Add before detail route
+    path('bulk-status', views.bulk_update_order_status, name='bulk-update-order-status'),
+    path('revenue', views.revenue_series, name='revenue-series'),
     path('<str:order_number>', views.get_order_detail, name='order-detail'),
     path('<str:order_number>/status', views.update_order_status, name='update-order-status'),  # Add
     path('<str:order_number>/cancel', views.cancel_order, name='cancel-order'),  # Add
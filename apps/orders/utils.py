@@ -1,5 +1,126 @@
+from collections import defaultdict
 from decimal import Decimal
-from apps.products.models import Product
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+from apps.products.invalidation import invalidate_stock
+from apps.products.models import Product, ProductImage
+from apps.products.variants import normalize_value
+from .models import OrderItem
+
+STOCK_RESERVE_ATTEMPTS = 3
+
+
+class InsufficientStock(Exception):
+    """A guarded stock decrement lost: someone else bought the last units first"""
+
+    def __init__(self, product, available):
+        self.product = product
+        self.available = available
+        super().__init__(f"{product.name}: Only {available} items in stock")
+
+
+class _Shortfall(Exception):
+    pass
+
+
+class StockManager:
+    """
+    Stock changes as guarded UPDATEs instead of read-modify-save.
+
+    ``SET stock_quantity = stock_quantity - n WHERE stock_quantity >= n``
+    either takes the units or matches no row, so concurrent checkouts can't
+    oversell, and row locks only live until the surrounding transaction
+    commits.
+    """
+
+    @staticmethod
+    def reserve(items):
+        """
+        Take stock for [{'product': Product, 'quantity': n}, ...] (lines for the
+        same product are added up) with a single UPDATE, whatever the cart
+        size. Must run inside transaction.atomic().
+
+        Raises InsufficientStock for the first product (by id) that can't be
+        covered; nothing is taken in that case.
+        """
+        quantities = defaultdict(int)
+        products = {}
+        for item in items:
+            product = item['product']
+            quantities[product.id] += item['quantity']
+            products[product.id] = product
+
+        guard = Q()
+        for product_id, quantity in quantities.items():
+            guard |= Q(id=product_id, stock_quantity__gte=quantity)
+        taken_units = Case(
+            *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+            output_field=IntegerField()
+        )
+
+        for attempt in range(STOCK_RESERVE_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    taken = Product.objects.filter(guard).update(
+                        stock_quantity=F('stock_quantity') - taken_units,
+                        updated_at=timezone.now()
+                    )
+                    if taken != len(quantities):
+                        # Roll back the rows that did have enough stock
+                        raise _Shortfall
+                break
+            except _Shortfall:
+                stock = dict(Product.objects.filter(id__in=quantities).values_list('id', 'stock_quantity'))
+                short = [product_id for product_id in sorted(quantities)
+                         if stock.get(product_id, 0) < quantities[product_id]]
+                # Nothing short any more means stock came back in between: try again
+                if short or attempt == STOCK_RESERVE_ATTEMPTS - 1:
+                    product_id = short[0] if short else min(quantities)
+                    raise InsufficientStock(products[product_id], stock.get(product_id, 0))
+
+        for product_id, quantity in quantities.items():
+            products[product_id].stock_quantity -= quantity
+
+        # update() sends no signals; product detail shows stock
+        invalidate_stock(list(quantities))
+
+    @staticmethod
+    def restore(order_ids):
+        """
+        Put back the stock held by the given orders' items (lines for the same
+        product are added up) with a single ``stock_quantity + n`` UPDATE.
+        Call it in the transaction that cancels the orders. Returns
+        {product_id: units restored}; deleted products are skipped.
+        """
+        quantities = dict(
+            OrderItem.objects.filter(order_id__in=order_ids, product__isnull=False)
+            .values('product_id').annotate(total=Sum('quantity')).order_by('product_id')
+            .values_list('product_id', 'total')
+        )
+        if not quantities:
+            return quantities
+
+        Product.objects.filter(id__in=quantities).update(
+            stock_quantity=F('stock_quantity') + Case(
+                *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+                output_field=IntegerField()
+            ),
+            updated_at=timezone.now()
+        )
+        invalidate_stock(list(quantities))
+        return quantities
+
+
+def first_image_urls(product_ids):
+    """{product_id: URL of its first image} in one query, like product.images.first()"""
+    urls = {}
+    rows = ProductImage.objects.filter(product_id__in=set(product_ids)).order_by(
+        'product_id', 'display_order', 'id'
+    ).values_list('product_id', 'image_url')
+    for product_id, image_url in rows:
+        urls.setdefault(product_id, image_url)
+    return urls
 
 
 class OrderCalculator:
@@ -8,12 +129,28 @@ class OrderCalculator:
     COD_FEE = Decimal('50.00')
 
     @staticmethod
-    def validate_cart_items(cart_items):
+    def load_cart_products(cart_items):
+        """
+        {product_id: Product} for every orderable product the cart refers to,
+        in one IN query (plus one for the variant attributes)
+        """
+        product_ids = {Product._meta.pk.to_python(item['product_id']) for item in cart_items}
+        products = Product.objects.select_related('shop').prefetch_related('attributes').filter(
+            id__in=product_ids,
+            is_active=True,
+            shop__is_approved=True
+        )
+        return {product.id: product for product in products}
+
+    @staticmethod
+    def validate_cart_items(cart_items, products=None):
         """
         Validate cart items before order creation
 
         Args:
             cart_items: List of dicts with {product_id, quantity, size, color}
+            products: Optional {product_id: Product} already loaded with
+                load_cart_products; loaded here otherwise
 
         Returns:
             (is_valid, errors, validated_items)
@@ -24,60 +161,61 @@ class OrderCalculator:
         if not cart_items:
             return False, ['Cart is empty'], []
 
+        if products is None:
+            products = OrderCalculator.load_cart_products(cart_items)
+
         # Check all products from same shop
         shop_ids = set()
 
         for idx, item in enumerate(cart_items):
-            try:
-                product = Product.objects.select_related('shop').get(
-                    id=item['product_id'],
-                    is_active=True,
-                    shop__is_approved=True
-                )
-
-                # Collect shop IDs
-                shop_ids.add(product.shop.id)
-
-                # Validate quantity
-                quantity = int(item.get('quantity', 1))
-                if quantity <= 0:
-                    errors.append(f"{product.name}: Quantity must be at least 1")
-                    continue
-
-                if quantity > product.stock_quantity:
-                    errors.append(f"{product.name}: Only {product.stock_quantity} items in stock")
-                    continue
-
-                # Validate size if product has sizes
-                selected_size = item.get('size', '')
-                if product.sizes and not selected_size:
-                    errors.append(f"{product.name}: Please select a size")
-                    continue
-
-                if selected_size and selected_size not in product.sizes:
-                    errors.append(f"{product.name}: Invalid size")
-                    continue
-
-                # Validate color if product has colors
-                selected_color = item.get('color', '')
-                if product.colors and not selected_color:
-                    errors.append(f"{product.name}: Please select a color")
-                    continue
-
-                if selected_color and selected_color not in product.colors:
-                    errors.append(f"{product.name}: Invalid color")
-                    continue
-
-                # Add validated item
-                validated_items.append({
-                    'product': product,
-                    'quantity': quantity,
-                    'size': selected_size,
-                    'color': selected_color
-                })
-
-            except Product.DoesNotExist:
+            product = products.get(Product._meta.pk.to_python(item['product_id']))
+            if product is None:
                 errors.append(f"Product ID {item.get('product_id')} not found or unavailable")
+                continue
+
+            # Collect shop IDs
+            shop_ids.add(product.shop.id)
+
+            # Validate quantity
+            quantity = int(item.get('quantity', 1))
+            if quantity <= 0:
+                errors.append(f"{product.name}: Quantity must be at least 1")
+                continue
+
+            if quantity > product.stock_quantity:
+                errors.append(f"{product.name}: Only {product.stock_quantity} items in stock")
+                continue
+
+            # Validate size if product has sizes
+            sizes = product.attribute_values('size')
+            # As stored in the attributes table: a size listed as 30 matches "30"
+            selected_size = normalize_value(item.get('size') or '')
+            if sizes and not selected_size:
+                errors.append(f"{product.name}: Please select a size")
+                continue
+
+            if selected_size and selected_size not in sizes:
+                errors.append(f"{product.name}: Invalid size")
+                continue
+
+            # Validate color if product has colors
+            colors = product.attribute_values('color')
+            selected_color = normalize_value(item.get('color') or '')
+            if colors and not selected_color:
+                errors.append(f"{product.name}: Please select a color")
+                continue
+
+            if selected_color and selected_color not in colors:
+                errors.append(f"{product.name}: Invalid color")
+                continue
+
+            # Add validated item
+            validated_items.append({
+                'product': product,
+                'quantity': quantity,
+                'size': selected_size,
+                'color': selected_color
+            })
 
         # Check if all items from same shop (MVP limitation)
         if len(shop_ids) > 1:
@@ -1,20 +1,40 @@
+import copy
+
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import Q
-from .models import Order
-from .serializers import OrderCreateSerializer, OrderSerializer
+from django.db.models import Case, F, Q, Value, When
+from . import rollups
+from .models import ArchivedOrder, Order
+from .quotes import quote_cart
+from .serializers import (
+    ArchivedOrderSerializer, OrderCreateSerializer, OrderQuoteRequestSerializer, OrderSerializer,
+    OrderSummarySerializer, cod_payment_info, hide_seller_amounts
+)
+from .statistics import MAX_SERIES_DAYS, cached_shop_statistics, customer_statistics, daily_revenue
+from .utils import InsufficientStock, StockManager
+from apps.core.pagination import KeysetPagination
+from apps.core.idempotency import idempotent
 
 
 class OrderPagination(PageNumberPagination):
     page_size = 20
 
 
+class OrderCursorPagination(KeysetPagination):
+    page_size = 20
+
+
+BULK_STATUS_MAX_ORDERS = 200
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent('orders:create')
 def create_order(request):
     """
     Create new order (Customer only)
@@ -49,19 +69,21 @@ def create_order(request):
     serializer = OrderCreateSerializer(data=request.data, context={'request': request})
 
     if serializer.is_valid():
-        order = serializer.save()
+        try:
+            order = serializer.save()
+        except InsufficientStock as exc:
+            # Stock ran out between validation and checkout
+            return Response({
+                'success': False,
+                'errors': {'cart_items': [str(exc)]}
+            }, status=status.HTTP_409_CONFLICT)
         order_serializer = OrderSerializer(order, context={'request': request})
 
         return Response({
             'success': True,
             'message': 'Order placed successfully',
             'order': order_serializer.data,
-            'payment_info': {
-                'method': 'Cash on Delivery',
-                'amount_to_pay': f"₹{order.total_amount}",
-                'cod_fee_included': f"₹{order.cod_fee}",
-                'note': 'Pay cash when you receive your order'
-            }
+            'payment_info': cod_payment_info(order.total_amount, order.cod_fee)
         }, status=status.HTTP_201_CREATED)
 
     return Response({
@@ -70,6 +92,45 @@ def create_order(request):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def quote_order(request):
+    """
+    Price a cart the way create_order would, without placing anything
+    POST /api/orders/quote
+
+    Body: {"cart_items": [...]}, as for create_order. Cached briefly per
+    cart (X-Cache: HIT|MISS), see quotes.py.
+    """
+
+    serializer = OrderQuoteRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    result, cached = quote_cart(serializer.validated_data['cart_items'])
+    if result['valid']:
+        quote = copy.deepcopy(result['quote'])
+        if request.user.user_type == 'customer':
+            hide_seller_amounts(quote)
+        response = Response({
+            'success': True,
+            'quote': quote,
+            'payment_info': cod_payment_info(quote['total_amount'], quote['cod_fee'])
+        }, status=status.HTTP_200_OK)
+    else:
+        # Same shape as create_order's validation errors
+        response = Response({
+            'success': False,
+            'errors': {'cart_items': result['errors']}
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    response['X-Cache'] = 'HIT' if cached else 'MISS'
+    return response
+
+
 # Add before my_orders view
 
 @api_view(['GET'])
@@ -79,7 +140,7 @@ def order_statistics(request):
     Get order statistics
     GET /api/orders/statistics
 
-    For sellers: their shop's stats
+    For sellers: their shop's stats (cached for a few seconds)
     For customers: their order stats
     """
 
@@ -92,41 +153,7 @@ def order_statistics(request):
                 'message': 'No shop registered'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        orders = Order.objects.filter(shop=user.shop)
-
-        # Calculate statistics
-        from django.db.models import Sum, Count, Q
-        from datetime import datetime, timedelta
-
-        today = datetime.now().date()
-        this_month = datetime.now().replace(day=1).date()
-
-        stats = {
-            'total_orders': orders.count(),
-            'pending_orders': orders.filter(order_status__in=['placed', 'confirmed', 'shipped']).count(),
-            'completed_orders': orders.filter(order_status='delivered').count(),
-            'cancelled_orders': orders.filter(order_status='cancelled').count(),
-
-            'today_orders': orders.filter(placed_at__date=today).count(),
-            'today_revenue': orders.filter(
-                placed_at__date=today,
-                order_status='delivered'
-            ).aggregate(Sum('seller_payout_amount'))['seller_payout_amount__sum'] or 0,
-
-            'month_orders': orders.filter(placed_at__date__gte=this_month).count(),
-            'month_revenue': orders.filter(
-                placed_at__date__gte=this_month,
-                order_status='delivered'
-            ).aggregate(Sum('seller_payout_amount'))['seller_payout_amount__sum'] or 0,
-
-            'total_earnings': orders.filter(
-                order_status='delivered'
-            ).aggregate(Sum('seller_payout_amount'))['seller_payout_amount__sum'] or 0,
-
-            'pending_earnings': orders.filter(
-                order_status__in=['confirmed', 'shipped']
-            ).aggregate(Sum('seller_payout_amount'))['seller_payout_amount__sum'] or 0,
-        }
+        stats = cached_shop_statistics(user.shop.id)
 
         return Response({
             'success': True,
@@ -134,14 +161,7 @@ def order_statistics(request):
         }, status=status.HTTP_200_OK)
 
     elif user.user_type == 'customer':
-        orders = Order.objects.filter(customer=user)
-
-        stats = {
-            'total_orders': orders.count(),
-            'active_orders': orders.filter(order_status__in=['placed', 'confirmed', 'shipped']).count(),
-            'completed_orders': orders.filter(order_status='delivered').count(),
-            'cancelled_orders': orders.filter(order_status='cancelled').count(),
-        }
+        stats = customer_statistics(user.id)
 
         return Response({
             'success': True,
@@ -153,12 +173,56 @@ def order_statistics(request):
         'message': 'Invalid user type'
     }, status=status.HTTP_403_FORBIDDEN)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def revenue_series(request):
+    """
+    Daily sales for the seller's shop
+    GET /api/orders/revenue?days=30
+
+    One entry per day (oldest first, today included) by the day orders
+    were placed; revenue is the seller payout of delivered orders.
+    """
+
+    user = request.user
+
+    if user.user_type != 'seller':
+        return Response({
+            'success': False,
+            'message': 'Only sellers can view revenue'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    if not hasattr(user, 'shop'):
+        return Response({
+            'success': False,
+            'message': 'No shop registered'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        days = int(request.GET.get('days', 30))
+    except ValueError:
+        days = 0
+    if not 1 <= days <= MAX_SERIES_DAYS:
+        return Response({
+            'success': False,
+            'message': f'days must be between 1 and {MAX_SERIES_DAYS}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'success': True,
+        'days': days,
+        'series': daily_revenue(user.shop.id, days)
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_orders(request):
     """
     Get user's orders
     GET /api/orders/my-orders?status=placed&page=1
+    GET /api/orders/my-orders?status=placed&cursor=  (keyset pagination, add with_count=true for totals)
+    GET /api/orders/my-orders?summary=true  (order headers with item count and first item thumbnail)
 
     For customers: their orders
     For sellers: orders for their shop
@@ -187,14 +251,22 @@ def my_orders(request):
     if order_status:
         orders = orders.filter(order_status=order_status)
 
+    if request.GET.get('summary', '').lower() in ('true', '1'):
+        serializer_class = OrderSummarySerializer
+    else:
+        serializer_class = OrderSerializer
+
     # Sort by newest first
-    orders = orders.select_related('customer', 'shop').prefetch_related('items').order_by('-placed_at')
+    orders = serializer_class.prepare_queryset(orders).order_by('-placed_at')
 
     # Pagination
-    paginator = OrderPagination()
+    if OrderCursorPagination.is_requested(request):
+        paginator = OrderCursorPagination()
+    else:
+        paginator = OrderPagination()
     paginated_orders = paginator.paginate_queryset(orders, request)
 
-    serializer = OrderSerializer(paginated_orders, many=True, context={'request': request})
+    serializer = serializer_class(paginated_orders, many=True, context={'request': request})
 
     return paginator.get_paginated_response({
         'success': True,
@@ -202,18 +274,32 @@ def my_orders(request):
     })
 
 
+def _find_order(order_number):
+    """
+    (order, serializer class) by order number, live orders first, then the
+    archive (see archive.py). Raises Order.DoesNotExist.
+    """
+    for model, serializer_class in ((Order, OrderSerializer), (ArchivedOrder, ArchivedOrderSerializer)):
+        order = model.objects.select_related('customer', 'shop').prefetch_related('items__product').filter(
+            order_number=order_number
+        ).first()
+        if order is not None:
+            return order, serializer_class
+    raise Order.DoesNotExist
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_order_detail(request, order_number):
     """
     Get order details
     GET /api/orders/{order_number}
+
+    Archived orders are found too, with "archived": true (read-only)
     """
 
     try:
-        order = Order.objects.select_related('customer', 'shop').prefetch_related('items__product').get(
-            order_number=order_number
-        )
+        order, serializer_class = _find_order(order_number)
 
         # Check permission
         if request.user.user_type == 'customer' and order.customer != request.user:
@@ -229,12 +315,13 @@ def get_order_detail(request, order_number):
                     'message': 'You don\'t have permission to view this order'
                 }, status=status.HTTP_403_FORBIDDEN)
 
-        serializer = OrderSerializer(order, context={'request': request})
+        serializer = serializer_class(order, context={'request': request})
 
         # Add extra info for sellers
         response_data = {
             'success': True,
-            'order': serializer.data
+            'order': serializer.data,
+            'archived': serializer_class is ArchivedOrderSerializer
         }
 
         if request.user.user_type == 'seller':
@@ -254,6 +341,26 @@ def get_order_detail(request, order_number):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+def _save_status_change(order, from_status, fields):
+    """
+    Write order.order_status (plus ``fields``) only if the row is still in
+    ``from_status``, so of two concurrent requests only one moves the order.
+    A cancellation restores stock, and the shop's sales rollup is updated,
+    in the same transaction. Returns False if another request changed the
+    status first.
+    """
+    with transaction.atomic():
+        changed = Order.objects.filter(pk=order.pk, order_status=from_status).update(
+            order_status=order.order_status,
+            **{field: getattr(order, field) for field in fields}
+        )
+        if changed:
+            if order.order_status == 'cancelled':
+                StockManager.restore([order.pk])
+            rollups.record_transitions([(order, from_status)], order.order_status)
+    return bool(changed)
+
+
 @api_view(['PATCH'])
 @permission_classes([IsAuthenticated])
 def update_order_status(request, order_number):
@@ -301,15 +408,7 @@ def update_order_status(request, order_number):
     # Validate status transitions
     current_status = order.order_status
 
-    valid_transitions = {
-        'placed': ['confirmed', 'cancelled'],
-        'confirmed': ['shipped', 'cancelled'],
-        'shipped': ['delivered'],
-        'delivered': [],
-        'cancelled': []
-    }
-
-    if new_status not in valid_transitions.get(current_status, []):
+    if new_status not in Order.STATUS_TRANSITIONS.get(current_status, []):
         return Response({
             'success': False,
             'message': f'Cannot change status from {current_status} to {new_status}'
@@ -317,6 +416,7 @@ def update_order_status(request, order_number):
 
     # Update status with timestamp
     order.order_status = new_status
+    order_fields = [Order.STATUS_TIMESTAMPS[new_status]]
 
     if new_status == 'confirmed':
         order.confirmed_at = timezone.now()
@@ -327,17 +427,18 @@ def update_order_status(request, order_number):
         # Mark COD as collected when delivered
         if order.payment_method == 'cod':
             order.payment_status = 'cod_collected'
+            order_fields.append('payment_status')
     elif new_status == 'cancelled':
         order.cancelled_at = timezone.now()
         order.cancellation_reason = request.data.get('reason', 'Cancelled by seller')
+        order_fields.append('cancellation_reason')
 
-        # Restore stock for cancelled orders
-        for item in order.items.all():
-            if item.product:
-                item.product.stock_quantity += item.quantity
-                item.product.save(update_fields=['stock_quantity'])
-
-    order.save()
+    if not _save_status_change(order, current_status, order_fields):
+        order.refresh_from_db(fields=['order_status'])
+        return Response({
+            'success': False,
+            'message': f'Cannot change status from {order.order_status} to {new_status}'
+        }, status=status.HTTP_400_BAD_REQUEST)
 
     serializer = OrderSerializer(order, context={'request': request})
 
@@ -368,6 +469,119 @@ def update_order_status(request, order_number):
     return Response(response_data, status=status.HTTP_200_OK)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_update_order_status(request):
+    """
+    Move many orders to one status (Seller only)
+    POST /api/orders/bulk-status
+
+    Body:
+    {
+        "order_numbers": ["ORD20250115001", "ORD20250115002"],
+        "new_status": "confirmed" | "shipped" | "delivered" | "cancelled",
+        "reason": "Out of stock"  (cancellations only, optional)
+    }
+
+    Same transitions as the single-order endpoint. Orders that can't move
+    are reported and skipped; the rest are updated together in one
+    transaction with a handful of queries, however many orders there are.
+    """
+
+    if request.user.user_type != 'seller':
+        return Response({
+            'success': False,
+            'message': 'Only sellers can update order status'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    if not hasattr(request.user, 'shop'):
+        return Response({
+            'success': False,
+            'message': 'No shop registered'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    new_status = request.data.get('new_status')
+    order_numbers = request.data.get('order_numbers')
+
+    if new_status not in Order.STATUS_TIMESTAMPS:
+        return Response({
+            'success': False,
+            'message': f"new_status must be one of: {', '.join(Order.STATUS_TIMESTAMPS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if (not isinstance(order_numbers, list) or not order_numbers
+            or not all(isinstance(number, str) for number in order_numbers)):
+        return Response({
+            'success': False,
+            'message': 'order_numbers must be a non-empty list of order numbers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    order_numbers = list(dict.fromkeys(order_numbers))
+    if len(order_numbers) > BULK_STATUS_MAX_ORDERS:
+        return Response({
+            'success': False,
+            'message': f'At most {BULK_STATUS_MAX_ORDERS} orders per request'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    from_statuses = [current for current, targets in Order.STATUS_TRANSITIONS.items() if new_status in targets]
+    now = timezone.now()
+
+    changes = {
+        'order_status': new_status,
+        Order.STATUS_TIMESTAMPS[new_status]: now,
+    }
+    if new_status == 'delivered':
+        # Mark COD as collected when delivered
+        changes['payment_status'] = Case(
+            When(payment_method='cod', then=Value('cod_collected')),
+            default=F('payment_status')
+        )
+    elif new_status == 'cancelled':
+        changes['cancellation_reason'] = request.data.get('reason', 'Cancelled by seller')
+
+    with transaction.atomic():
+        current = {
+            order.order_number: order
+            for order in Order.objects.select_for_update().filter(
+                shop=request.user.shop,
+                order_number__in=order_numbers
+            ).only('id', 'order_number', 'order_status', 'shop_id', 'placed_at',
+                   'seller_payout_amount', 'commission_amount')
+        }
+        movable = [order for order in current.values() if order.order_status in from_statuses]
+
+        if movable:
+            movable_ids = [order.id for order in movable]
+            Order.objects.filter(id__in=movable_ids, order_status__in=from_statuses).update(**changes)
+            if new_status == 'cancelled':
+                StockManager.restore(movable_ids)
+            rollups.record_transitions([(order, order.order_status) for order in movable], new_status)
+
+    results = []
+    for number in order_numbers:
+        if number not in current:
+            results.append({
+                'order_number': number,
+                'success': False,
+                'message': 'Order not found or you don\'t have permission'
+            })
+        elif current[number].order_status not in from_statuses:
+            results.append({
+                'order_number': number,
+                'success': False,
+                'message': f'Cannot change status from {current[number].order_status} to {new_status}'
+            })
+        else:
+            results.append({'order_number': number, 'success': True, 'order_status': new_status})
+
+    return Response({
+        'success': True,
+        'message': f'{len(movable)} of {len(order_numbers)} orders updated',
+        'updated': len(movable),
+        'results': results
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def cancel_order(request, order_number):
@@ -398,17 +612,17 @@ def cancel_order(request, order_number):
                 'message': f'Cannot cancel order with status: {order.order_status}'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Cancel order
+        # Cancel order (and restore stock)
         order.order_status = 'cancelled'
         order.cancelled_at = timezone.now()
         order.cancellation_reason = request.data.get('reason', 'Cancelled by customer')
-        order.save()
 
-        # Restore stock
-        for item in order.items.all():
-            if item.product:
-                item.product.stock_quantity += item.quantity
-                item.product.save(update_fields=['stock_quantity'])
+        if not _save_status_change(order, 'placed', ['cancelled_at', 'cancellation_reason']):
+            order.refresh_from_db(fields=['order_status'])
+            return Response({
+                'success': False,
+                'message': f'Cannot cancel order with status: {order.order_status}'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({
             'success': True,
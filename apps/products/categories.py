@@ -0,0 +1,36 @@
+"""
+Category tree snapshot.
+
+The whole active tree is read in one query, nested in memory and cached
+until a Category write bumps the ``categories`` cache tag, so
+list_categories normally costs no queries at all.
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from apps.core.cache import get_tag_versions
+from .invalidation import CATEGORIES_TAG
+from .models import Category
+
+CATEGORY_TREE_KEY = 'catalog:category-tree'
+
+
+def build_category_tree():
+    """Nested list of active categories, ordered like Category.Meta.ordering"""
+    from .serializers import CategorySerializer
+
+    children = defaultdict(list)
+    for category in Category.objects.filter(is_active=True):
+        children[category.parent_id].append(category)
+
+    return CategorySerializer(children[None], many=True, context={'children': children}).data
+
+
+def get_category_tree():
+    version = get_tag_versions([CATEGORIES_TAG])[CATEGORIES_TAG]
+    snapshot = cache.get(CATEGORY_TREE_KEY)
+    if snapshot is None or snapshot['version'] != version:
+        snapshot = {'version': version, 'tree': build_category_tree()}
+        cache.set(CATEGORY_TREE_KEY, snapshot, timeout=None)
+    return snapshot['tree']
@@ -0,0 +1,136 @@
+"""
+Facet counts for the catalog filter sidebar.
+
+Every facet is a single GROUP BY (or conditional aggregate) over the
+filtered product set, so the number of queries is fixed no matter how many
+categories, sizes or colors exist. Results are cached per normalized filter
+combination and retired with the ``catalog`` cache tag, which every product,
+category and shop write bumps.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from apps.core.cache import get_tag_versions
+from .filters import FILTER_PARAMS, catalog_products, filter_products
+from .invalidation import CATALOG_TAG
+from .models import ProductAttribute
+from .search import tokenize
+from .variants import parse_values
+
+FACETS_CACHE_TIMEOUT = 300
+
+# (min, max) on display_price, max exclusive; None = unbounded
+PRICE_BUCKETS = (
+    (None, Decimal('500')),
+    (Decimal('500'), Decimal('1000')),
+    (Decimal('1000'), Decimal('2000')),
+    (Decimal('2000'), Decimal('5000')),
+    (Decimal('5000'), None),
+)
+
+
+def normalize_params(params):
+    """Canonical form of the filter params so equivalent requests share a cache entry"""
+    normalized = {}
+    for name in FILTER_PARAMS:
+        value = (params.get(name) or '').strip()
+        if not value:
+            continue
+        if name in ('sizes', 'colors'):
+            value = ','.join(sorted(set(parse_values(value))))
+        elif name == 'search':
+            value = ' '.join(tokenize(value)) or value
+        normalized[name] = value
+    return normalized
+
+
+def cache_key(normalized):
+    digest = hashlib.md5(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    version = get_tag_versions([CATALOG_TAG])[CATALOG_TAG]
+    return f'catalog:facets:{version}:{digest}'
+
+
+def _bucket_label(low, high):
+    if low is None:
+        return f'Under ₹{high}'
+    if high is None:
+        return f'₹{low} & above'
+    return f'₹{low} - ₹{high}'
+
+
+def compute_facets(params):
+    products = filter_products(catalog_products(), params)
+    product_ids = products.values('id')
+
+    # Totals and price buckets: one conditional-aggregate pass
+    bucket_filters = {}
+    for index, (low, high) in enumerate(PRICE_BUCKETS):
+        condition = Q()
+        if low is not None:
+            condition &= Q(display_price__gte=low)
+        if high is not None:
+            condition &= Q(display_price__lt=high)
+        bucket_filters[f'bucket_{index}'] = Count('id', filter=condition)
+
+    totals = products.order_by().aggregate(total=Count('id'), **bucket_filters)
+
+    categories = (
+        products.order_by()
+        .filter(category__isnull=False)
+        .values('category_id', 'category__name')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'category__name')
+    )
+
+    brands = (
+        products.order_by()
+        .exclude(brand='')
+        .values('brand')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'brand')
+    )
+
+    # Sizes and colors together from the variant table
+    variants = {'size': [], 'color': []}
+    for row in (
+        ProductAttribute.objects
+        .filter(product_id__in=product_ids)
+        .values('kind', 'value')
+        .annotate(count=Count('product_id'))
+        .order_by('kind', '-count', 'value')
+    ):
+        variants[row['kind']].append({'value': row['value'], 'count': row['count']})
+
+    return {
+        'total': totals['total'],
+        'categories': [
+            {'id': row['category_id'], 'name': row['category__name'], 'count': row['count']}
+            for row in categories
+        ],
+        'sizes': variants['size'],
+        'colors': variants['color'],
+        'brands': [{'value': row['brand'], 'count': row['count']} for row in brands],
+        'price_ranges': [
+            {
+                'min': str(low) if low is not None else None,
+                'max': str(high) if high is not None else None,
+                'label': _bucket_label(low, high),
+                'count': totals[f'bucket_{index}'],
+            }
+            for index, (low, high) in enumerate(PRICE_BUCKETS)
+        ],
+    }
+
+
+def get_facets(params):
+    """Facet counts for list_products-style params, served from cache when possible"""
+    key = cache_key(normalize_params(params))
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(params)
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
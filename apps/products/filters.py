@@ -0,0 +1,62 @@
+from .models import Product
+from .search import rank_products, search_products
+from .variants import filter_by_attribute, parse_values, MATCH_ALL
+
+# Query params that narrow the catalog (as opposed to sort/pagination)
+FILTER_PARAMS = ('category', 'shop', 'search', 'min_price', 'max_price',
+                 'sizes', 'colors', 'sizes_match', 'colors_match')
+
+
+def catalog_products():
+    """Products customers can see"""
+    return Product.objects.filter(
+        is_active=True,
+        shop__is_approved=True,
+        shop__is_active=True
+    )
+
+
+def filter_products(products, params, rank=False):
+    """
+    Apply the list_products filters in ``params`` (a QueryDict or dict).
+
+    rank=True adds a search_rank column for relevance ordering; the result
+    must then be the outermost query.
+    """
+
+    category_id = params.get('category')
+    if category_id:
+        products = products.filter(category_id=category_id)
+
+    shop_id = params.get('shop')
+    if shop_id:
+        products = products.filter(shop_id=shop_id)
+
+    search = params.get('search')
+    if search:
+        products = (rank_products if rank else search_products)(products, search)
+
+    # Price range (based on display_price - what customer pays)
+    min_price = params.get('min_price')
+    if min_price:
+        products = products.filter(display_price__gte=min_price)
+
+    max_price = params.get('max_price')
+    if max_price:
+        products = products.filter(display_price__lte=max_price)
+
+    # Sizes filter
+    sizes = params.get('sizes')
+    if sizes:
+        products = filter_by_attribute(
+            products, 'size', parse_values(sizes), params.get('sizes_match', MATCH_ALL)
+        )
+
+    # Colors filter
+    colors = params.get('colors')
+    if colors:
+        products = filter_by_attribute(
+            products, 'color', parse_values(colors), params.get('colors_match', MATCH_ALL)
+        )
+
+    return products
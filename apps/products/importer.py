@@ -0,0 +1,188 @@
+"""
+Streaming bulk product import.
+
+Rows are read one at a time from a CSV or JSON Lines stream, validated
+with the ProductCreateSerializer rules and inserted ``batch_size`` at a
+time with bulk_create. Since bulk_create skips Product.save() and the
+post_save signals, each batch computes display_price itself and then
+updates the search index, variant rows and catalog caches in bulk.
+
+CSV columns: category (id or slug), name, description, base_price,
+stock_quantity, sizes, colors, material, brand, images. List cells
+(sizes, colors, images) are separated by ``|``.
+"""
+import csv
+import io
+import json
+
+from django.db import transaction
+from rest_framework import serializers
+
+from . import invalidation, search, variants
+from .models import Category, Product, ProductImage
+from .serializers import ProductCreateSerializer
+
+IMPORT_BATCH_SIZE = 500
+MAX_IMAGES = 5
+# Rows beyond this still fail, they're just counted instead of itemized
+MAX_REPORTED_ERRORS = 1000
+
+FORMATS = ('csv', 'jsonl')
+LIST_COLUMNS = ('sizes', 'colors', 'images')
+LIST_SEPARATOR = '|'
+
+
+class CategoryLookupField(serializers.Field):
+    """Category by id or slug, resolved from a map loaded once per import"""
+
+    default_error_messages = {
+        'does_not_exist': 'Category "{value}" not found',
+    }
+
+    def to_internal_value(self, data):
+        category = self.context['categories'].get(str(data).strip())
+        if category is None:
+            self.fail('does_not_exist', value=data)
+        return category
+
+    def to_representation(self, value):
+        return value.id
+
+
+class ProductImportSerializer(ProductCreateSerializer):
+    """ProductCreateSerializer rules plus image URLs, without a query per row"""
+
+    category = CategoryLookupField()
+    images = serializers.ListField(
+        child=serializers.URLField(max_length=500), required=False, max_length=MAX_IMAGES
+    )
+
+    class Meta(ProductCreateSerializer.Meta):
+        fields = ProductCreateSerializer.Meta.fields + ('images',)
+
+
+def detect_format(filename):
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def _split_list(value):
+    if isinstance(value, list):
+        return value
+    return [item.strip() for item in (value or '').split(LIST_SEPARATOR) if item.strip()]
+
+
+def iter_rows(stream, fmt):
+    """
+    Yield (row number, dict or error message) without reading the whole
+    stream. ``stream`` may be text or binary (e.g. an uploaded file).
+    """
+    if isinstance(stream.read(0), bytes):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'jsonl':
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield number, f'Invalid JSON: {exc}'
+                continue
+            yield number, row if isinstance(row, dict) else 'Each line must be a JSON object'
+        return
+
+    # Row numbers count the header as row 1, like a spreadsheet
+    for number, row in enumerate(csv.DictReader(stream), start=2):
+        # Empty cells count as missing, so model defaults apply
+        row = {key.strip(): value for key, value in row.items() if key and value not in ('', None)}
+        for column in LIST_COLUMNS:
+            if column in row:
+                row[column] = _split_list(row[column])
+        yield number, row
+
+
+class ProductImporter:
+    """
+    importer = ProductImporter(shop)
+    report = importer.run(stream, 'csv')
+    """
+
+    def __init__(self, shop, batch_size=IMPORT_BATCH_SIZE):
+        self.shop = shop
+        self.batch_size = batch_size
+        self.categories = {}
+        for category in Category.objects.all():
+            self.categories[str(category.id)] = category
+            self.categories[category.slug] = category
+
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, stream, fmt):
+        batch = []
+        for number, row in iter_rows(stream, fmt):
+            product = self.build(number, row)
+            if product is None:
+                continue
+            batch.append(product)
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        self.flush(batch)
+
+        if self.created:
+            invalidation.invalidate_shops([self.shop.id])
+
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+    def fail(self, number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': number, 'errors': errors})
+
+    def build(self, number, row):
+        """Unsaved Product (with ``_image_urls``) for a valid row, None otherwise"""
+        if isinstance(row, str):
+            self.fail(number, {'row': [row]})
+            return None
+
+        serializer = ProductImportSerializer(data=row, context={'categories': self.categories})
+        if not serializer.is_valid():
+            self.fail(number, serializer.errors)
+            return None
+
+        data = dict(serializer.validated_data)
+        image_urls = data.pop('images', [])
+        product = Product(
+            shop=self.shop,
+            commission_rate=self.shop.commission_rate,
+            display_price=Product.calculate_display_price(data['base_price'], self.shop.commission_rate),
+            **data
+        )
+        product._image_urls = image_urls
+        return product
+
+    def flush(self, batch):
+        if not batch:
+            return
+
+        with transaction.atomic():
+            Product.objects.bulk_create(batch)
+            ProductImage.objects.bulk_create([
+                ProductImage(product=product, image_url=url, display_order=order)
+                for product in batch
+                for order, url in enumerate(product._image_urls, start=1)
+            ])
+            search.index_products(batch)
+            variants.sync_attributes(batch)
+
+        self.created += len(batch)
+
+
+def import_products(shop, stream, fmt, batch_size=IMPORT_BATCH_SIZE):
+    return ProductImporter(shop, batch_size=batch_size).run(stream, fmt)
@@ -0,0 +1,66 @@
+"""
+Cache tags for catalog data.
+
+Responses are tagged with what they show (see apps.core.cache) and every
+catalog write retires the matching tags:
+
+- ``catalog``: product lists and facet counts, touched by any catalog write
+- ``categories`` / ``shops``: the category tree and shop lists
+- ``product:<id>``, ``shop:<id>``, ``category:<id>``: single-object responses
+
+Stock changes (every checkout and cancellation) only retire the products'
+own tags: they don't change which products a list shows or in what order,
+so list pages and facets keep their entries and show stock up to the
+cache timeout old.
+
+Invalidation waits for the surrounding transaction to commit, otherwise a
+concurrent reader could re-cache the old rows right after the tag bump.
+"""
+from django.db import transaction
+
+from apps.core.cache import invalidate_tags
+
+CATALOG_TAG = 'catalog'
+CATEGORIES_TAG = 'categories'
+SHOPS_TAG = 'shops'
+
+
+def product_tag(product_id):
+    return f'product:{product_id}'
+
+
+def shop_tag(shop_id):
+    return f'shop:{shop_id}'
+
+
+def category_tag(category_id):
+    return f'category:{category_id}'
+
+
+def product_tags(product):
+    """Tags for a response showing this product (and its shop/category names)"""
+    tags = [product_tag(product.id), shop_tag(product.shop_id)]
+    if product.category_id:
+        tags.append(category_tag(product.category_id))
+    return tags
+
+
+def _invalidate(tags):
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+def invalidate_products(product_ids):
+    # Shop lists show active product counts
+    _invalidate([CATALOG_TAG, SHOPS_TAG] + [product_tag(pk) for pk in product_ids])
+
+
+def invalidate_shops(shop_ids):
+    _invalidate([CATALOG_TAG, SHOPS_TAG] + [shop_tag(pk) for pk in shop_ids])
+
+
+def invalidate_categories(category_ids):
+    _invalidate([CATALOG_TAG, CATEGORIES_TAG] + [category_tag(pk) for pk in category_ids])
+
+
+def invalidate_stock(product_ids):
+    _invalidate([product_tag(pk) for pk in product_ids])
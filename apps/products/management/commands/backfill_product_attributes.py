@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.products.models import Product
+from apps.products.variants import sync_attributes
+
+
+class Command(BaseCommand):
+    help = 'Populate/repair product_attributes (size/color rows) from Product.sizes and Product.colors'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        products = Product.objects.only('id', 'sizes', 'colors').order_by('id')
+
+        last_id = 0
+        total = 0
+        while True:
+            batch = list(products.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+
+            with transaction.atomic():
+                sync_attributes(batch)
+
+            last_id = batch[-1].id
+            total += len(batch)
+            self.stdout.write(f'  synced {total} products')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Attributes backfilled for {total} products'))
@@ -0,0 +1,104 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.accounts.models import CustomUser
+from apps.products.cards import card_rows, serialize_cards
+from apps.products.models import Category, Product, ProductImage
+from apps.products.serializers import ProductSerializer
+from apps.shops.models import Shop
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ProductSerializer against the values()-based card path for listing pages (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=2000)
+        parser.add_argument('--images', type=int, default=3, help='Images per product')
+        parser.add_argument('--runs', type=int, default=30, help='Runs per page size')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            seller = self.seed(options['products'], options['images'])
+            base = Product.objects.filter(shop__owner=seller).order_by('-created_at')
+
+            def drf(queryset, request):
+                queryset = queryset.select_related('shop', 'category').prefetch_related('images')
+                return ProductSerializer(list(queryset), many=True, context={'request': request}).data
+
+            def cards(queryset, request):
+                return serialize_cards(card_rows(queryset, request), request)
+
+            for viewer, user in (('anonymous', AnonymousUser()), ('seller', seller)):
+                request = SimpleNamespace(user=user)
+                for page_size in (20, 100):
+                    page = base[:page_size]
+                    if json.dumps(drf(page, request)) != json.dumps(cards(page, request)):
+                        self.stdout.write(self.style.ERROR(f'{viewer}/{page_size}: outputs differ'))
+
+                    for label, build in (('serializer', drf), ('cards', cards)):
+                        self.report(f'{viewer} {page_size:>3} {label}', self.measure(build, page, request, options['runs']))
+
+            transaction.set_rollback(True)
+
+    def seed(self, count, images):
+        rng = random.Random(42)
+        owner = CustomUser.objects.create(
+            phone_number='bench-cards', full_name='Bench Seller',
+            user_type='seller', firebase_uid='bench-cards'
+        )
+        shop = Shop.objects.create(
+            owner=owner, shop_name='Bench Shop', business_address='-', city='Amravati',
+            pincode='444601', owner_contact_number='0000000000', is_approved=True
+        )
+        category = Category.objects.create(name='Bench', slug='bench-cards')
+
+        self.stdout.write(f'Seeding {count} products with {images} images each...')
+        products = []
+        for i in range(count):
+            base_price = Decimal(rng.randint(200, 5000))
+            products.append(Product(
+                shop=shop, category=category, name=f'Bench Product {i}',
+                description='Comfortable cotton shirt for daily wear',
+                base_price=base_price, commission_rate=Decimal('15.00'),
+                display_price=base_price * Decimal('1.15'), stock_quantity=10,
+                sizes=['S', 'M', 'L'], colors=['Blue', 'Black'], material='Cotton', brand='Bench',
+            ))
+        products = Product.objects.bulk_create(products, batch_size=1000)
+        ProductImage.objects.bulk_create([
+            ProductImage(product=product, image_url=f'https://img.example/{product.id}/{n}.jpg', display_order=n)
+            for product in products
+            for n in range(1, images + 1)
+        ], batch_size=1000)
+        return owner
+
+    def measure(self, build, queryset, request, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            build(queryset, request)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        # Allocations in a separate pass, tracing slows everything down
+        tracemalloc.start()
+        build(queryset, request)
+        peak = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+        return timings, peak
+
+    def report(self, label, results):
+        timings, peak = results
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f'{label:>24}: p50 {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms   '
+            f'peak alloc {peak:8.1f} KiB'
+        )
@@ -0,0 +1,108 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from apps.accounts.models import CustomUser
+from apps.products.models import Category, Product
+from apps.products.search import rank_products, rebuild_index
+from apps.shops.models import Shop
+
+COLORS = ['red', 'blue', 'green', 'black', 'white', 'maroon', 'yellow', 'pink', 'navy', 'grey']
+MATERIALS = ['cotton', 'silk', 'linen', 'denim', 'polyester', 'wool', 'rayon', 'chiffon']
+GARMENTS = ['shirt', 'kurta', 'saree', 'jeans', 'dress', 'kurti', 'dupatta', 'trousers', 'jacket', 'lehenga']
+BRANDS = ['Raymond', 'Fabindia', 'Biba', 'Levis', 'Manyavar', 'Allen', 'Peter', 'Local']
+FILLER = ['comfortable', 'festive', 'casual', 'printed', 'handloom', 'slim', 'regular', 'fit',
+          'embroidered', 'summer', 'winter', 'party', 'office', 'soft', 'breathable', 'classic']
+
+QUERIES = ['cotton', 'silk saree', 'blue shirt', 'levis', 'embroidered kurta', 'navy linen',
+           'party dress', 'fab', 'handloom', 'winter jacket']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark indexed product search against the icontains filter (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100000)
+        parser.add_argument('--runs', type=int, default=20, help='Runs per query')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['products'])
+
+            base = Product.objects.filter(is_active=True, shop__is_approved=True, shop__is_active=True)
+
+            def icontains(search):
+                return base.filter(
+                    Q(name__icontains=search) | Q(description__icontains=search)
+                ).order_by('-created_at')
+
+            def indexed(search):
+                return rank_products(base, search).order_by('-search_rank', '-created_at')
+
+            for label, build in (('icontains', icontains), ('indexed', indexed)):
+                self.report(label, self.measure(build, options['runs']))
+
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        rng = random.Random(42)
+        owner = CustomUser.objects.create(
+            phone_number='bench-search', full_name='Bench Seller',
+            user_type='seller', firebase_uid='bench-search'
+        )
+        shop = Shop.objects.create(
+            owner=owner, shop_name='Bench Shop', business_address='-', city='Amravati',
+            pincode='444601', owner_contact_number='0000000000', is_approved=True
+        )
+        categories = [
+            Category.objects.create(name=garment.title(), slug=f'bench-{garment}')
+            for garment in GARMENTS
+        ]
+
+        self.stdout.write(f'Seeding {count} products...')
+        batch = []
+        for i in range(count):
+            color, material, garment = rng.choice(COLORS), rng.choice(MATERIALS), rng.choice(GARMENTS)
+            base_price = Decimal(rng.randint(200, 5000))
+            batch.append(Product(
+                shop=shop,
+                category=categories[GARMENTS.index(garment)],
+                name=f'{color.title()} {material.title()} {garment.title()} {i}',
+                description=' '.join(rng.choices(FILLER, k=12)),
+                base_price=base_price,
+                commission_rate=Decimal('15.00'),
+                display_price=base_price * Decimal('1.15'),
+                stock_quantity=10,
+                material=material.title(),
+                brand=rng.choice(BRANDS),
+            ))
+            if len(batch) == 5000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        Product.objects.bulk_create(batch)
+        rebuild_index()
+
+    def measure(self, build, runs):
+        timings = []
+        for _ in range(runs):
+            for search in QUERIES:
+                queryset = build(search)
+                start = time.perf_counter()
+                # Same work as the paginator: one COUNT plus the first page
+                queryset.count()
+                list(queryset[:20])
+                timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def report(self, label, timings):
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f'{label:>10}: p50 {statistics.median(timings):8.2f} ms   '
+            f'p95 {p95:8.2f} ms   max {timings[-1]:8.2f} ms   ({len(timings)} queries)'
+        )
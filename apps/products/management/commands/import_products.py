@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.products.importer import FORMATS, IMPORT_BATCH_SIZE, detect_format, import_products
+from apps.shops.models import Shop
+
+
+def format_errors(errors):
+    """Serializer errors as one line; nested (list item) errors keep their key"""
+    if isinstance(errors, dict):
+        return '; '.join(f'{field}: {format_errors(messages)}' for field, messages in errors.items())
+    if isinstance(errors, list):
+        return ' '.join(format_errors(message) for message in errors)
+    return str(errors)
+
+
+class Command(BaseCommand):
+    help = 'Bulk import products for a shop from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or .jsonl file')
+        parser.add_argument('--shop', type=int, required=True, help='Shop id')
+        parser.add_argument('--format', choices=FORMATS, help='Detected from the file name by default')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            shop = Shop.objects.get(id=options['shop'])
+        except Shop.DoesNotExist:
+            raise CommandError(f"Shop {options['shop']} not found")
+
+        fmt = options['format'] or detect_format(options['path'])
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            report = import_products(shop, stream, fmt, batch_size=options['batch_size'])
+
+        for error in report['errors']:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']}: {format_errors(error['errors'])}"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ {report['created']} product(s) imported into {shop.shop_name}, {report['failed']} row(s) failed"
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.products.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product full-text search index from the products table'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuilt = rebuild_index()
+
+        if rebuilt:
+            self.stdout.write(self.style.SUCCESS('✅ Search index rebuilt'))
+        else:
+            self.stdout.write(self.style.WARNING('No search backend for this database, nothing to do'))
@@ -0,0 +1,33 @@
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.products.pricing import reprice_shop
+from apps.shops.models import Shop
+
+
+class Command(BaseCommand):
+    help = "Rewrite commission_rate and display_price of a shop's products in one UPDATE"
+
+    def add_arguments(self, parser):
+        parser.add_argument('shop', type=int, help='Shop id')
+        parser.add_argument('--commission-rate', help="New commission rate (%%) for the shop; defaults to its current rate")
+
+    def handle(self, *args, **options):
+        try:
+            shop = Shop.objects.get(id=options['shop'])
+        except Shop.DoesNotExist:
+            raise CommandError(f"Shop {options['shop']} not found")
+
+        rate = options['commission_rate']
+        if rate is not None:
+            try:
+                rate = Decimal(rate)
+            except InvalidOperation:
+                raise CommandError(f'Invalid commission rate: {rate}')
+            if not Decimal('0') <= rate < Decimal('1000'):
+                raise CommandError('Commission rate must be between 0 and 999.99')
+
+        updated = reprice_shop(shop, commission_rate=rate)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {updated} product(s) of {shop.shop_name} repriced at {shop.commission_rate}% commission'
+        ))
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from apps.products.search import get_backend
+
+    backend = get_backend(schema_editor.connection)
+    if backend is None:
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        backend.create_index(cursor)
+        backend.rebuild(cursor)
+
+
+def drop_search_index(apps, schema_editor):
+    from apps.products.search import get_backend
+
+    backend = get_backend(schema_editor.connection)
+    if backend is None:
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        backend.drop_index(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
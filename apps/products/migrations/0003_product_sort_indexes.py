@@ -0,0 +1,22 @@
+# Generated by Django 5.0 on 2026-10-16 22:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_search_index'),
+        ('shops', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['display_price', 'id'], name='products_display_d3c34d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['total_sales', 'id'], name='products_total_s_622b08_idx'),
+        ),
+    ]
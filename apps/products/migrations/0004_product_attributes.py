@@ -0,0 +1,47 @@
+# Generated by Django 5.0 on 2026-10-16 22:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_attributes(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductAttribute = apps.get_model('products', 'ProductAttribute')
+
+    rows = []
+    for product_id, sizes, colors in Product.objects.values_list('id', 'sizes', 'colors').iterator():
+        for kind, values in (('size', sizes), ('color', colors)):
+            for value in {str(value).strip() for value in values or []}:
+                if value:
+                    rows.append(ProductAttribute(product_id=product_id, kind=kind, value=value))
+        if len(rows) >= 1000:
+            ProductAttribute.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    ProductAttribute.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductAttribute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('size', 'Size'), ('color', 'Color')], max_length=10)),
+                ('value', models.CharField(max_length=100)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attributes', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Product Attribute',
+                'verbose_name_plural': 'Product Attributes',
+                'db_table': 'product_attributes',
+                'indexes': [models.Index(fields=['kind', 'value', 'product'], name='product_att_kind_4cc206_idx')],
+                'unique_together': {('product', 'kind', 'value')},
+            },
+        ),
+        migrations.RunPython(backfill_attributes, migrations.RunPython.noop),
+    ]
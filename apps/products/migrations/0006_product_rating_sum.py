@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-16 23:20
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_sum(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductReview = apps.get_model('reviews', 'ProductReview')
+
+    rating_sum = ProductReview.objects.filter(product=OuterRef('pk')).order_by().values('product').annotate(
+        total=Sum('rating')
+    ).values('total')
+    Product.objects.filter(total_reviews__gt=0).update(rating_sum=Coalesce(Subquery(rating_sum), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_category_updated_at'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_sum, migrations.RunPython.noop),
+    ]
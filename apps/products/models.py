@@ -1,6 +1,6 @@
 from django.db import models
 from apps.shops.models import Shop
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 
 
 class Category(models.Model):
@@ -13,6 +13,7 @@ class Category(models.Model):
     display_order = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'categories'
@@ -48,9 +49,16 @@ class Product(models.Model):
     material = models.CharField(max_length=100, blank=True)
     brand = models.CharField(max_length=100, blank=True)
 
-    # Reviews aggregation
+    # Reviews aggregation, kept by apps.reviews.ratings
     average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
     total_reviews = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)  # Sum of review ratings: average = rating_sum / total_reviews
+    # Star histogram: reviews with each rating
+    rating_1_count = models.IntegerField(default=0)
+    rating_2_count = models.IntegerField(default=0)
+    rating_3_count = models.IntegerField(default=0)
+    rating_4_count = models.IntegerField(default=0)
+    rating_5_count = models.IntegerField(default=0)
     total_sales = models.IntegerField(default=0)  # For analytics
 
     is_active = models.BooleanField(default=True)
@@ -66,20 +74,56 @@ class Product(models.Model):
             models.Index(fields=['shop', 'is_active']),
             models.Index(fields=['category', 'is_active']),
             models.Index(fields=['-created_at']),
+            # Keyset pagination seeks on (sort key, id)
+            models.Index(fields=['display_price', 'id']),
+            models.Index(fields=['total_sales', 'id']),
         ]
 
+    @staticmethod
+    def calculate_display_price(base_price, commission_rate):
+        """display_price = base_price × (1 + commission_rate/100), rounded half-up to paise"""
+        multiplier = Decimal('1') + (Decimal(commission_rate) / Decimal('100'))
+        return (Decimal(base_price) * multiplier).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
     def save(self, *args, **kwargs):
         """Auto-calculate display_price before saving"""
         if self.base_price and self.commission_rate:
-            # display_price = base_price × (1 + commission_rate/100)
-            multiplier = Decimal('1') + (self.commission_rate / Decimal('100'))
-            self.display_price = self.base_price * multiplier
+            self.display_price = self.calculate_display_price(self.base_price, self.commission_rate)
         super().save(*args, **kwargs)
 
+    def attribute_values(self, kind):
+        """Variant values of one kind, read from the (prefetched) attributes table"""
+        return {attribute.value for attribute in self.attributes.all() if attribute.kind == kind}
+
     def __str__(self):
         return self.name
 
 
+class ProductAttribute(models.Model):
+    """Normalized variant values (one row per size/color) for indexed filtering"""
+
+    KIND_CHOICES = (
+        ('size', 'Size'),
+        ('color', 'Color'),
+    )
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='attributes')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    value = models.CharField(max_length=100)
+
+    class Meta:
+        db_table = 'product_attributes'
+        verbose_name = 'Product Attribute'
+        verbose_name_plural = 'Product Attributes'
+        unique_together = ('product', 'kind', 'value')
+        indexes = [
+            models.Index(fields=['kind', 'value', 'product']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.kind}={self.value}"
+
+
 class ProductImage(models.Model):
     """Product images"""
 
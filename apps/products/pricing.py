@@ -0,0 +1,54 @@
+"""
+Set-based repricing of a shop's products.
+
+Product.save() recomputes display_price one row at a time; when a shop's
+commission rate changes, every product of the shop is rewritten with a
+single UPDATE instead. The arithmetic runs on integer paise so SQLite
+(which stores decimals as floats) rounds exactly like
+Product.calculate_display_price: half-up to two decimals.
+"""
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import invalidation
+
+# display_price = round_half_up(base_price × (10000 + commission basis points) / 10000)
+REPRICE_SQL = """
+    UPDATE products
+    SET commission_rate = %s,
+        display_price = ((CAST(ROUND(base_price * 100) AS BIGINT) * %s + 5000) / 10000) / 100.0,
+        updated_at = %s
+    WHERE shop_id = %s
+"""
+
+
+def reprice_shop(shop, commission_rate=None):
+    """
+    Copy the shop's commission rate onto all of its products and recompute
+    their display prices. Passing ``commission_rate`` changes the shop's
+    rate first. Returns the number of products updated.
+    """
+    if commission_rate is not None:
+        shop.commission_rate = Decimal(commission_rate)
+    rate = Decimal(shop.commission_rate)
+    basis_points = 10000 + int((rate * 100).to_integral_value())
+
+    with transaction.atomic():
+        if commission_rate is not None:
+            shop.save(update_fields=['commission_rate', 'updated_at'])
+
+        with connection.cursor() as cursor:
+            cursor.execute(REPRICE_SQL, [
+                connection.ops.adapt_decimalfield_value(rate, 5, 2),
+                basis_points,
+                connection.ops.adapt_datetimefield_value(timezone.now()),
+                shop.id,
+            ])
+            updated = cursor.rowcount
+
+        # Product detail responses are tagged with their shop, so this covers them too
+        invalidation.invalidate_shops([shop.id])
+
+    return updated
@@ -0,0 +1,327 @@
+"""
+Full-text product search.
+
+Products are indexed into ``product_search_index`` over name, brand,
+category name, material and description. Two backends are supported:
+
+- PostgreSQL: a weighted ``tsvector`` column with a GIN index, ranked by ``ts_rank``
+- SQLite: an FTS5 virtual table keyed by product id, ranked by ``bm25``
+
+Any other database falls back to the old ``icontains`` filter (no ranking).
+"""
+import re
+from abc import ABC, abstractmethod
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+INDEX_TABLE = 'product_search_index'
+RANK_FIELD = 'search_rank'
+
+# Field weights, highest first: name > brand/category > material > description
+WEIGHTED_COLUMNS = (
+    ('name', 'A', 10.0),
+    ('brand', 'B', 5.0),
+    ('category', 'B', 5.0),
+    ('material', 'C', 2.0),
+    ('description', 'D', 1.0),
+)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Split a user query into lowercase search terms"""
+    return TOKEN_RE.findall((text or '').lower())
+
+
+class BaseSearchBackend(ABC):
+    """
+    One database's index table and SQL. Subclasses provide the statements;
+    rebuild/index/filter/rank here put them together.
+    """
+
+    vendor = None
+
+    @abstractmethod
+    def create_index(self, cursor):
+        """Create the index table (and its index) if missing"""
+
+    def drop_index(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {INDEX_TABLE}')
+
+    @abstractmethod
+    def rebuild_sql(self):
+        """INSERT ... SELECT that indexes every product in one statement"""
+
+    @abstractmethod
+    def upsert_sql(self):
+        """INSERT-or-replace of one (product_id, *WEIGHTED_COLUMNS) row"""
+
+    @abstractmethod
+    def remove(self, cursor, product_ids):
+        """Delete the index entries of the given products"""
+
+    @abstractmethod
+    def build_query(self, tokens):
+        """Search terms -> the backend's match expression (all terms, prefix match)"""
+
+    @abstractmethod
+    def matching_ids_sql(self):
+        """SELECT of the matching product ids, taking the match expression"""
+
+    @abstractmethod
+    def join_sql(self):
+        """WHERE condition joining the index table to ``products``"""
+
+    @abstractmethod
+    def match_sql(self):
+        """WHERE condition on the joined index table, taking the match expression"""
+
+    @abstractmethod
+    def rank_sql(self):
+        """Relevance of the joined row, higher is better"""
+
+    def rank_params(self, query):
+        return [query]
+
+    def rebuild(self, cursor):
+        cursor.execute(f'DELETE FROM {INDEX_TABLE}')
+        cursor.execute(self.rebuild_sql())
+
+    def index(self, cursor, rows):
+        """rows: iterable of (product_id, name, brand, category, material, description)"""
+        cursor.executemany(self.upsert_sql(), list(rows))
+
+    def filter(self, queryset, search):
+        """Matching products only; safe to nest inside other queries"""
+        tokens = tokenize(search)
+        if not tokens:
+            return None
+
+        return queryset.filter(
+            id__in=RawSQL(self.matching_ids_sql(), [self.build_query(tokens)])
+        )
+
+    def rank(self, queryset, search):
+        """
+        Matching products with a ``search_rank`` column.
+
+        Joins the index table directly so matching and ranking happen in one
+        pass over the matched rows. The join refers to the ``products`` table
+        by name, so the result must be the outermost query.
+        """
+        tokens = tokenize(search)
+        if not tokens:
+            return None
+
+        query = self.build_query(tokens)
+        return queryset.extra(
+            select={RANK_FIELD: self.rank_sql()},
+            select_params=self.rank_params(query),
+            tables=[INDEX_TABLE],
+            where=[self.join_sql(), self.match_sql()],
+            params=[query],
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    vendor = 'postgresql'
+
+    def create_index(self, cursor):
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {INDEX_TABLE} (
+                product_id bigint PRIMARY KEY REFERENCES products (id)
+                    ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+                document tsvector NOT NULL
+            )
+        """)
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_document_gin '
+            f'ON {INDEX_TABLE} USING gin (document)'
+        )
+
+    def _document_sql(self, columns):
+        return ' || '.join(
+            f"setweight(to_tsvector('simple', coalesce({column}, '')), '{weight}')"
+            for column, (_, weight, _) in zip(columns, WEIGHTED_COLUMNS)
+        )
+
+    def rebuild_sql(self):
+        document = self._document_sql((
+            'p.name', 'p.brand', 'c.name', 'p.material', 'p.description',
+        ))
+        return f"""
+            INSERT INTO {INDEX_TABLE} (product_id, document)
+            SELECT p.id, {document}
+            FROM products p
+            LEFT JOIN categories c ON c.id = p.category_id
+        """
+
+    def upsert_sql(self):
+        document = self._document_sql(['%s'] * len(WEIGHTED_COLUMNS))
+        return f"""
+            INSERT INTO {INDEX_TABLE} (product_id, document)
+            VALUES (%s, {document})
+            ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document
+        """
+
+    def remove(self, cursor, product_ids):
+        cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE product_id = ANY(%s)', [list(product_ids)])
+
+    def build_query(self, tokens):
+        # Prefix match every term, all terms required
+        return ' & '.join(f'{token}:*' for token in tokens)
+
+    def matching_ids_sql(self):
+        return f"SELECT product_id FROM {INDEX_TABLE} WHERE document @@ to_tsquery('simple', %s)"
+
+    def join_sql(self):
+        return f'{INDEX_TABLE}.product_id = products.id'
+
+    def match_sql(self):
+        return f"{INDEX_TABLE}.document @@ to_tsquery('simple', %s)"
+
+    def rank_sql(self):
+        return f"ts_rank({INDEX_TABLE}.document, to_tsquery('simple', %s))"
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    vendor = 'sqlite'
+
+    def create_index(self, cursor):
+        columns = ', '.join(column for column, _, _ in WEIGHTED_COLUMNS)
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} '
+            f"USING fts5({columns}, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+    def rebuild_sql(self):
+        return f"""
+            INSERT INTO {INDEX_TABLE} (rowid, name, brand, category, material, description)
+            SELECT p.id, p.name, p.brand, coalesce(c.name, ''), p.material, p.description
+            FROM products p
+            LEFT JOIN categories c ON c.id = p.category_id
+        """
+
+    def upsert_sql(self):
+        # FTS5 tables have no ON CONFLICT support, but REPLACE works on rowid
+        return f"""
+            INSERT OR REPLACE INTO {INDEX_TABLE} (rowid, name, brand, category, material, description)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """
+
+    def remove(self, cursor, product_ids):
+        cursor.executemany(
+            f'DELETE FROM {INDEX_TABLE} WHERE rowid = %s',
+            [(product_id,) for product_id in product_ids]
+        )
+
+    def build_query(self, tokens):
+        # Quote every term so user input can't inject FTS syntax; prefix match, all terms required
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def matching_ids_sql(self):
+        return f'SELECT rowid FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s'
+
+    def join_sql(self):
+        return f'{INDEX_TABLE}.rowid = products.id'
+
+    def match_sql(self):
+        return f'{INDEX_TABLE} MATCH %s'
+
+    def rank_sql(self):
+        # bm25() is "lower is better", negate it so both backends sort rank descending
+        weights = ', '.join(str(weight) for _, _, weight in WEIGHTED_COLUMNS)
+        return f'-bm25({INDEX_TABLE}, {weights})'
+
+    def rank_params(self, query):
+        # bm25() reads the MATCH from the WHERE clause
+        return []
+
+
+BACKENDS = {
+    backend.vendor: backend
+    for backend in (PostgresSearchBackend(), SQLiteSearchBackend())
+}
+
+
+def get_backend(conn=None):
+    """Search backend for the connection's database, or None if unsupported"""
+    return BACKENDS.get((conn or connection).vendor)
+
+
+def _index_rows(products):
+    for product in products:
+        yield (
+            product.id,
+            product.name,
+            product.brand or '',
+            product.category.name if product.category_id else '',
+            product.material or '',
+            product.description or '',
+        )
+
+
+def index_products(products):
+    """Add or refresh index entries for the given products"""
+    backend = get_backend()
+    if backend is None:
+        return
+
+    with connection.cursor() as cursor:
+        backend.index(cursor, _index_rows(products))
+
+
+def remove_products(product_ids):
+    """Drop index entries for deleted products"""
+    backend = get_backend()
+    if backend is None or not product_ids:
+        return
+
+    with connection.cursor() as cursor:
+        backend.remove(cursor, product_ids)
+
+
+def rebuild_index():
+    """Re-index the whole catalog with a single INSERT ... SELECT"""
+    backend = get_backend()
+    if backend is None:
+        return False
+
+    with connection.cursor() as cursor:
+        backend.rebuild(cursor)
+    return True
+
+
+def is_ranked(queryset):
+    return RANK_FIELD in queryset.query.extra_select
+
+
+def _fallback(queryset, search):
+    return queryset.filter(
+        Q(name__icontains=search) | Q(description__icontains=search)
+    )
+
+
+def search_products(queryset, search):
+    """
+    Filter a Product queryset by a search string.
+
+    Falls back to ``icontains`` when the database has no search backend.
+    """
+    backend = get_backend()
+    results = backend.filter(queryset, search) if backend else None
+    return results if results is not None else _fallback(queryset, search)
+
+
+def rank_products(queryset, search):
+    """
+    Like search_products, but adds a ``search_rank`` column (higher is more
+    relevant) to order by. Only for the outermost query; without a search
+    backend the result has no rank (see is_ranked).
+    """
+    backend = get_backend()
+    results = backend.rank(queryset, search) if backend else None
+    return results if results is not None else _fallback(queryset, search)
@@ -1,5 +1,8 @@
 from rest_framework import serializers
 from .models import Category, Product, ProductImage
+from .variants import MAX_VALUE_LENGTH, normalize_value
+from apps.reviews.ratings import STAR_FIELDS
+from apps.reviews.serializers import ReviewSerializer
 from apps.shops.models import Shop
 from decimal import Decimal
 
@@ -15,9 +18,14 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'slug', 'icon_url', 'display_order', 'subcategories')
 
     def get_subcategories(self, obj):
-        if obj.subcategories.exists():
-            return CategorySerializer(obj.subcategories.filter(is_active=True), many=True).data
-        return []
+        # Pre-built {parent_id: [children]} map (see categories.build_category_tree)
+        children = self.context.get('children')
+        if children is not None:
+            subcategories = children.get(obj.id, [])
+        else:
+            # Filter in Python so a prefetch_related('subcategories') is used
+            subcategories = [sub for sub in obj.subcategories.all() if sub.is_active]
+        return CategorySerializer(subcategories, many=True, context=self.context).data
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
@@ -44,6 +52,17 @@ class ProductCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Stock cannot be negative")
         return value
 
+    def _check_variant_values(self, value):
+        if any(len(normalize_value(item)) > MAX_VALUE_LENGTH for item in value or []):
+            raise serializers.ValidationError(f"Values can be at most {MAX_VALUE_LENGTH} characters")
+        return value
+
+    def validate_sizes(self, value):
+        return self._check_variant_values(value)
+
+    def validate_colors(self, value):
+        return self._check_variant_values(value)
+
     def create(self, validated_data):
         # Get shop from request user
         shop = self.context['request'].user.shop
@@ -99,10 +118,13 @@ class ProductSerializer(serializers.ModelSerializer):
 class ProductDetailSerializer(ProductSerializer):
     """Detailed product view with related products"""
 
+    RECENT_REVIEWS = 3
+
     shop_details = serializers.SerializerMethodField()
+    rating_summary = serializers.SerializerMethodField()
 
     class Meta(ProductSerializer.Meta):
-        fields = ProductSerializer.Meta.fields + ('shop_details',)
+        fields = ProductSerializer.Meta.fields + ('shop_details', 'rating_summary')
 
     def get_shop_details(self, obj):
         return {
@@ -111,4 +133,17 @@ class ProductDetailSerializer(ProductSerializer):
             'city': obj.shop.city,
             'address': obj.shop.business_address,
             'image': obj.shop.shop_image_url,
-        }
\ No newline at end of file
+        }
+
+    def get_rating_summary(self, obj):
+        """
+        Star histogram from the product's counters (apps.reviews.ratings),
+        newest reviews first; no aggregation over the reviews
+        """
+        recent = obj.reviews.select_related('customer').order_by('-created_at')[:self.RECENT_REVIEWS]
+        return {
+            'average_rating': str(obj.average_rating),
+            'total_reviews': obj.total_reviews,
+            'stars': {str(star): getattr(obj, field) for star, field in sorted(STAR_FIELDS.items(), reverse=True)},
+            'recent_reviews': ReviewSerializer(recent, many=True).data,
+        }
@@ -1,3 +1,307 @@
+import io
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from apps.orders.tests import ShopFixtureMixin
+from .cards import card_rows, serialize_cards
+from .models import Category, Product, ProductImage
+from .pricing import reprice_shop
+from .serializers import ProductSerializer
+from . import search
+from .facets import compute_facets
+from .filters import catalog_products, filter_products
+from .importer import import_products
+
+
+class ProductSearchTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixture()
+        self.category = Category.objects.create(name='Ethnic Wear', slug='ethnic-wear')
+        self.kurta = self.create_product(name='Cotton Kurta', category=self.category)
+        self.jeans = self.create_product(name='Slim Jeans', description='Stretch cotton blend')
+        self.saree = self.create_product(name='Silk Saree', brand='Nalli')
+
+    def create_product(self, **fields):
+        return Product.objects.create(
+            shop=self.shop, base_price=Decimal('100'), commission_rate=Decimal('15.00'), **fields
+        )
+
+    def matches(self, text, queryset=None):
+        return list(search.search_products(queryset or Product.objects.all(), text).values_list('id', flat=True))
+
+    def test_index_follows_product_writes(self):
+        self.assertEqual(sorted(self.matches('cotton')), sorted([self.kurta.id, self.jeans.id]))
+        # Prefix match on every term, all terms required
+        self.assertEqual(self.matches('cott kur'), [self.kurta.id])
+        self.assertEqual(self.matches('nalli'), [self.saree.id])
+        self.assertEqual(self.matches('ethnic'), [self.kurta.id])
+
+        self.saree.name = 'Linen Saree'
+        self.saree.save()
+        self.assertEqual(self.matches('silk'), [])
+        self.assertEqual(self.matches('linen'), [self.saree.id])
+
+        self.category.name = 'Festive'
+        self.category.save()
+        self.assertEqual(self.matches('festive'), [self.kurta.id])
+
+        self.jeans.delete()
+        self.assertEqual(self.matches('cotton'), [self.kurta.id])
+        # FTS syntax in user input is searched for, not parsed
+        self.assertEqual(self.matches('cotton" OR "silk'), [])
+
+    def test_name_matches_rank_first(self):
+        ranked = search.rank_products(Product.objects.all(), 'cotton')
+        self.assertTrue(search.is_ranked(ranked))
+        self.assertEqual(list(ranked.order_by('-search_rank').values_list('id', flat=True)),
+                         [self.kurta.id, self.jeans.id])
+
+        response = self.client.get('/api/products', {'search': 'cotton'}).json()
+        self.assertEqual([product['id'] for product in response['results']['products']], [self.kurta.id, self.jeans.id])
+
+    def test_icontains_fallback_without_a_backend(self):
+        with mock.patch.object(search, 'get_backend', return_value=None):
+            self.assertEqual(sorted(self.matches('Cotton')), sorted([self.kurta.id, self.jeans.id]))
+            ranked = search.rank_products(Product.objects.all(), 'Cotton')
+            self.assertFalse(search.is_ranked(ranked))
+            # Brand and category aren't searched without the index
+            self.assertEqual(self.matches('Nalli'), [])
+
+
+class ProductVariantTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.create_fixture()
+
+    def test_values_must_fit_the_attributes_table(self):
+        seller = self.client_for(self.seller)
+        response = seller.put(f'/api/products/{self.product.id}/update', {'sizes': ['M', 'x' * 101]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('sizes', response.json()['errors'])
+
+        response = seller.put(f'/api/products/{self.product.id}/update', {'sizes': [30, 32]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.product.attributes.get(value='30').kind, 'size')
+
+
+class ProductCardTests(ShopFixtureMixin, TestCase):
+    """serialize_cards must stay interchangeable with ProductSerializer on the list endpoint"""
+
+    def setUp(self):
+        self.create_fixture()
+        category = Category.objects.create(name='Shirts', slug='shirts')
+        product = Product.objects.create(
+            shop=self.shop, category=category, name='Linen Shirt', description='Loose fit',
+            base_price=Decimal('499.50'), commission_rate=Decimal('15.00'), stock_quantity=4,
+            sizes=['M', 42], colors=['White'], material='Linen', brand='Acme'
+        )
+        for order in (1, 0):
+            ProductImage.objects.create(product=product, image_url=f'https://img.test/{order}.jpg', display_order=order)
+        # self.product has no category, images or optional text
+
+    def assert_same_cards(self, user):
+        request = SimpleNamespace(user=user)
+        products = Product.objects.order_by('-created_at', '-id')
+        expected = ProductSerializer(
+            products.select_related('shop', 'category').prefetch_related('images'),
+            many=True, context={'request': request}
+        ).data
+        cards = serialize_cards(card_rows(products, request), request)
+        # Same keys in the same order, same values
+        self.assertEqual([list(card.items()) for card in cards], [list(card.items()) for card in expected])
+
+    def test_cards_match_the_serializer_for_every_viewer(self):
+        for user in (AnonymousUser(), self.customers[0], self.seller):
+            with self.subTest(user=str(user)):
+                self.assert_same_cards(user)
+
+
+class ProductFacetTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixture()
+        shirts = Category.objects.create(name='Shirts', slug='shirts')
+        sarees = Category.objects.create(name='Sarees', slug='sarees')
+        for name, category, price, sizes, colors, brand in (
+            ('Cotton Shirt', shirts, '300', ['S', 'M'], ['Blue'], 'Acme'),
+            ('Linen Shirt', shirts, '900', ['M', 'L'], ['White', 'Blue'], 'Acme'),
+            ('Silk Saree', sarees, '2500', [], ['Red'], 'Nalli'),
+            ('Cotton Saree', sarees, '1200', [], ['Blue'], ''),
+            ('Hidden Shirt', shirts, '300', ['M'], ['Blue'], 'Acme'),
+        ):
+            Product.objects.create(
+                shop=self.shop, category=category, name=name, base_price=Decimal(price),
+                commission_rate=Decimal('15.00'), sizes=sizes, colors=colors, brand=brand,
+                is_active=name != 'Hidden Shirt'
+            )
+
+    def assert_counts_match(self, params):
+        facets = compute_facets(params)
+        products = filter_products(catalog_products(), params)
+
+        def count(**extra):
+            # The same filter with one facet value applied on top
+            return filter_products(catalog_products(), {**params, **extra}).count()
+
+        self.assertEqual(facets['total'], products.count())
+        for facet in facets['categories']:
+            self.assertEqual(facet['count'], count(category=str(facet['id'])))
+        for kind in ('sizes', 'colors'):
+            for facet in facets[kind]:
+                self.assertEqual(facet['count'], count(**{kind: facet['value']}))
+        for facet in facets['brands']:
+            self.assertEqual(facet['count'], products.filter(brand=facet['value']).count())
+        for facet in facets['price_ranges']:
+            in_range = products
+            if facet['min']:
+                in_range = in_range.filter(display_price__gte=facet['min'])
+            if facet['max']:
+                in_range = in_range.filter(display_price__lt=facet['max'])
+            self.assertEqual(facet['count'], in_range.count())
+        return facets
+
+    def test_counts_match_the_filtered_products(self):
+        facets = self.assert_counts_match({})
+        self.assertEqual(facets['total'], 5)
+        self.assertEqual(facets['colors'][0], {'value': 'Blue', 'count': 3})
+
+        facets = self.assert_counts_match({'colors': 'Blue', 'search': 'cotton'})
+        self.assertEqual(facets['total'], 2)
+        self.assertEqual([facet['value'] for facet in facets['sizes']], ['M', 'S'])
+
+
+class ProductDetailConditionalTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixture()
+        self.url = f'/api/products/{self.product.id}'
+
+    def test_etag_follows_product_writes(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+
+        unchanged = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(unchanged['ETag'], etag)
+        self.assertEqual(unchanged.content, b'')
+        # Sellers see more fields, so they don't share the anonymous version
+        seller = self.client_for(self.seller)
+        self.assertEqual(seller.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            seller.put(f'{self.url}/update', {'name': 'Oxford Shirt'}, format='json')
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+        self.assertEqual(changed.json()['product']['name'], 'Oxford Shirt')
+
+
+class CategoryTreeTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        men = Category.objects.create(name='Men', slug='men', display_order=1)
+        women = Category.objects.create(name='Women', slug='women', display_order=2)
+        shirts = Category.objects.create(name='Shirts', slug='shirts', parent=men)
+        Category.objects.create(name='Formal', slug='formal', parent=shirts)
+        self.kurtas = Category.objects.create(name='Kurtas', slug='kurtas', parent=women)
+
+    def tree(self):
+        return self.client.get('/api/categories').json()['categories']
+
+    def test_one_query_then_served_from_the_snapshot(self):
+        with self.assertNumQueries(1):
+            tree = self.tree()
+        self.assertEqual([category['name'] for category in tree], ['Men', 'Women'])
+        self.assertEqual(tree[0]['subcategories'][0]['subcategories'][0]['name'], 'Formal')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.tree(), tree)
+
+    def test_category_writes_rebuild_the_snapshot(self):
+        self.tree()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kurtas.name = 'Kurtis'
+            self.kurtas.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.tree()[1]['subcategories'][0]['name'], 'Kurtis')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kurtas.is_active = False
+            self.kurtas.save()
+        self.assertEqual(self.tree()[1]['subcategories'], [])
+
+
+class ProductImportTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.create_fixture()
+        Category.objects.create(name='Shirts', slug='shirts')
+
+    def test_bad_rows_are_reported_and_the_rest_land(self):
+        stream = io.StringIO(
+            'name,category,base_price,stock_quantity,sizes,colors,brand,images\n'
+            'Oxford Shirt,shirts,499.95,5,S|M,Blue,Acme,https://img.test/1.jpg|https://img.test/2.jpg\n'
+            'Broken Shirt,shirts,-10,5,,,,\n'
+            'Flannel Shirt,shirts,333.33,2,L,,,\n'
+            'Lost Shirt,jackets,100,1,,,,\n'
+            'Plain Tee,shirts,99.99,1,,,,\n'
+        )
+        # Batches of two, so the bad rows fall between and inside batches
+        report = import_products(self.shop, stream, 'csv', batch_size=2)
+
+        self.assertEqual((report['created'], report['failed']), (3, 2))
+        self.assertEqual([error['row'] for error in report['errors']], [3, 5])
+        self.assertIn('base_price', report['errors'][0]['errors'])
+        self.assertIn('category', report['errors'][1]['errors'])
+
+        imported = Product.objects.exclude(id=self.product.id).order_by('id')
+        self.assertEqual([product.name for product in imported], ['Oxford Shirt', 'Flannel Shirt', 'Plain Tee'])
+        for product in imported:
+            self.assertEqual(
+                product.display_price, Product.calculate_display_price(product.base_price, product.commission_rate)
+            )
+        oxford = imported[0]
+        self.assertEqual(
+            sorted(oxford.attributes.values_list('kind', 'value')), [('color', 'Blue'), ('size', 'M'), ('size', 'S')]
+        )
+        self.assertEqual(list(oxford.images.values_list('display_order', flat=True)), [1, 2])
+        self.assertEqual(list(search.search_products(Product.objects.all(), 'flannel')), [imported[1]])
+
+
+class RepriceShopTests(ShopFixtureMixin, TestCase):
+
+    BASE_PRICES = ('0.01', '0.04', '0.70', '0.90', '10.10', '33.33', '99.95', '123.45', '499.95', '999.99', '54321.09')
+    # 0.70, 0.90 and 10.10 at 5% and 15%, and 0.04 at 12.5%, land exactly on half a paisa
+    RATES = ('0.00', '5.00', '12.50', '15.00', '17.25', '33.33', '99.99')
+
+    def setUp(self):
+        self.create_fixture()
+        for price in self.BASE_PRICES:
+            Product.objects.create(shop=self.shop, name=price, base_price=Decimal(price), commission_rate=Decimal('15.00'))
+
+    def test_sql_rounding_matches_calculate_display_price(self):
+        for rate in self.RATES:
+            with self.subTest(rate=rate):
+                self.assertEqual(reprice_shop(self.shop, rate), len(self.BASE_PRICES) + 1)
+                for base_price, commission_rate, display_price in Product.objects.values_list(
+                    'base_price', 'commission_rate', 'display_price'
+                ):
+                    self.assertEqual(commission_rate, Decimal(rate))
+                    self.assertEqual(display_price, Product.calculate_display_price(base_price, rate))
+
+        # Half-paise cases round up: 10.10 x 1.05 = 10.605, 0.90 x 1.15 = 1.035
+        reprice_shop(self.shop, '5.00')
+        self.assertEqual(Product.objects.get(name='10.10').display_price, Decimal('10.61'))
+        reprice_shop(self.shop, '15.00')
+        self.assertEqual(Product.objects.get(name='0.90').display_price, Decimal('1.04'))
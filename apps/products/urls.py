@@ -7,6 +7,8 @@ urlpatterns = [
     path('categories', views.list_categories, name='categories'),
     path('products', views.list_products, name='list-products'),
     path('products/create', views.create_product, name='create-product'),
+    path('products/import', views.import_products, name='import-products'),
+    path('products/facets', views.product_facets, name='product-facets'),
     path('products/<int:product_id>', views.get_product_detail, name='product-detail'),
     path('products/<int:product_id>/update', views.update_product, name='update-product'),
     path('products/<int:product_id>/delete', views.delete_product, name='delete-product'),
@@ -0,0 +1,97 @@
+"""
+Size/color variants backed by the ``product_attributes`` table.
+
+``Product.sizes`` / ``Product.colors`` stay the source of truth that sellers
+edit; every save mirrors them into one ``ProductAttribute`` row per value so
+catalog filters become indexed (kind, value) lookups.
+"""
+from django.db.models import Count
+from .models import ProductAttribute
+
+ATTRIBUTE_SOURCES = (
+    ('size', 'sizes'),
+    ('color', 'colors'),
+)
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+
+# Longest size/color a product may list: each one becomes a ProductAttribute row
+MAX_VALUE_LENGTH = ProductAttribute._meta.get_field('value').max_length
+
+
+def normalize_value(value):
+    return str(value).strip()
+
+
+def attribute_pairs(product):
+    """{(kind, value), ...} a product should have rows for"""
+    pairs = set()
+    for kind, field in ATTRIBUTE_SOURCES:
+        for value in getattr(product, field) or []:
+            value = normalize_value(value)
+            if value:
+                pairs.add((kind, value))
+    return pairs
+
+
+def sync_attributes(products):
+    """
+    Bring attribute rows in line with the products' sizes/colors.
+
+    One SELECT for the existing rows, then at most one DELETE and one
+    bulk INSERT for the whole batch.
+    """
+    products = list(products)
+    if not products:
+        return
+
+    existing = {}
+    for row in ProductAttribute.objects.filter(
+        product_id__in=[product.id for product in products]
+    ).values_list('id', 'product_id', 'kind', 'value'):
+        existing[(row[1], row[2], row[3])] = row[0]
+
+    wanted = {
+        (product.id, kind, value)
+        for product in products
+        for kind, value in attribute_pairs(product)
+    }
+
+    stale_ids = [row_id for key, row_id in existing.items() if key not in wanted]
+    if stale_ids:
+        ProductAttribute.objects.filter(id__in=stale_ids).delete()
+
+    missing = wanted - existing.keys()
+    if missing:
+        ProductAttribute.objects.bulk_create(
+            [ProductAttribute(product_id=product_id, kind=kind, value=value)
+             for product_id, kind, value in missing],
+            ignore_conflicts=True
+        )
+
+
+def parse_values(raw):
+    """'S, M,,L' -> ['S', 'M', 'L']"""
+    return [value for value in (normalize_value(part) for part in raw.split(',')) if value]
+
+
+def filter_by_attribute(queryset, kind, values, match=MATCH_ALL):
+    """
+    Restrict a Product queryset by variant values.
+
+    match='any': product has at least one of the values
+    match='all': product has every value
+    """
+    values = sorted(set(values))
+    if not values:
+        return queryset
+
+    rows = ProductAttribute.objects.filter(kind=kind, value__in=values)
+    if match == MATCH_ANY or len(values) == 1:
+        return queryset.filter(id__in=rows.values('product_id'))
+
+    matching = rows.values('product_id').annotate(
+        matched=Count('value', distinct=True)
+    ).filter(matched=len(values)).values('product_id')
+    return queryset.filter(id__in=matching)
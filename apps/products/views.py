@@ -3,11 +3,21 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import Q
-from .models import Category, Product, ProductImage
-from .serializers import (CategorySerializer, ProductCreateSerializer,
-                          ProductSerializer, ProductDetailSerializer)
+from .models import Product, ProductImage
+from apps.shops.models import Shop
+from .serializers import ProductCreateSerializer, ProductSerializer, ProductDetailSerializer
+from .search import is_ranked
+from .filters import catalog_products, filter_products
+from .facets import get_facets
+from .categories import get_category_tree
+from .cards import card_rows, serialize_cards
+from . import importer
+from .invalidation import CATALOG_TAG, product_tag, product_tags
 from config.firebase_config import upload_to_firebase_storage
+from apps.core.cache import cached_response
+from apps.core.conditional import conditional
+from apps.core.idempotency import idempotent
+from apps.core.pagination import KeysetPagination
 
 
 
@@ -17,8 +27,15 @@ class ProductPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class ProductCursorPagination(KeysetPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent('products:create')
 def create_product(request):
     """
     Create new product (Seller only)
@@ -74,6 +91,65 @@ def create_product(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+def import_products(request):
+    """
+    Bulk import products from a CSV or JSON Lines file (Seller or admin)
+    POST /api/products/import
+    Body (form-data):
+    - file (.csv, or .jsonl one JSON object per line)
+    - format (optional: csv/jsonl, detected from the file name otherwise)
+    - shop (id, admins only)
+    Rows use the create_product fields plus images (up to 5 URLs). In CSV,
+    category is an id or slug and sizes/colors/images are separated by "|".
+    Valid rows are created even if others fail; errors are reported per row.
+    """
+
+    if request.user.is_staff and request.data.get('shop'):
+        shop = Shop.objects.filter(id=request.data['shop']).first()
+        if shop is None:
+            return Response({
+                'success': False,
+                'message': 'Shop not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+    elif request.user.user_type != 'seller':
+        return Response({
+            'success': False,
+            'message': 'Only sellers can import products'
+        }, status=status.HTTP_403_FORBIDDEN)
+    elif not hasattr(request.user, 'shop') or not request.user.shop.is_approved:
+        return Response({
+            'success': False,
+            'message': 'Your shop must be approved first'
+        }, status=status.HTTP_403_FORBIDDEN)
+    else:
+        shop = request.user.shop
+
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({
+            'success': False,
+            'message': 'file is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    fmt = request.data.get('format') or importer.detect_format(upload.name)
+    if fmt not in importer.FORMATS:
+        return Response({
+            'success': False,
+            'message': f"format must be one of: {', '.join(importer.FORMATS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    report = importer.import_products(shop, upload, fmt)
+
+    return Response({
+        'success': report['failed'] == 0,
+        'message': f"{report['created']} product(s) imported, {report['failed']} row(s) failed",
+        **report
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent('products:images')
 def upload_product_images(request, product_id):
     """
     Upload images for a product
@@ -134,6 +210,7 @@ def upload_product_images(request, product_id):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@cached_response('products:list', tags=[CATALOG_TAG])
 def list_products(request):
     """
     List all active products with filters
@@ -141,59 +218,27 @@ def list_products(request):
     Query params:
     - category (id)
     - shop (id)
-    - search (product name)
+    - search (name, description, brand, material, category)
     - min_price, max_price (based on display_price)
     - sizes, colors (comma-separated)
-    - sort (price_low, price_high, newest)
+    - sizes_match, colors_match (all: every value, the default; any: at least one)
+    - sort (relevance, price_low, price_high, popular, newest)
+      Defaults to relevance when searching, newest otherwise
+    - cursor (opt-in keyset pagination, empty for the first page;
+      not available for relevance sort)
+    - with_count (cursor mode only, include the total count)
     """
 
-    products = Product.objects.filter(
-        is_active=True,
-        shop__is_approved=True,
-        shop__is_active=True
-    ).select_related('shop', 'category').prefetch_related('images')
-
-    # Filters
-    category_id = request.GET.get('category')
-    if category_id:
-        products = products.filter(category_id=category_id)
-
-    shop_id = request.GET.get('shop')
-    if shop_id:
-        products = products.filter(shop_id=shop_id)
-
+    products = catalog_products()
     search = request.GET.get('search')
-    if search:
-        products = products.filter(
-            Q(name__icontains=search) | Q(description__icontains=search)
-        )
-
-    # Price range (based on display_price - what customer pays)
-    min_price = request.GET.get('min_price')
-    if min_price:
-        products = products.filter(display_price__gte=min_price)
-
-    max_price = request.GET.get('max_price')
-    if max_price:
-        products = products.filter(display_price__lte=max_price)
-
-    # Sizes filter
-    sizes = request.GET.get('sizes')
-    if sizes:
-        size_list = sizes.split(',')
-        for size in size_list:
-            products = products.filter(sizes__contains=[size.strip()])
-
-    # Colors filter
-    colors = request.GET.get('colors')
-    if colors:
-        color_list = colors.split(',')
-        for color in color_list:
-            products = products.filter(colors__contains=[color.strip()])
+    sort = request.GET.get('sort', 'relevance' if search else 'newest')
+    products = filter_products(products, request.GET, rank=sort == 'relevance')
 
     # Sorting
-    sort = request.GET.get('sort', 'newest')
-    if sort == 'price_low':
+    ranked = is_ranked(products)
+    if sort == 'relevance' and ranked:
+        products = products.order_by('-search_rank', '-created_at')
+    elif sort == 'price_low':
         products = products.order_by('display_price')
     elif sort == 'price_high':
         products = products.order_by('-display_price')
@@ -202,20 +247,52 @@ def list_products(request):
     else:  # newest
         products = products.order_by('-created_at')
 
-    # Pagination
-    paginator = ProductPagination()
-    paginated_products = paginator.paginate_queryset(products, request)
-
-    serializer = ProductSerializer(paginated_products, many=True, context={'request': request})
+    # Pagination (relevance rank can't be seeked on, so it stays page-numbered)
+    if ProductCursorPagination.is_requested(request) and not ranked:
+        paginator = ProductCursorPagination()
+    else:
+        paginator = ProductPagination()
+    # Cards are built from values() rows; same output as ProductSerializer
+    paginated_products = paginator.paginate_queryset(card_rows(products, request), request)
 
     return paginator.get_paginated_response({
         'success': True,
-        'products': serializer.data
+        'products': serialize_cards(paginated_products, request)
     })
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+def product_facets(request):
+    """
+    Facet counts for the filter sidebar
+    GET /api/products/facets
+    Accepts the same filter params as list_products (sort/pagination are ignored).
+    Returns counts per category, size, color, brand and price range.
+    """
+    return Response({
+        'success': True,
+        'facets': get_facets(request.GET)
+    }, status=status.HTTP_200_OK)
+
+
+def product_detail_version(request, product_id):
+    """
+    Product, shop and category timestamps in one row. Image writes bump
+    Product.updated_at (see signals), so they're covered too.
+    """
+    row = Product.objects.filter(id=product_id, is_active=True).values_list(
+        'updated_at', 'shop__updated_at', 'category__updated_at'
+    ).first()
+    if row is None:
+        return None
+    return row, max(value for value in row if value is not None)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@conditional(product_detail_version)
+@cached_response('products:detail', tags=lambda request, product_id: [product_tag(product_id)])
 def get_product_detail(request, product_id):
     """
     Get product details
@@ -229,10 +306,12 @@ def get_product_detail(request, product_id):
 
         serializer = ProductDetailSerializer(product, context={'request': request})
 
-        return Response({
+        response = Response({
             'success': True,
             'product': serializer.data
         }, status=status.HTTP_200_OK)
+        response.cache_tags = product_tags(product)
+        return response
 
     except Product.DoesNotExist:
         return Response({
@@ -318,15 +397,7 @@ def list_categories(request):
     Get all categories with subcategories
     GET /api/categories
     """
-    # Get only parent categories (no parent)
-    categories = Category.objects.filter(
-        parent__isnull=True,
-        is_active=True
-    ).prefetch_related('subcategories')
-
-    serializer = CategorySerializer(categories, many=True)
-
     return Response({
         'success': True,
-        'categories': serializer.data
-    }, status=status.HTTP_200_OK)
\ No newline at end of file
+        'categories': get_category_tree()
+    }, status=status.HTTP_200_OK)
@@ -1,4 +1,8 @@
+from collections import defaultdict
+
 from django.contrib import admin
+from django.db import transaction
+from . import ratings
 from .models import ProductReview
 
 @admin.register(ProductReview)
@@ -6,4 +10,28 @@ class ProductReviewAdmin(admin.ModelAdmin):
     list_display = ('product', 'customer', 'rating', 'is_verified_purchase', 'created_at')
     list_filter = ('rating', 'is_verified_purchase', 'created_at')
     search_fields = ('product__name', 'customer__full_name', 'review_text')
-    readonly_fields = ('order', 'product', 'customer', 'is_verified_purchase', 'created_at', 'updated_at')
\ No newline at end of file
+    readonly_fields = ('order', 'order_number', 'product', 'customer', 'is_verified_purchase', 'created_at', 'updated_at')
+
+    # Keep the product's rating counters in step with edits made here. Every
+    # save goes through adjust(), rating changed or not: product detail
+    # shows the newest reviews, so its ETag and cached body must move too
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            removed = [form.initial['rating']] if change else []
+            ratings.adjust(obj.product_id, added=[obj.rating], removed=removed)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            ratings.adjust(obj.product_id, removed=[obj.rating])
+
+    def delete_queryset(self, request, queryset):
+        removed = defaultdict(list)
+        for product_id, rating in queryset.values_list('product_id', 'rating'):
+            removed[product_id].append(rating)
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            for product_id, product_ratings in removed.items():
+                ratings.adjust(product_id, removed=product_ratings)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from apps.reviews import ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute product rating aggregates from the reviews table (drift repair)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, action='append', dest='products',
+                            help='Product id (repeatable); whole catalog by default')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many products have drifted')
+
+    def handle(self, *args, **options):
+        drifted = ratings.reconcile(product_ids=options['products'], dry_run=options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(f'{drifted} product(s) have ratings that differ from their reviews')
+            return
+        self.stdout.write(self.style.SUCCESS(f'✅ {drifted} product(s) reconciled'))
@@ -0,0 +1,51 @@
+# Generated by Django 5.0 on 2026-10-16 23:50
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_order_number(apps, schema_editor):
+    ProductReview = apps.get_model('reviews', 'ProductReview')
+    Order = apps.get_model('orders', 'Order')
+    ArchivedOrder = apps.get_model('orders', 'ArchivedOrder')
+
+    ProductReview.objects.filter(order__isnull=False).update(
+        order_number=Subquery(Order.objects.filter(id=OuterRef('order_id')).values('order_number')[:1])
+    )
+    # Reviews whose order was archived before this field existed: the
+    # customer's oldest archived order of that product not already matched,
+    # else a placeholder unique to the review
+    for review in ProductReview.objects.filter(order__isnull=True):
+        taken = ProductReview.objects.filter(product_id=review.product_id).values('order_number')
+        review.order_number = ArchivedOrder.objects.filter(
+            customer_id=review.customer_id, items__product_id=review.product_id
+        ).exclude(order_number__in=taken).order_by('placed_at').values_list(
+            'order_number', flat=True
+        ).first() or f'UNKNOWN{review.id}'
+        review.save(update_fields=['order_number'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_archive'),
+        ('reviews', '0002_review_order_set_null'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='productreview',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='productreview',
+            name='order_number',
+            field=models.CharField(default='', max_length=20),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_order_number, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='productreview',
+            unique_together={('order_number', 'product')},
+        ),
+    ]
@@ -8,7 +8,10 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 class ProductReview(models.Model):
     """Product reviews by customers"""
 
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='reviews')
+    # Null once the order is archived (apps.orders.archive); order_number
+    # keeps the link to the archived copy and the one-review-per-order rule
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, related_name='reviews')
+    order_number = models.CharField(max_length=20)
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews')
     customer = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='reviews')
 
@@ -24,7 +27,7 @@ class ProductReview(models.Model):
         verbose_name = 'Product Review'
         verbose_name_plural = 'Product Reviews'
         ordering = ['-created_at']
-        unique_together = ('order', 'product')  # One review per product per order
+        unique_together = ('order_number', 'product')  # One review per product per order
         indexes = [
             models.Index(fields=['product', '-created_at']),
         ]
@@ -0,0 +1,90 @@
+"""
+Product rating aggregates.
+
+Product.rating_sum, total_reviews and the star histogram
+(rating_1_count .. rating_5_count) are counters: every review write adds
+or removes its rating with one ``rating_sum = rating_sum + n`` UPDATE,
+which also moves the star's count and derives average_rating from the
+new values. Concurrent reviews of the same product queue on the row
+instead of overwriting each other's average, nothing scans the product's
+reviews, and product detail reads the histogram straight off the row.
+
+``reconcile`` (the reconcile_ratings command) recomputes the counters from
+product_reviews for the whole catalog in one set-based UPDATE, rewriting
+only products that drifted (reviews removed by a cascade, raw SQL).
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, FloatField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+from django.utils import timezone
+
+from apps.products.invalidation import invalidate_products
+from apps.products.models import Product
+from .models import ProductReview
+
+STAR_FIELDS = {star: f'rating_{star}_count' for star in range(1, 6)}
+
+
+def average_rating(rating_sum, count):
+    """SQL for rating_sum / count to two decimals, 0 without reviews; shared so both paths round alike"""
+    return Coalesce(
+        Round(Cast(rating_sum, FloatField()) / NullIf(count, 0), 2),
+        0,
+        output_field=DecimalField(max_digits=3, decimal_places=2)
+    )
+
+
+def adjust(product_id, added=(), removed=()):
+    """
+    Add and remove review ratings (1-5 each) on a product's aggregates, in
+    one UPDATE. Call it in the transaction that writes the reviews, also
+    when no rating changed: it retires the product's detail ETag and cache.
+    """
+    stars = Counter(added)
+    stars.subtract(removed)
+    rating_sum = F('rating_sum') + (sum(added) - sum(removed))
+    count = F('total_reviews') + (len(added) - len(removed))
+    Product.objects.filter(id=product_id).update(
+        rating_sum=rating_sum,
+        total_reviews=count,
+        average_rating=average_rating(rating_sum, count),
+        **{STAR_FIELDS[star]: F(STAR_FIELDS[star]) + delta for star, delta in stars.items() if delta},
+        # Listings show the rating, product detail also the newest reviews
+        updated_at=timezone.now()
+    )
+    invalidate_products([product_id])
+
+
+def reconcile(product_ids=None, dry_run=False):
+    """
+    Recompute rating aggregates from the reviews (all products, or
+    ``product_ids``). Returns how many products had drifted; those are
+    rewritten unless ``dry_run``.
+    """
+    reviews = ProductReview.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    expected = {
+        'rating_sum': Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0),
+        'total_reviews': Coalesce(Subquery(reviews.annotate(total=Count('id')).values('total')), 0),
+    }
+    expected['average_rating'] = average_rating(expected['rating_sum'], expected['total_reviews'])
+    for star, field in STAR_FIELDS.items():
+        expected[field] = Coalesce(
+            Subquery(reviews.filter(rating=star).annotate(total=Count('id')).values('total')), 0
+        )
+
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+    drifted = products.alias(**{f'expected_{field}': value for field, value in expected.items()}).exclude(
+        Q(**{field: F(f'expected_{field}') for field in expected})
+    )
+
+    with transaction.atomic():
+        drifted_ids = list(drifted.values_list('id', flat=True))
+        if drifted_ids and not dry_run:
+            # Subquery rather than the id list: no parameter limit on big catalogs
+            Product.objects.filter(id__in=drifted.values('id')).update(**expected, updated_at=timezone.now())
+            invalidate_products(drifted_ids)
+    return len(drifted_ids)
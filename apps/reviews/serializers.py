@@ -1,4 +1,6 @@
+from django.db import transaction
 from rest_framework import serializers
+from . import ratings
 from .models import ProductReview
 from apps.orders.models import Order
 
@@ -48,7 +50,7 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({'product': 'Product not in this order'})
 
         # Check if already reviewed
-        if ProductReview.objects.filter(order=order, product=product).exists():
+        if ProductReview.objects.filter(order_number=order.order_number, product=product).exists():
             raise serializers.ValidationError({'review': 'You have already reviewed this product'})
 
         data['order'] = order
@@ -57,7 +59,7 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        """Create review and update product rating"""
+        """Create review and update product rating (incrementally, see ratings.py)"""
         order_number = validated_data.pop('order_number')
         product_id = validated_data.pop('product_id')
 
@@ -65,23 +67,17 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
         product = validated_data['product']
         customer = self.context['request'].user
 
-        # Create review
-        review = ProductReview.objects.create(
-            order=order,
-            product=product,
-            customer=customer,
-            rating=validated_data['rating'],
-            review_text=validated_data.get('review_text', '')
-        )
-
-        # Update product average rating
-        from django.db.models import Avg
-        avg_rating = ProductReview.objects.filter(product=product).aggregate(Avg('rating'))['rating__avg']
-        total_reviews = ProductReview.objects.filter(product=product).count()
-
-        product.average_rating = round(avg_rating, 2)
-        product.total_reviews = total_reviews
-        product.save(update_fields=['average_rating', 'total_reviews'])
+        # Create review and count it on the product in one transaction
+        with transaction.atomic():
+            review = ProductReview.objects.create(
+                order=order,
+                order_number=order.order_number,
+                product=product,
+                customer=customer,
+                rating=validated_data['rating'],
+                review_text=validated_data.get('review_text', '')
+            )
+            ratings.adjust(product.id, added=[review.rating])
 
         return review
 
@@ -1,3 +1,103 @@
+import datetime
+import importlib
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
 from django.test import TestCase
 
-# Create your tests here.
+from apps.accounts.models import CustomUser
+from apps.orders import archive
+from apps.orders.models import Order
+from apps.orders.tests import ShopFixtureMixin
+from apps.products.models import Product
+from . import ratings
+from .models import ProductReview
+
+
+class ProductRatingTests(ShopFixtureMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixture()
+
+    def review(self, customer, rating):
+        client = self.client_for(customer)
+        order_number = self.place_order(client).json()['order']['order_number']
+        Order.objects.filter(order_number=order_number).update(order_status='delivered')
+        return client.post('/api/reviews/create', {
+            'order_number': order_number, 'product_id': self.product.id, 'rating': rating
+        }, format='json')
+
+    def counters(self):
+        return Product.objects.values_list('rating_sum', 'total_reviews', 'average_rating').get(id=self.product.id)
+
+    def test_reviews_update_the_counters(self):
+        for customer, rating in zip(self.customers, (5, 4, 4)):
+            self.assertEqual(self.review(customer, rating).status_code, 201)
+        self.assertEqual(self.counters(), (13, 3, Decimal('4.33')))
+        self.assertEqual(ratings.reconcile(dry_run=True), 0)
+
+        summary = self.client_for(self.customers[0]).get(f'/api/products/{self.product.id}').json()['product'][
+            'rating_summary'
+        ]
+        self.assertEqual(summary['stars'], {'5': 1, '4': 2, '3': 0, '2': 0, '1': 0})
+        self.assertEqual([review['rating'] for review in summary['recent_reviews']], [4, 4, 5])
+
+    def test_reconcile_repairs_drift(self):
+        self.review(self.customers[0], 2)
+        Product.objects.filter(id=self.product.id).update(rating_sum=40, total_reviews=9, average_rating=4)
+        other = Product.objects.create(
+            shop=self.shop, name='Other', base_price=Decimal('100'), commission_rate=Decimal('15.00'), rating_5_count=1
+        )
+
+        self.assertEqual(ratings.reconcile(dry_run=True), 2)
+        self.assertEqual(ratings.reconcile(), 2)
+        self.assertEqual(self.counters(), (2, 1, Decimal('2.00')))
+        self.assertEqual(Product.objects.get(id=self.product.id).rating_2_count, 1)
+        self.assertEqual(Product.objects.get(id=other.id).rating_5_count, 0)
+        self.assertEqual(ratings.reconcile(), 0)
+
+    def test_admin_text_edits_refresh_product_detail(self):
+        self.review(self.customers[0], 4)
+        review = ProductReview.objects.get()
+        customer = self.client_for(self.customers[0])
+        url = f'/api/products/{self.product.id}'
+        etag = customer.get(url)['ETag']
+
+        admin = CustomUser.objects.create_superuser('9300000000', 'Admin', password='-')
+        self.client.force_login(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/admin/reviews/productreview/{review.id}/change/', {
+                'rating': 4, 'review_text': 'Fits well'
+            })
+
+        response = customer.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['product']['rating_summary']['recent_reviews'][0]['review_text'], 'Fits well')
+        self.assertEqual(self.counters(), (4, 1, Decimal('4.00')))
+        self.assertEqual(ratings.reconcile(dry_run=True), 0)
+
+    def test_migration_backfills_order_numbers(self):
+        self.review(self.customers[0], 5)
+        self.review(self.customers[1], 4)
+        live, archived = ProductReview.objects.order_by('id')
+        archived_number = archived.order_number
+        Order.objects.filter(order_number=archived_number).update(
+            placed_at=datetime.datetime(2024, 1, 10, tzinfo=datetime.timezone.utc)
+        )
+        archive.archive()
+        # Wrong values as if never filled (blank twice would break the unique constraint)
+        for review in (live, archived):
+            ProductReview.objects.filter(id=review.id).update(order_number=f'?{review.id}')
+
+        backfill = importlib.import_module('apps.reviews.migrations.0003_review_order_number')
+        state = MigrationLoader(connection).project_state(('reviews', '0003_review_order_number'))
+        backfill.backfill_order_number(state.apps, None)
+
+        live.refresh_from_db()
+        archived.refresh_from_db()
+        self.assertEqual(live.order_number, live.order.order_number)
+        self.assertIsNone(archived.order)
+        self.assertEqual(archived.order_number, archived_number)
@@ -3,16 +3,25 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
+from django.db.models import Count, Max
 from .models import ProductReview
 from .serializers import ReviewCreateSerializer, ReviewSerializer
+from apps.core.conditional import conditional
+from apps.core.idempotency import idempotent
+from apps.core.pagination import KeysetPagination
 
 
 class ReviewPagination(PageNumberPagination):
     page_size = 10
 
 
+class ReviewCursorPagination(KeysetPagination):
+    page_size = 10
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent('reviews:create')
 def create_review(request):
     """
     Create product review
@@ -51,14 +60,26 @@ def create_review(request):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
+def product_reviews_version(request, product_id):
+    """Latest review change plus the count, so deletes change it too"""
+    summary = ProductReview.objects.filter(product_id=product_id).aggregate(
+        last_modified=Max('updated_at'), count=Count('id')
+    )
+    if not summary['count']:
+        return (0,), None
+    return (summary['last_modified'].isoformat(), summary['count']), summary['last_modified']
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional(product_reviews_version)
 def list_product_reviews(request, product_id):
     """
     List reviews for a product
     GET /api/products/{product_id}/reviews?sort=newest
 
     Sort options: newest, highest, lowest
+    Pass cursor= for keyset pagination (with_count=true for totals)
     """
 
     reviews = ProductReview.objects.filter(product_id=product_id).select_related('customer')
@@ -73,7 +94,10 @@ def list_product_reviews(request, product_id):
         reviews = reviews.order_by('-created_at')
 
     # Pagination
-    paginator = ReviewPagination()
+    if ReviewCursorPagination.is_requested(request):
+        paginator = ReviewCursorPagination()
+    else:
+        paginator = ReviewPagination()
     paginated_reviews = paginator.paginate_queryset(reviews, request)
 
     serializer = ReviewSerializer(paginated_reviews, many=True)
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from .models import Shop
 from django.utils import timezone
+from apps.products.invalidation import invalidate_shops
+from apps.products.pricing import reprice_shop
 
 
 @admin.register(Shop)
@@ -23,25 +25,45 @@ class ShopAdmin(admin.ModelAdmin):
         }),
     )
 
-    actions = ['approve_shops', 'reject_shops']
+    actions = ['approve_shops', 'reject_shops', 'reprice_products']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'commission_rate' in form.changed_data:
+            updated = reprice_shop(obj)
+            self.message_user(request, f'{updated} product(s) repriced at {obj.commission_rate}% commission.')
 
     def approve_shops(self, request, queryset):
         """Bulk approve shops"""
+        shop_ids = list(queryset.values_list('id', flat=True))
         updated = queryset.update(
             approval_status='approved',
             is_approved=True,
-            approved_at=timezone.now()
+            approved_at=timezone.now(),
+            updated_at=timezone.now()
         )
+        # update() skips post_save, so the cache never hears about it
+        invalidate_shops(shop_ids)
         self.message_user(request, f'{updated} shop(s) approved successfully.')
 
     approve_shops.short_description = "Approve selected shops"
 
     def reject_shops(self, request, queryset):
         """Bulk reject shops"""
+        shop_ids = list(queryset.values_list('id', flat=True))
         updated = queryset.update(
             approval_status='rejected',
-            is_approved=False
+            is_approved=False,
+            updated_at=timezone.now()
         )
+        invalidate_shops(shop_ids)
         self.message_user(request, f'{updated} shop(s) rejected.')
 
-    reject_shops.short_description = "Reject selected shops"
\ No newline at end of file
+    reject_shops.short_description = "Reject selected shops"
+
+    def reprice_products(self, request, queryset):
+        """Re-apply each shop's commission rate to all of its products"""
+        updated = sum(reprice_shop(shop) for shop in queryset)
+        self.message_user(request, f'{updated} product(s) repriced.')
+
+    reprice_products.short_description = "Reprice products with the shop's commission rate"
@@ -6,6 +6,8 @@ from .models import Shop
 from .serializers import ShopRegistrationSerializer, ShopSerializer
 from config.firebase_config import upload_to_firebase_storage
 from django.utils import timezone
+from apps.core.cache import cached_response
+from apps.products.invalidation import SHOPS_TAG
 
 
 @api_view(['POST'])
@@ -95,6 +97,7 @@ def get_my_shop(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@cached_response('shops:approved', tags=[SHOPS_TAG], timeout=300)
 def list_approved_shops(request):
     """
     List all approved shops (Public - for customers)
@@ -126,6 +129,7 @@ from rest_framework import status
 from django.db.models import Sum, Count
 from datetime import datetime, timedelta
 from apps.orders.models import Order
+from apps.orders.statistics import shop_totals
 from apps.products.models import Product
 
 
@@ -159,10 +163,6 @@ def seller_dashboard(request):
 
     shop = request.user.shop
 
-    # Date ranges
-    today = datetime.now().date()
-    this_month = datetime.now().replace(day=1).date()
-
     # Product statistics
     products = Product.objects.filter(shop=shop)
     product_stats = {
@@ -171,50 +171,36 @@ def seller_dashboard(request):
         'out_of_stock': products.filter(stock_quantity=0, is_active=True).count(),
     }
 
-    # Order statistics
-    orders = Order.objects.filter(shop=shop)
+    # Order statistics and earnings, from the shop's daily sales rollups
+    totals = shop_totals(shop.id)
 
     order_stats = {
-        'total_orders': orders.count(),
-        'pending_orders': orders.filter(order_status='placed').count(),
-        'confirmed_orders': orders.filter(order_status='confirmed').count(),
-        'shipped_orders': orders.filter(order_status='shipped').count(),
-        'delivered_orders': orders.filter(order_status='delivered').count(),
-        'cancelled_orders': orders.filter(order_status='cancelled').count(),
+        'total_orders': totals['total_orders'],
+        'pending_orders': totals['placed_orders'],
+        'confirmed_orders': totals['confirmed_orders'],
+        'shipped_orders': totals['shipped_orders'],
+        'delivered_orders': totals['delivered_orders'],
+        'cancelled_orders': totals['cancelled_orders'],
 
         # Today's stats
-        'today_orders': orders.filter(placed_at__date=today).count(),
-        'today_revenue': orders.filter(
-            placed_at__date=today,
-            order_status='delivered'
-        ).aggregate(total=Sum('seller_payout_amount'))['total'] or 0,
+        'today_orders': totals['today_orders'],
+        'today_revenue': totals['today_revenue'],
 
         # This month
-        'month_orders': orders.filter(placed_at__date__gte=this_month).count(),
-        'month_revenue': orders.filter(
-            placed_at__date__gte=this_month,
-            order_status='delivered'
-        ).aggregate(total=Sum('seller_payout_amount'))['total'] or 0,
+        'month_orders': totals['month_orders'],
+        'month_revenue': totals['month_revenue'],
     }
 
     # Earnings statistics
     earnings = {
-        'total_earned': orders.filter(
-            order_status='delivered'
-        ).aggregate(total=Sum('seller_payout_amount'))['total'] or 0,
-
-        'pending_earnings': orders.filter(
-            order_status__in=['confirmed', 'shipped']
-        ).aggregate(total=Sum('seller_payout_amount'))['total'] or 0,
-
-        'total_commission_paid': orders.filter(
-            order_status='delivered'
-        ).aggregate(total=Sum('commission_amount'))['total'] or 0,
+        'total_earned': totals['delivered_payout'],
+        'pending_earnings': totals['pending_payout'],
+        'total_commission_paid': totals['delivered_commission'],
     }
 
     # Recent orders
     from apps.orders.serializers import OrderSerializer
-    recent_orders = orders.select_related('customer').prefetch_related('items').order_by('-placed_at')[:5]
+    recent_orders = OrderSerializer.prepare_queryset(Order.objects.filter(shop=shop)).order_by('-placed_at')[:5]
     recent_orders_data = OrderSerializer(recent_orders, many=True, context={'request': request}).data
 
     # Shop info
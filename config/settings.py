@@ -54,6 +54,7 @@ INSTALLED_APPS = [
     'apps.products',
     'apps.orders',
     'apps.reviews',
+    'apps.carts',
     'apps.core',  # Add this
 
 ]
@@ -103,6 +104,34 @@ DATABASES = {
     )
 }
 
+# Puts SQLite test databases in a file when threaded tests run
+TEST_RUNNER = 'config.test_runner.TestRunner'
+
+
+# Cache (catalog responses, facets)
+# LocMemCache is per-process: point CACHE_BACKEND/CACHE_LOCATION at a shared
+# cache (e.g. django.core.cache.backends.redis.RedisCache) in production so
+# invalidations reach every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='cloth-marketplace'),
+        'TIMEOUT': 300,
+    }
+}
+
+
+# Idempotency-Key support for retried writes (apps.core.idempotency)
+
+IDEMPOTENCY_STORE = config('IDEMPOTENCY_STORE', default='apps.core.idempotency.DatabaseIdempotencyStore')
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=24 * 60 * 60, cast=int)  # seconds
+
+
+# Finished orders older than this move to the archive tables (archive_orders)
+
+ORDER_ARCHIVE_AFTER_DAYS = config('ORDER_ARCHIVE_AFTER_DAYS', default=180, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
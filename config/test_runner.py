@@ -0,0 +1,38 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import iter_test_cases
+
+
+class TestRunner(DiscoverRunner):
+    """
+    SQLite's default in-memory test database serialises connections with
+    table locks, so tests whose threads each open their own connection
+    (``concurrent_connections = True`` on the test case) need a file. When
+    the run includes such a test, SQLite test databases go to a temporary
+    directory that is removed afterwards; other runs stay in memory.
+    """
+
+    def get_databases(self, suite):
+        self.needs_file_database = any(
+            getattr(test, 'concurrent_connections', False) for test in iter_test_cases(suite)
+        )
+        return super().get_databases(suite)
+
+    def setup_databases(self, **kwargs):
+        self.database_dir = None
+        if self.needs_file_database:
+            for alias in kwargs['aliases']:
+                settings = connections[alias].settings_dict
+                if settings['ENGINE'] == 'django.db.backends.sqlite3' and not settings['TEST'].get('NAME'):
+                    self.database_dir = self.database_dir or tempfile.mkdtemp(prefix='test-db-')
+                    settings['TEST']['NAME'] = str(Path(self.database_dir) / f'{alias}.sqlite3')
+        return super().setup_databases(**kwargs)
+
+    def teardown_databases(self, old_config, **kwargs):
+        super().teardown_databases(old_config, **kwargs)
+        if self.database_dir:
+            shutil.rmtree(self.database_dir, ignore_errors=True)
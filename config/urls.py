@@ -27,6 +27,7 @@ urlpatterns = [
     path('api/', include('apps.products.urls')),
     path('api/orders/', include('apps.orders.urls')),
     path('api/reviews/', include('apps.reviews.urls')),
+    path('api/cart/', include('apps.carts.urls')),
 ]
 
 # Customize admin site header